@@ -1,11 +1,21 @@
 # Copyright (c) 2026, NASECO and contributors
 # For license information, please see license.txt
 
-import frappe
-from frappe import _
 import json
 from datetime import datetime
 
+import frappe
+from frappe import _
+
+from naseco_fieldopsbackend.geo import maps, spatial
+from naseco_fieldopsbackend.media import uploads
+from naseco_fieldopsbackend.sync import cursor, idempotency, journal, push, push_jobs, reference, stream
+from naseco_fieldopsbackend.sync import scope as sync_scope
+from naseco_fieldopsbackend.sync.hydration import chunked, hydrate_docs
+from naseco_fieldopsbackend.sync.log_buffer import buffered_sync_log
+from naseco_fieldopsbackend.sync.log_buffer import get_buffer as get_sync_log_buffer
+from naseco_fieldopsbackend.sync.mappers import MobileMapper
+
 # Mobile <-> Frappe mappings
 BASE_STORE_TO_DOCTYPE = {
 	"outgrowers": "Outgrower",
@@ -40,30 +50,51 @@ BASE_STORE_TO_DOCTYPE = {
 }
 
 STORE_TO_DOCTYPE = dict(BASE_STORE_TO_DOCTYPE)
-STORE_TO_DOCTYPE.update({
-	"OutGrower": "Outgrower",
-	"Plot": "Farm Plot",
-	"CropCycle": "Crop Cycle",
-	"CropCycleStage": "Crop Cycle Stage",
-	"Visit": "Field Visit",
-	"PlotCropAssignment": "Plot Crop Assignment",
-	"StageActivity": "Stage Activity",
-	"StageInputRequest": "Stage Input Request",
-	"StageInputDispatch": "Stage Input Dispatch",
-	"Crop": "Crop",
-	"Variety": "Crop Variety",
-	"Season": "Season",
-	"CropRecipe": "Crop Recipe",
-	"RecipeStage": "Recipe Stage",
-	"RecipeInput": "Recipe Input Item",
-	"VisitType": "Visit Type",
-	"Region": "Region",
-	"Unit": "Unit",
-	"InspectionAttribute": "Inspection Attribute",
-})
+STORE_TO_DOCTYPE.update(
+	{
+		"OutGrower": "Outgrower",
+		"Plot": "Farm Plot",
+		"CropCycle": "Crop Cycle",
+		"CropCycleStage": "Crop Cycle Stage",
+		"Visit": "Field Visit",
+		"PlotCropAssignment": "Plot Crop Assignment",
+		"StageActivity": "Stage Activity",
+		"StageInputRequest": "Stage Input Request",
+		"StageInputDispatch": "Stage Input Dispatch",
+		"Crop": "Crop",
+		"Variety": "Crop Variety",
+		"Season": "Season",
+		"CropRecipe": "Crop Recipe",
+		"RecipeStage": "Recipe Stage",
+		"RecipeInput": "Recipe Input Item",
+		"VisitType": "Visit Type",
+		"Region": "Region",
+		"Unit": "Unit",
+		"InspectionAttribute": "Inspection Attribute",
+	}
+)
 
 DOCTYPE_TO_STORE = {v: k for k, v in BASE_STORE_TO_DOCTYPE.items()}
 
+# Main synced doctypes, in pull order
+SYNC_DOCTYPES = [
+	"Outgrower",
+	"Farm Plot",
+	"Crop Cycle",
+	"Crop Cycle Stage",
+	"Field Visit",
+	"Finding",
+	"Plot Crop Assignment",
+	"Stage Activity",
+	"Stage Input Request",
+	"Stage Input Dispatch",
+	"Attendance",
+	"Employee Checkin",
+	"Expense Claim",
+	"Leave Application",
+	"Employee Advance",
+]
+
 ID_FIELD_MAP = {
 	"Outgrower": "outgrower_id",
 	"Farm Plot": "plot_id",
@@ -274,155 +305,39 @@ MOBILE_FIELD_MAP = {
 }
 
 
+_mapper_cache = {}
+
+
+def _get_mapper(doctype):
+	if doctype not in _mapper_cache:
+		_mapper_cache[doctype] = MobileMapper(
+			doctype,
+			MOBILE_FIELD_MAP.get(doctype, {}),
+			ID_FIELD_MAP.get(doctype),
+			finish_record=_enrich_outgrower_aliases if doctype == "Outgrower" else None,
+		)
+	return _mapper_cache[doctype]
+
+
 def _map_mobile_to_doc(doctype, payload):
 	if doctype == "Outgrower":
 		payload = _normalize_outgrower_payload(payload)
 
-	mapping = MOBILE_FIELD_MAP.get(doctype, {})
-	result = {}
-	for key, value in (payload or {}).items():
-		if key in ("doctype", "name", "owner", "creation", "modified", "modified_by", "docstatus"):
-			continue
-		# ignore client-only fields
-		if key in ("synced",):
-			continue
-		if key == "createdAt":
-			result["creation"] = value
-			continue
-		if key == "updatedAt":
-			result["modified"] = value
-			continue
-		if key == "photos" and doctype == "Field Visit":
-			# child table photos: list of strings
-			result["photos"] = [{"photo": p} for p in value or []]
-			continue
-		if key == "photos" and doctype == "Farm Plot":
-			result["photos"] = [{"file": p} for p in value or []]
-			continue
-		if key == "polygon" and doctype == "Farm Plot":
-			result["polygon"] = [
-				{
-					MOBILE_FIELD_MAP["Plot Vertex"].get("lat", "latitude"): v.get("lat"),
-					MOBILE_FIELD_MAP["Plot Vertex"].get("lng", "longitude"): v.get("lng"),
-					MOBILE_FIELD_MAP["Plot Vertex"].get("orderIndex", "order_index"): v.get("orderIndex", idx + 1),
-				}
-				for idx, v in enumerate(value or [])
-			]
-			continue
-		if key == "stages" and doctype == "Crop Recipe":
-			result["stages"] = []
-			for stage in value or []:
-				stage_doc = {
-					"stage_name": stage.get("name"),
-					"order_index": stage.get("orderIndex"),
-					"duration_days": stage.get("durationDays"),
-				}
-				inputs = []
-				for inp in stage.get("inputsPerAcre", []) or []:
-					inputs.append({
-						"input_type": inp.get("type"),
-						"input_name": inp.get("name"),
-						"quantity_per_acre": inp.get("quantityPerAcre"),
-						"unit": inp.get("unit"),
-					})
-				stage_doc["inputs"] = inputs
-				result["stages"].append(stage_doc)
-			continue
-
-		fieldname = mapping.get(key, key)
-		result[fieldname] = value
-
-	# normalize required fields for existing doctypes
-	if doctype == "Stage Input Request":
-		if result.get("input_type") and not result.get("input_name"):
-			result["input_name"] = result.get("input_type")
-		if result.get("quantity") is not None and not result.get("quantity_needed"):
-			result["quantity_needed"] = result.get("quantity")
-		if result.get("requested_date") and not result.get("request_date"):
-			result["request_date"] = result.get("requested_date")
-
-	if doctype == "Stage Input Dispatch":
-		if result.get("input_type") and not result.get("input_name"):
-			result["input_name"] = result.get("input_type")
-		if result.get("quantity") is not None and not result.get("quantity_dispatched"):
-			result["quantity_dispatched"] = result.get("quantity")
-		if result.get("request_id") and not result.get("input_request"):
-			result["input_request"] = result.get("request_id")
-
-	if doctype == "Field Visit" and result.get("status") and not result.get("visit_status"):
-		result["visit_status"] = "Submitted" if result.get("status") == "completed" else "Draft"
-
+	result = _get_mapper(doctype).to_doc(payload)
 	result = _resolve_employee_fields(doctype, payload, result)
 	return _filter_fields(doctype, result)
 
 
 def _map_doc_to_mobile(doctype, doc_dict):
-	mapping = MOBILE_FIELD_MAP.get(doctype, {})
-	reverse = {v: k for k, v in mapping.items()}
-	result = {}
-	for key, value in (doc_dict or {}).items():
-		if key in ("doctype", "owner", "modified_by", "docstatus", "idx", "parent", "parenttype", "parentfield"):
-			continue
-		if key == "creation":
-			result["createdAt"] = value
-			continue
-		if key == "modified":
-			result["updatedAt"] = value
-			continue
-		if key == "photos" and doctype == "Field Visit":
-			result["photos"] = [p.get("photo") for p in (value or [])]
-			continue
-		if key == "photos" and doctype == "Farm Plot":
-			result["photos"] = [p.get("file") or p.get("url") for p in (value or [])]
-			continue
-		if key == "polygon" and doctype == "Farm Plot":
-			result["polygon"] = [
-				{
-					"lat": v.get("latitude"),
-					"lng": v.get("longitude"),
-					"orderIndex": v.get("order_index"),
-				}
-				for v in (value or [])
-			]
-			continue
-		if key == "stages" and doctype == "Crop Recipe":
-			stages = []
-			for s in value or []:
-				stage = {
-					"name": s.get("stage_name"),
-					"orderIndex": s.get("order_index"),
-					"durationDays": s.get("duration_days"),
-				}
-				inputs = []
-				for inp in s.get("inputs", []) or []:
-					inputs.append({
-						"type": inp.get("input_type"),
-						"name": inp.get("input_name"),
-						"quantityPerAcre": inp.get("quantity_per_acre"),
-						"unit": inp.get("unit"),
-					})
-				stage["inputsPerAcre"] = inputs
-				stages.append(stage)
-			result["stages"] = stages
-			continue
+	return _get_mapper(doctype).to_mobile(doc_dict)
 
-		result[reverse.get(key, key)] = value
 
-	# ensure id fields returned
-	if doctype in ID_FIELD_MAP and ID_FIELD_MAP[doctype] in doc_dict:
-		mobile_id_field = _reverse_id_field_name(doctype)
-		if mobile_id_field:
-			result[mobile_id_field] = doc_dict.get(ID_FIELD_MAP[doctype])
-	if doctype == "Outgrower":
-		_enrich_outgrower_aliases(result)
-	return result
+def _map_docs_to_mobile(doctype, docs):
+	return _get_mapper(doctype).map_many(docs)
 
 
 def _reverse_id_field_name(doctype):
-	for mobile_field, frappe_field in MOBILE_FIELD_MAP.get(doctype, {}).items():
-		if frappe_field == ID_FIELD_MAP.get(doctype):
-			return mobile_field
-	return None
+	return _get_mapper(doctype).mobile_id_field
 
 
 def _resolve_doctype(store_or_doctype):
@@ -453,7 +368,9 @@ def _filter_fields(doctype, data):
 
 def _resolve_employee_fields(doctype, payload, result):
 	meta = _get_meta(doctype)
-	user_id = (payload or {}).get("userId") or (payload or {}).get("userEmail") or (payload or {}).get("email")
+	user_id = (
+		(payload or {}).get("userId") or (payload or {}).get("userEmail") or (payload or {}).get("email")
+	)
 	if user_id and meta.has_field("employee"):
 		emp = frappe.db.get_value("Employee", {"user_id": user_id}, "name")
 		if not emp and (payload or {}).get("userEmail"):
@@ -607,7 +524,9 @@ def _get_attendance_employee_ids(args):
 	def _resolve_by_name(values):
 		if not values:
 			return set()
-		rows = frappe.get_all("Employee", filters={"employee_name": ["in", list(set(values))]}, fields=["name"])
+		rows = frappe.get_all(
+			"Employee", filters={"employee_name": ["in", list(set(values))]}, fields=["name"]
+		)
 		return {r.name for r in rows}
 
 	source_sets = []
@@ -634,7 +553,11 @@ def _get_attendance_employee_ids(args):
 		source_sets.append(_resolve_by_name(full_names))
 
 	# Optional fallback to current logged-in user email
-	if not source_sets and getattr(frappe.session, "user", None) and frappe.session.user not in ("Guest", "Administrator"):
+	if (
+		not source_sets
+		and getattr(frappe.session, "user", None)
+		and frappe.session.user not in ("Guest", "Administrator")
+	):
 		source_sets.append(_resolve_by_email([frappe.session.user]))
 
 	if not source_sets:
@@ -707,67 +630,12 @@ def bulk_sync(data):
 	Accepted formats:
 	- [{"doctype": "DocType", "operation": "CREATE/UPDATE/DELETE", "doc": {...}}]
 	- {"data": [{"storeName": "outgrowers", "recordId": "...", "payload": {...}, "operation": "SYNC"}]}
-	"""
-	try:
-		records = json.loads(data) if isinstance(data, str) else data
-		if isinstance(records, dict) and "data" in records:
-			records = records.get("data")
-
-		results = []
-		for record in records or []:
-			try:
-				if record.get("storeName") or record.get("store_name") or record.get("payload"):
-					# Delegate to push_sync_data-style payloads
-					out = push_sync_data({"data": [record]})
-					results.extend(out.get("results", []))
-					continue
-
-				doctype = record.get("doctype")
-				operation = (record.get("operation") or "").upper()
-				doc_data = record.get("doc") or {}
-				if doctype == "Outgrower":
-					doc_data = _normalize_outgrower_payload(doc_data)
-
-				result = {"doctype": doctype, "operation": operation, "status": "success"}
-
-				if operation == "CREATE":
-					doc = frappe.get_doc(doc_data)
-					doc.insert(ignore_permissions=True)
-					result["name"] = doc.name
-				elif operation == "UPDATE":
-					doc_name = doc_data.get("name")
-					if doc_name and frappe.db.exists(doctype, doc_name):
-						doc = frappe.get_doc(doctype, doc_name)
-						doc.update(doc_data)
-						doc.save(ignore_permissions=True)
-						result["name"] = doc.name
-					else:
-						doc = frappe.get_doc(doc_data)
-						doc.insert(ignore_permissions=True)
-						result["name"] = doc.name
-				elif operation == "DELETE":
-					doc_name = doc_data.get("name")
-					if doc_name and frappe.db.exists(doctype, doc_name):
-						frappe.delete_doc(doctype, doc_name, ignore_permissions=True)
-						result["name"] = doc_name
-					else:
-						result["status"] = "not_found"
-						result["message"] = f"Document {doctype} {doc_name} not found"
-				else:
-					result["status"] = "error"
-					result["message"] = f"Unknown operation: {operation}"
-
-				log_sync(frappe.session.user, doctype, doc_data.get("name"), operation, result["status"])
-				results.append(result)
-			except Exception as e:
-				results.append({"status": "error", "doctype": record.get("doctype"), "error": str(e)})
 
-		frappe.db.commit()
-		return {"success": True, "results": results}
-	except Exception as e:
-		frappe.db.rollback()
-		frappe.log_error(f"Bulk sync error: {str(e)}")
-		return {"success": False, "error": str(e)}
+	Records are applied within the request; the second format may add `"async": 1`
+	to queue the batch as a background job instead.
+	"""
+	with buffered_sync_log():
+		return _push_sync_data(data, async_by_size=False)
 
 
 @frappe.whitelist()
@@ -790,16 +658,26 @@ def get_modified_records(last_sync_timestamp=None, doctypes=None, doctype=None,
 			last_sync_timestamp = since
 		# Parse last sync timestamp
 		if isinstance(last_sync_timestamp, str):
-			last_sync = datetime.fromisoformat(last_sync_timestamp.replace('Z', '+00:00'))
+			last_sync = datetime.fromisoformat(last_sync_timestamp.replace("Z", "+00:00"))
 		else:
 			last_sync = last_sync_timestamp
 
 		# Default synced doctypes
 		default_doctypes = [
-			"Outgrower", "Farm Plot", "Crop Cycle", "Crop Cycle Stage",
-			"Field Visit", "Finding", "Plot Crop Assignment", "Stage Activity",
-			"Stage Input Request", "Stage Input Dispatch",
-			"Attendance", "Leave Application", "Employee Advance", "Expense Claim"
+			"Outgrower",
+			"Farm Plot",
+			"Crop Cycle",
+			"Crop Cycle Stage",
+			"Field Visit",
+			"Finding",
+			"Plot Crop Assignment",
+			"Stage Activity",
+			"Stage Input Request",
+			"Stage Input Dispatch",
+			"Attendance",
+			"Leave Application",
+			"Employee Advance",
+			"Expense Claim",
 		]
 
 		# Parse doctypes filter
@@ -810,330 +688,603 @@ def get_modified_records(last_sync_timestamp=None, doctypes=None, doctype=None,
 		else:
 			target_doctypes = default_doctypes
 
+		if stream.is_stream_requested(args):
+			return stream.ndjson_response(
+				_iter_modified_stores(args, target_doctypes, last_sync),
+				{"sync_timestamp": datetime.now().isoformat()},
+			)
+
 		modified_records = {}
 
 		for doctype in target_doctypes:
 			try:
-				filters = []
-				if doctype == "Attendance":
-					filters = _build_attendance_filters(args, last_sync)
-					if not filters:
-						modified_records[doctype] = []
-						continue
-				elif doctype == "Employee Checkin":
-					filters = _build_employee_checkin_filters(args, last_sync)
-					if not filters:
-						modified_records[doctype] = []
-						continue
-				elif last_sync:
-					filters = [["modified", ">", last_sync]]
-
-				# Get modified records
-				records = frappe.get_all(
-					doctype,
-					filters=filters,
-					fields=["*"],
-					order_by="modified asc"
-				)
+				filters = _get_sync_filters(doctype, args, last_sync)
+				if filters is None:
+					modified_records[doctype] = []
+					continue
 
-				# Get full documents with child tables
-				full_records = []
-				for record in records:
-					try:
-						doc = frappe.get_doc(doctype, record.name)
-						doc_dict = doc.as_dict()
-						if doctype == "Outgrower":
-							doc_dict = _enrich_outgrower_aliases(doc_dict)
-						full_records.append(doc_dict)
-					except Exception as e:
-						frappe.log_error(f"Error fetching {doctype} {record.name}: {str(e)}")
+				# Get modified records with child tables in bulk
+				full_records = hydrate_docs(doctype, filters=filters, order_by="modified asc")
+				if doctype == "Outgrower":
+					full_records = [_enrich_outgrower_aliases(doc_dict) for doc_dict in full_records]
 
 				if full_records or doctype == "Attendance":
 					modified_records[doctype] = full_records
 
 			except Exception as e:
-				frappe.log_error(f"Error fetching modified {doctype}: {str(e)}")
+				frappe.log_error(f"Error fetching modified {doctype}: {e!s}")
 
 		return {
 			"success": True,
 			"modified_records": modified_records,
 			"data": modified_records,
-			"sync_timestamp": datetime.now().isoformat()
+			"sync_timestamp": datetime.now().isoformat(),
 		}
 
 	except Exception as e:
-		frappe.log_error(f"Get modified records error: {str(e)}")
-		return {
-			"success": False,
-			"error": str(e)
-		}
+		frappe.log_error(f"Get modified records error: {e!s}")
+		return {"success": False, "error": str(e)}
+
+
+def _iter_modified_stores(args, target_doctypes, last_sync):
+	"""Yield `(doctype, records)` pairs for a streamed get_modified_records call."""
+	for doctype in target_doctypes:
+		filters = _get_sync_filters(doctype, args, last_sync)
+		if filters is None:
+			yield doctype, []
+			continue
+		records = stream.iter_docs(doctype, filters)
+		if doctype == "Outgrower":
+			records = (_enrich_outgrower_aliases(doc_dict) for doc_dict in records)
+		yield doctype, records
 
 
 @frappe.whitelist()
-def get_reference_data():
+def get_reference_data(reference_hash=None):
 	"""
 	Get all reference/metadata entities for mobile app
 
+	Args:
+		reference_hash: hash returned by a previous call (or sent as If-None-Match).
+			When it still matches, only `unchanged` and the hash are returned.
+			Crop Cycle Stage is not covered by the hash; it arrives through
+			get_sync_data / get_sync_changes like other synced doctypes.
+
 	Returns:
 		JSON response with all reference data
 	"""
 	try:
-		reference_data = {}
-
-		# List of reference doctypes
-		reference_doctypes = {
-			"Crop": ["*"],
-			"Crop Variety": ["*"],
-			"Season": ["*"],
-			"Crop Recipe": ["*"],
-			"Visit Type": ["*"],
-			"Region": ["*"],
-			"Unit": ["*"],
-			"Inspection Attribute": ["*"],
-			"Crop Cycle Stage": ["*"]
-		}
+		snapshot = reference.get_snapshot("raw", _build_raw_reference)
+		reference.set_etag(snapshot["hash"])
 
-		for doctype, fields in reference_doctypes.items():
-			try:
-				records = frappe.get_all(doctype, fields=fields)
-				reference_data[doctype] = records
-			except Exception as e:
-				frappe.log_error(f"Error fetching reference {doctype}: {str(e)}")
+		if reference.get_client_hash(reference_hash) == snapshot["hash"]:
+			return {
+				"success": True,
+				"unchanged": True,
+				"reference_hash": snapshot["hash"],
+				"timestamp": datetime.now().isoformat(),
+			}
 
+		# live doctypes are left out of the hash; clients holding a hash pull them incrementally
+		reference_data = dict(snapshot["data"], **_build_raw_reference(reference.LIVE_DOCTYPES))
 		return {
 			"success": True,
+			"unchanged": False,
+			"reference_hash": snapshot["hash"],
 			"reference_data": reference_data,
 			"data": reference_data,
-			"timestamp": datetime.now().isoformat()
+			"timestamp": datetime.now().isoformat(),
 		}
 
 	except Exception as e:
-		frappe.log_error(f"Get reference data error: {str(e)}")
-		return {
-			"success": False,
-			"error": str(e)
-		}
+		frappe.log_error(f"Get reference data error: {e!s}")
+		return {"success": False, "error": str(e)}
+
+
+def _build_raw_reference(doctypes):
+	reference_data = {}
+	for doctype in doctypes:
+		try:
+			reference_data[doctype] = frappe.get_all(doctype, fields=["*"], order_by="name asc")
+		except Exception as e:
+			frappe.log_error(f"Error fetching reference {doctype}: {e!s}")
+	return reference_data
+
+
+def _build_mobile_reference(doctypes):
+	data = {}
+	for doctype in doctypes:
+		try:
+			full_docs = _map_docs_to_mobile(doctype, hydrate_docs(doctype, order_by="modified asc, name asc"))
+			store = DOCTYPE_TO_STORE.get(doctype, doctype)
+			data[store] = full_docs
+		except Exception as e:
+			frappe.log_error(f"Error fetching reference {doctype}: {e!s}")
+	return data
+
+
+def _get_reference_update(reference_hash=None):
+	"""
+	Return (stores, hash, unchanged) for the mobile reference snapshot.
+
+	`stores` is empty when the client already holds the current snapshot.
+	"""
+	snapshot = reference.get_snapshot("mobile", _build_mobile_reference)
+	if reference.get_client_hash(reference_hash) == snapshot["hash"]:
+		return {}, snapshot["hash"], True
+	return snapshot["data"], snapshot["hash"], False
+
 
+def _get_sync_filters(doctype, args, last_sync_dt, scope=None):
+	"""Return filters for a sync doctype, or None when the store must be empty."""
+	filters = []
+
+	if doctype == "Attendance":
+		return _build_attendance_filters(args, last_sync_dt)
+	elif doctype == "Employee Checkin":
+		return _build_employee_checkin_filters(args, last_sync_dt)
+	elif last_sync_dt:
+		filters.append(["modified", ">", last_sync_dt])
+
+	scope_filter = sync_scope.get_scope_filter(scope, doctype)
+	if scope_filter is not None:
+		if not scope_filter:
+			return None
+		filters.append(scope_filter)
+
+	return filters
 
 
+def _get_sync_scope(officer_region=None):
+	"""Resolve the current user's portfolio (see `sync.scope`), or None when unscoped."""
+	return sync_scope.get_scope(frappe.session.user, officer_region)
+
 
 @frappe.whitelist()
-def get_sync_data(last_sync=None, officer_region=None, **kwargs):
+def get_sync_data(
+	last_sync=None,
+	officer_region=None,
+	page_size=None,
+	page_bytes=None,
+	continuation_token=None,
+	reference_hash=None,
+	since_seq=None,
+	**kwargs,
+):
 	"""
 	Get all synced data since last_sync. Returns data grouped by store name.
+
+	Passing `page_size`, `page_bytes` or `continuation_token` switches to paged mode:
+	stores are read in `(modified, name)` order and each response carries
+	`has_more` plus a `continuation_token` to request the next page with.
+
+	Passing `stream=1` (or `format=ndjson`) streams the records as newline-delimited
+	JSON instead, ending with a trailer line holding `server_time`.
+
+	Reference stores are only sent when `reference_hash` does not match the
+	current reference snapshot; the response always carries the current hash.
+
+	Passing `since_seq` reads the change journal instead (see `get_sync_changes`).
+	Full pulls return `last_seq`, the journal position to continue from.
 	"""
 	try:
 		args = _get_request_args(kwargs)
+		if since_seq not in (None, ""):
+			return get_sync_changes(since_seq=since_seq, officer_region=officer_region, **kwargs)
+
+		last_seq = journal.get_current_seq()
+		if stream.is_stream_requested(args):
+			last_sync_dt = (
+				datetime.fromisoformat(str(last_sync).replace("Z", "+00:00")) if last_sync else None
+			)
+			ref_stores, ref_hash, ref_unchanged = _get_reference_update(reference_hash)
+			return stream.ndjson_response(
+				_iter_sync_stores(args, last_sync_dt, officer_region, ref_stores),
+				{
+					"server_time": datetime.now().isoformat(),
+					"last_sync": last_sync,
+					"reference_hash": ref_hash,
+					"reference_unchanged": ref_unchanged,
+					"last_seq": last_seq,
+				},
+			)
+
+		if continuation_token or page_size or page_bytes:
+			return _get_sync_page(
+				args,
+				last_sync,
+				officer_region,
+				page_size,
+				page_bytes,
+				continuation_token,
+				reference_hash,
+				last_seq,
+			)
+
 		if last_sync:
-			last_sync_dt = datetime.fromisoformat(str(last_sync).replace('Z', '+00:00'))
+			last_sync_dt = datetime.fromisoformat(str(last_sync).replace("Z", "+00:00"))
 		else:
 			last_sync_dt = None
 
-		# Main synced doctypes
-		sync_doctypes = [
-			"Outgrower",
-			"Farm Plot",
-			"Crop Cycle",
-			"Crop Cycle Stage",
-			"Field Visit",
-			"Finding",
-			"Plot Crop Assignment",
-			"Stage Activity",
-			"Stage Input Request",
-			"Stage Input Dispatch",
-			"Attendance",
-			"Employee Checkin",
-			"Expense Claim",
-			"Leave Application",
-			"Employee Advance",
-		]
-
-		# Reference doctypes (always include)
-		reference_doctypes = [
-			"Crop",
-			"Crop Variety",
-			"Season",
-			"Crop Recipe",
-			"Visit Type",
-			"Region",
-			"Unit",
-			"Inspection Attribute",
-			"Crop Cycle Stage",
-		]
-
 		data = {}
 
-		# Optional region filter for outgrowers and related plots
-		region_outgrowers = None
-		if officer_region:
-			region_outgrowers = [
-				row.name for row in frappe.get_all("Outgrower", filters={"region": officer_region}, fields=["name"])
-			]
-
-		for doctype in sync_doctypes:
-			filters = []
-
-			if doctype == "Attendance":
-				filters = _build_attendance_filters(args, last_sync_dt)
-				store = DOCTYPE_TO_STORE.get(doctype, doctype)
-				if not filters:
-					data[store] = []
-					continue
-			elif doctype == "Employee Checkin":
-				filters = _build_employee_checkin_filters(args, last_sync_dt)
-				store = DOCTYPE_TO_STORE.get(doctype, doctype)
-				if not filters:
-					data[store] = []
-					continue
-			elif last_sync_dt:
-				filters.append(["modified", ">", last_sync_dt])
-
-			if officer_region and doctype == "Outgrower":
-				filters.append(["region", "=", officer_region])
-			if officer_region and doctype == "Farm Plot" and region_outgrowers:
-				filters.append(["outgrower", "in", region_outgrowers])
-
-			records = frappe.get_all(doctype, filters=filters, fields=["name"], order_by="modified asc")
-			full_docs = []
-			for row in records:
-				try:
-					doc = frappe.get_doc(doctype, row.name).as_dict()
-					full_docs.append(_map_doc_to_mobile(doctype, doc))
-				except Exception:
-					frappe.log_error(f"Error fetching {doctype} {row.name}")
+		# Limit the graph doctypes to the user's assigned portfolio (and region)
+		scope = _get_sync_scope(officer_region)
 
+		for doctype in SYNC_DOCTYPES:
 			store = DOCTYPE_TO_STORE.get(doctype, doctype)
-			data[store] = full_docs
+			filters = _get_sync_filters(doctype, args, last_sync_dt, scope)
+			if filters is None:
+				data[store] = []
+				continue
 
-		# Always include reference data
-		for doctype in reference_doctypes:
-			try:
-				records = frappe.get_all(doctype, fields=["name"], order_by="modified asc")
-				full_docs = [
-					_map_doc_to_mobile(doctype, frappe.get_doc(doctype, row.name).as_dict())
-					for row in records
-				]
-				store = DOCTYPE_TO_STORE.get(doctype, doctype)
-				data[store] = full_docs
-			except Exception as e:
-				frappe.log_error(f"Error fetching reference {doctype}: {str(e)}")
+			data[store] = _map_docs_to_mobile(
+				doctype, hydrate_docs(doctype, filters=filters, order_by="modified asc")
+			)
+
+		# Include reference data unless the client already holds this snapshot
+		ref_stores, ref_hash, ref_unchanged = _get_reference_update(reference_hash)
+		data.update(ref_stores)
 
 		return {
 			"data": data,
 			"server_time": datetime.now().isoformat(),
 			"last_sync": last_sync,
+			"reference_hash": ref_hash,
+			"reference_unchanged": ref_unchanged,
+			"last_seq": last_seq,
 		}
 	except Exception as e:
-		frappe.log_error(f"Get sync data error: {str(e)}")
+		frappe.log_error(f"Get sync data error: {e!s}")
 		return {"error": str(e)}
 
 
+@frappe.whitelist()
+def get_sync_changes(since_seq=0, limit=None, officer_region=None, **kwargs):
+	"""
+	Get changes recorded in the sync change journal after `since_seq`.
+
+	One range read over the journal replaces the per-doctype `modified > ?` scans.
+	Each changed document is returned in its current state; deleted documents are
+	returned as tombstones under `deleted`. Pass the returned `last_seq` back as
+	`since_seq` to continue, and repeat while `has_more` is set.
+
+	When the journal no longer reaches back to `since_seq`, only `reset` is set
+	and the client must fall back to a full get_sync_data pull.
+	"""
+	try:
+		args = _get_request_args(kwargs)
+		if journal.needs_reset(since_seq):
+			return {"success": True, "reset": True, "server_time": datetime.now().isoformat()}
+
+		changes, last_seq, has_more = journal.read_changes(since_seq, limit)
+		scope = _get_sync_scope(officer_region)
+
+		data = {}
+		deleted = {}
+		for doctype, by_name in changes.items():
+			store = DOCTYPE_TO_STORE.get(doctype, doctype)
+			removed = [name for name, change_type in by_name.items() if change_type == "Delete"]
+			if removed:
+				deleted.setdefault(store, []).extend(removed)
+
+			upserted = [name for name, change_type in by_name.items() if change_type != "Delete"]
+			filters = _get_sync_filters(doctype, args, None, scope)
+			if not upserted or filters is None:
+				continue
+
+			records = data.setdefault(store, [])
+			for names in chunked(upserted):
+				docs = hydrate_docs(
+					doctype, filters=[*filters, ["name", "in", names]], order_by="modified asc"
+				)
+				records.extend(_map_docs_to_mobile(doctype, docs))
+
+		return {
+			"success": True,
+			"data": data,
+			"deleted": deleted,
+			"last_seq": last_seq,
+			"has_more": has_more,
+			"server_time": datetime.now().isoformat(),
+		}
+	except Exception as e:
+		frappe.log_error(f"Get sync changes error: {e!s}")
+		return {"success": False, "error": str(e)}
+
+
+def _iter_sync_stores(args, last_sync_dt, officer_region, ref_stores=None):
+	"""Yield `(store, records)` pairs for a streamed get_sync_data call."""
+	scope = _get_sync_scope(officer_region)
+	for doctype in SYNC_DOCTYPES:
+		store = DOCTYPE_TO_STORE.get(doctype, doctype)
+		filters = _get_sync_filters(doctype, args, last_sync_dt, scope)
+		if filters is None:
+			yield store, []
+			continue
+		yield store, (_map_doc_to_mobile(doctype, doc) for doc in stream.iter_docs(doctype, filters))
+
+	# reference stores come from the cached snapshot
+	yield from (ref_stores or {}).items()
+
+
+def _get_sync_page(
+	args,
+	last_sync,
+	officer_region,
+	page_size,
+	page_bytes,
+	continuation_token,
+	reference_hash=None,
+	last_seq=None,
+):
+	"""
+	Return one page of a keyset-paginated sync pull.
+
+	The token pins `last_sync`, the region and the pull's `server_time`, so every
+	page of one pull sees the same window and the client stores the start time of
+	the pull, not of its last page, as its next `last_sync`.
+	"""
+	if continuation_token:
+		state = cursor.decode_token(continuation_token)
+	else:
+		state = {
+			"since": last_sync,
+			"region": officer_region,
+			"server_time": datetime.now().isoformat(),
+			"seq": last_seq,
+			"doctype": SYNC_DOCTYPES[0],
+			"after": None,
+		}
+
+	since = state.get("since")
+	last_sync_dt = datetime.fromisoformat(str(since).replace("Z", "+00:00")) if since else None
+	region = state.get("region")
+	scope = _get_sync_scope(region)
+	max_records, max_bytes = cursor.get_page_budget(page_size, page_bytes)
+
+	data = {}
+	used_records = used_bytes = 0
+	next_state = None
+
+	start = SYNC_DOCTYPES.index(state["doctype"]) if state.get("doctype") in SYNC_DOCTYPES else 0
+	for doctype in SYNC_DOCTYPES[start:]:
+		store = DOCTYPE_TO_STORE.get(doctype, doctype)
+		after = state.get("after") if doctype == state.get("doctype") else None
+		filters = _get_sync_filters(doctype, args, last_sync_dt, scope)
+		data.setdefault(store, [])
+		if filters is None:
+			continue
+
+		remaining = max_records - used_records
+		docs = cursor.fetch_after(doctype, filters, after, remaining)
+		for doc in docs:
+			record = _map_doc_to_mobile(doctype, doc)
+			size = cursor.estimate_size(record)
+			if used_records and used_bytes + size > max_bytes:
+				break
+			data[store].append(record)
+			used_records += 1
+			used_bytes += size
+			after = (str(doc.modified), doc.name)
+		else:
+			if len(docs) < remaining:
+				# store exhausted, move on to the next doctype
+				continue
+
+		# page budget spent; resume after the last record sent
+		next_state = dict(state, doctype=doctype, after=after)
+		break
+
+	ref_stores, ref_hash, ref_unchanged = _get_reference_update(reference_hash)
+	if continuation_token:
+		# reference data goes out once, with the first page of a pull
+		ref_stores = {}
+	data.update(ref_stores)
+
+	return {
+		"data": data,
+		"server_time": state.get("server_time"),
+		"last_sync": since,
+		"has_more": bool(next_state),
+		"continuation_token": cursor.encode_token(next_state) if next_state else None,
+		"reference_hash": ref_hash,
+		"reference_unchanged": ref_unchanged,
+		"last_seq": state.get("seq"),
+	}
+
+
 @frappe.whitelist()
 def push_sync_data(data):
 	"""
 	Create/update records pushed from mobile app.
 	"""
-	try:
-		records = json.loads(data) if isinstance(data, str) else data
-		if isinstance(records, dict) and "data" in records:
-			records = records.get("data")
+	with buffered_sync_log():
+		return _push_sync_data(data)
 
-		results = []
-		for record in records or []:
-			try:
-				store = record.get("storeName") or record.get("store_name") or record.get("doctype")
-				doctype = _resolve_doctype(store)
-				payload = record.get("payload") or record.get("doc") or {}
-				if doctype == "Outgrower":
-					payload = _normalize_outgrower_payload(payload)
-				operation = (record.get("operation") or "SYNC").upper()
-				record_id = record.get("recordId") or payload.get("id") or payload.get("name")
-				force = record.get("force") or payload.get("force")
-
-				if operation == "DELETE":
-					if record_id and frappe.db.exists(doctype, record_id):
-						frappe.delete_doc(doctype, record_id, ignore_permissions=True)
-					log_sync(frappe.session.user, doctype, record_id, "DELETE", "Success")
-					results.append({"status": "deleted", "doctype": doctype, "name": record_id})
-					continue
 
-				mapped = _map_mobile_to_doc(doctype, payload)
-				if record_id:
-					mapped["name"] = record_id
-				elif ID_FIELD_MAP.get(doctype) and mapped.get(ID_FIELD_MAP[doctype]):
-					mapped["name"] = mapped[ID_FIELD_MAP[doctype]]
-
-				mapped["doctype"] = doctype
-				if mapped.get("name") and frappe.db.exists(doctype, mapped["name"]):
-					doc = frappe.get_doc(doctype, mapped["name"])
-
-					# Conflict check if client provides updatedAt
-					client_modified = payload.get("updatedAt")
-					if client_modified and not force:
-						client_dt = datetime.fromisoformat(str(client_modified).replace('Z', '+00:00'))
-						if doc.modified and doc.modified > client_dt:
-							# Log conflict for manual resolution
-							try:
-								conflict = frappe.get_doc({
-									"doctype": "Sync Conflict",
-									"doctype_name": doctype,
-									"doc_name": doc.name,
-									"user": frappe.session.user,
-									"mobile_data": json.dumps({
-										"modified": client_dt.isoformat(),
-										"payload": payload,
-									}),
-									"server_data": json.dumps({
-										"modified": doc.modified.isoformat() if doc.modified else None,
-										"doc": doc.as_dict(),
-									}),
-									"resolution": "Pending",
-									"resolved": 0,
-								})
-								conflict.insert(ignore_permissions=True)
-							except Exception:
-								frappe.log_error(f"Failed to log conflict for {doctype} {doc.name}")
-							log_sync(frappe.session.user, doctype, doc.name, operation, "Conflict")
-							results.append({"status": "conflict", "doctype": doctype, "name": doc.name})
-							continue
-
-					doc.update(mapped)
-					doc.save(ignore_permissions=True)
-					name = doc.name
-				else:
-					doc = frappe.get_doc(mapped)
-					doc.insert(ignore_permissions=True)
-					name = doc.name
-
-				log_sync(frappe.session.user, doctype, name, operation, "Success")
-				results.append({"status": "success", "doctype": doctype, "name": name})
-			except Exception as e:
-				results.append({"status": "error", "doctype": record.get("doctype"), "error": str(e)})
+def _push_sync_data(data, async_by_size=True):
+	"""
+	Shared by push_sync_data and bulk_sync; see `sync.push` for the pipeline.
+
+	Args:
+		async_by_size: queue large batches as background jobs even when the
+			payload does not ask for it (see `sync.push_jobs`)
+	"""
+	locked_key = None
+	try:
+		payload = json.loads(data) if isinstance(data, str) else data
+		batch_key = idempotency.get_batch_key(payload)
+		if batch_key:
+			if not idempotency.acquire_batch_lock(batch_key):
+				return {"success": False, "in_progress": True, "error": "Batch is already being processed"}
+			locked_key = batch_key
+			cached = idempotency.get_batch_result(batch_key)
+			if cached is not None:
+				return dict(cached, replayed=True)
+
+		records = payload
+		if isinstance(payload, dict) and "data" in payload:
+			records = payload.get("data")
+		records = records or []
+
+		if push_jobs.should_enqueue(records, payload, by_size=async_by_size):
+			response = push_jobs.enqueue_push(records, batch_key)
+		else:
+			response = {"success": True, "results": push.run_push(records)}
 
 		frappe.db.commit()
-		return {"success": True, "results": results}
+		if batch_key:
+			idempotency.store_batch_result(batch_key, response)
+		return response
 	except Exception as e:
 		frappe.db.rollback()
-		frappe.log_error(f"Push sync data error: {str(e)}")
+		frappe.log_error(f"Push sync data error: {e!s}")
+		return {"success": False, "error": str(e)}
+	finally:
+		if locked_key:
+			idempotency.release_batch_lock(locked_key)
+
+
+@frappe.whitelist()
+def get_push_status(job_id):
+	"""
+	Progress of a push batch that was queued as a background job.
+
+	Returns:
+		status (Queued/Running/Completed/Failed), total, processed and the
+		per-record results in request order, null for records not applied yet
+	"""
+	try:
+		return push_jobs.get_status(job_id)
+	except Exception as e:
+		frappe.log_error(f"Get push status error: {e!s}")
+		return {"success": False, "error": str(e)}
+
+
+@frappe.whitelist()
+def start_photo_upload(photo_hash, size, chunk_size=None, content_type=None):
+	"""
+	Open or resume a chunked photo upload (see `media.uploads`).
+
+	Returns:
+		complete + file_url when the photo is already stored, otherwise the
+		chunk size, chunk count and the indexes of the chunks received so far
+	"""
+	try:
+		return dict(uploads.start_upload(photo_hash, size, chunk_size, content_type), success=True)
+	except Exception as e:
+		frappe.log_error(f"Start photo upload error: {e!s}")
+		return {"success": False, "error": str(e)}
+
+
+@frappe.whitelist()
+def upload_photo_chunk(photo_hash, index, data=None, chunk_hash=None):
+	"""Store one chunk of a photo upload, as base64 `data` or a multipart file `chunk`."""
+	try:
+		return dict(uploads.put_chunk(photo_hash, index, data, chunk_hash), success=True)
+	except Exception as e:
+		frappe.log_error(f"Upload photo chunk error: {e!s}")
+		return {"success": False, "error": str(e)}
+
+
+@frappe.whitelist()
+def finish_photo_upload(photo_hash):
+	"""Assemble an upload once all chunks arrived and return the photo's file URL."""
+	try:
+		return dict(uploads.finish_upload(photo_hash), success=True)
+	except Exception as e:
+		frappe.log_error(f"Finish photo upload error: {e!s}")
+		return {"success": False, "error": str(e)}
+
+
+def _plot_filters(outgrower=None):
+	return [["outgrower", "=", outgrower]] if outgrower else []
+
+
+@frappe.whitelist()
+def plots_near(lat, lng, radius=1000, outgrower=None, limit=50):
+	"""
+	Farm Plots within `radius` meters of a point, nearest first.
+
+	Each plot carries `distance` (meters to its bounding box, 0 when the point
+	is inside it) and `centroid_distance`.
+	"""
+	try:
+		plots = spatial.plots_near(lat, lng, radius, _plot_filters(outgrower), limit)
+		return {"success": True, "plots": plots}
+	except Exception as e:
+		frappe.log_error(f"Plots near error: {e!s}")
+		return {"success": False, "error": str(e)}
+
+
+@frappe.whitelist()
+def plots_in_bbox(min_lat, min_lng, max_lat, max_lng, outgrower=None, limit=500):
+	"""Farm Plots whose bounding box intersects the given box."""
+	try:
+		plots = spatial.plots_in_bbox(min_lat, min_lng, max_lat, max_lng, _plot_filters(outgrower), limit)
+		return {"success": True, "plots": plots}
+	except Exception as e:
+		frappe.log_error(f"Plots in bbox error: {e!s}")
+		return {"success": False, "error": str(e)}
+
+
+@frappe.whitelist()
+def get_plot_features(region=None, outgrower=None, zoom=None, bbox=None):
+	"""
+	Stream Farm Plots as one GeoJSON FeatureCollection.
+
+	Args:
+		region / outgrower: optional filters
+		zoom: simplify outlines to one pixel at this map zoom; full precision when omitted
+		bbox: optional "south,west,north,east"
+	"""
+	try:
+		return maps.feature_collection_response(region, outgrower, zoom, bbox)
+	except Exception as e:
+		frappe.log_error(f"Get plot features error: {e!s}")
+		return {"success": False, "error": str(e)}
+
+
+@frappe.whitelist()
+def get_plot_tile(z, x, y, region=None, outgrower=None):
+	"""Mapbox Vector Tile z/x/y with a `plots` layer; cached and dropped when a plot in it changes."""
+	try:
+		return maps.tile_response(z, x, y, region, outgrower)
+	except Exception as e:
+		frappe.log_error(f"Get plot tile error: {e!s}")
 		return {"success": False, "error": str(e)}
 
+
 def log_sync(user, doctype, doc_name, operation, status, error_message=None):
-	"""Helper function to log sync operations"""
+	"""
+	Helper function to log sync operations
+
+	Inside push_sync_data / bulk_sync the entry is buffered and written in bulk
+	at commit (see `sync.log_buffer`); elsewhere it is inserted right away.
+	"""
 	try:
 		status_val = _normalize_sync_status(status)
-		sync_log = frappe.get_doc({
-			"doctype": "Sync Log",
-			"user": user,
-			"doctype_name": doctype,
-			"doc_name": doc_name,
-			"operation": operation,
-			"status": status_val,
-			"error_message": error_message,
-			"sync_timestamp": datetime.now()
-		})
+		buffer = get_sync_log_buffer()
+		if buffer is not None:
+			buffer.add(user, doctype, doc_name, operation, status_val, error_message)
+			return
+
+		sync_log = frappe.get_doc(
+			{
+				"doctype": "Sync Log",
+				"user": user,
+				"doctype_name": doctype,
+				"doc_name": doc_name,
+				"operation": operation,
+				"status": status_val,
+				"error_message": error_message,
+				"sync_timestamp": datetime.now(),
+			}
+		)
 		sync_log.insert(ignore_permissions=True)
 	except Exception as e:
-		frappe.log_error(f"Error logging sync: {str(e)}")
+		frappe.log_error(f"Error logging sync: {e!s}")
 
 
 def _normalize_sync_status(status):
@@ -1162,32 +1313,24 @@ def check_conflicts(doctype, doc_name, mobile_modified):
 	"""
 	try:
 		if not frappe.db.exists(doctype, doc_name):
-			return {
-				"has_conflict": False,
-				"reason": "not_found"
-			}
+			return {"has_conflict": False, "reason": "not_found"}
 
 		server_doc = frappe.get_doc(doctype, doc_name)
 		server_modified = server_doc.modified
 
 		# Parse mobile modified timestamp
-		mobile_modified_dt = datetime.fromisoformat(mobile_modified.replace('Z', '+00:00'))
+		mobile_modified_dt = datetime.fromisoformat(mobile_modified.replace("Z", "+00:00"))
 
 		# Check if server version is newer
 		if server_modified > mobile_modified_dt:
 			return {
 				"has_conflict": True,
 				"server_data": server_doc.as_dict(),
-				"server_modified": server_modified.isoformat()
+				"server_modified": server_modified.isoformat(),
 			}
 
-		return {
-			"has_conflict": False
-		}
+		return {"has_conflict": False}
 
 	except Exception as e:
-		frappe.log_error(f"Check conflicts error: {str(e)}")
-		return {
-			"has_conflict": False,
-			"error": str(e)
-		}
+		frappe.log_error(f"Check conflicts error: {e!s}")
+		return {"has_conflict": False, "error": str(e)}
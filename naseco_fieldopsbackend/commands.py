@@ -0,0 +1,108 @@
+# Copyright (c) 2026, NASECO and contributors
+# For license information, please see license.txt
+
+import click
+import frappe
+from frappe.commands import get_site, pass_context
+
+
+@click.command("sync-index-advisor")
+@click.option("--apply", is_flag=True, default=False, help="Create the missing sync indexes first")
+@pass_context
+def sync_index_advisor(context, apply=False):
+	"""EXPLAIN the sync endpoints' query shapes and report full table scans."""
+	from naseco_fieldopsbackend.sync.indexes import advise, ensure_sync_indexes
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		if apply:
+			for doctype, columns in ensure_sync_indexes():
+				click.echo(f"Created index on {doctype} ({', '.join(columns)})")
+			frappe.db.commit()
+
+		report = advise()
+		if not report:
+			click.secho("All sync query shapes can use an index.", fg="green")
+			return
+
+		for row in report:
+			if row.get("error"):
+				click.secho(f"{row['label']}: could not EXPLAIN ({row['error']})", fg="yellow")
+			else:
+				click.secho(f"{row['label']}: full scan on {row['doctype']} where {row['where']}", fg="red")
+	finally:
+		frappe.destroy()
+
+
+@click.command("reconcile-input-requests")
+@click.option("--dry-run", is_flag=True, default=False, help="Only report the requests that drifted")
+@pass_context
+def reconcile_input_requests(context, dry_run=False):
+	"""Recompute dispatched and remaining quantities of every Stage Input Request."""
+	from naseco_fieldopsbackend.naseco_fieldopsbackend.doctype.stage_input_request.stage_input_request import (
+		reconcile_fulfillment,
+	)
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		drifted = reconcile_fulfillment(dry_run=dry_run)
+		if not dry_run:
+			frappe.db.commit()
+
+		for request, stored, actual in drifted:
+			click.echo(f"{request}: dispatched {stored} -> {actual}")
+		verb = "Found" if dry_run else "Fixed"
+		click.secho(f"{verb} {len(drifted)} drifted request(s).", fg="green" if not drifted else "yellow")
+	finally:
+		frappe.destroy()
+
+
+@click.command("recompute-plot-geometry")
+@click.option("--batch-size", type=int, default=5000, help="Plots per batch")
+@click.option("--dry-run", is_flag=True, default=False, help="Only count the plots that would change")
+@pass_context
+def recompute_plot_geometry(context, batch_size=5000, dry_run=False):
+	"""Recompute area, perimeter, centroid and GeoJSON of every Farm Plot in bulk."""
+	from naseco_fieldopsbackend.geo import geodesy
+	from naseco_fieldopsbackend.geo.plots import recompute_plot_geometry as recompute
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		if geodesy.np is None:
+			click.secho("NumPy is not installed; using the pure Python geodesy.", fg="yellow")
+		checked, changed = recompute(batch_size=batch_size, dry_run=dry_run)
+		verb = "would change" if dry_run else "changed"
+		click.secho(f"Checked {checked} plot(s), {changed} {verb}.", fg="green")
+	finally:
+		frappe.destroy()
+
+
+@click.command("detect-plot-overlaps")
+@click.option("--dry-run", is_flag=True, default=False, help="Only report, keep the stored overlaps")
+@pass_context
+def detect_plot_overlaps(context, dry_run=False):
+	"""Find overlapping and duplicate Farm Plots and store them as Farm Plot Overlap rows."""
+	from naseco_fieldopsbackend.geo.overlaps import detect_plot_overlaps as detect
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		rows = detect(dry_run=dry_run)
+		for row in rows:
+			click.echo(
+				f"{row['overlap_type']}: {row['plot']} / {row['other_plot']}"
+				f" share {row['overlap_acres']} acres ({row['overlap_ratio']}%)"
+			)
+		click.secho(f"Found {len(rows)} overlapping pair(s).", fg="green" if not rows else "yellow")
+	finally:
+		frappe.destroy()
+
+
+commands = [sync_index_advisor, reconcile_input_requests, recompute_plot_geometry, detect_plot_overlaps]
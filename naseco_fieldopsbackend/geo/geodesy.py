@@ -0,0 +1,184 @@
+# Copyright (c) 2026, NASECO and contributors
+# For license information, please see license.txt
+
+"""
+Plot geodesy: area, perimeter and centroid of GPS polygons.
+
+Every function takes many polygons at once. With NumPy installed the vertices
+of all polygons are packed into flat arrays and each metric is one vectorized
+pass with per-polygon sums via `reduceat`; without it the same formulas run as
+plain Python loops. Results are identical either way (rounded as Farm Plot
+stores them).
+
+A polygon is a sequence of (latitude, longitude) pairs in degrees, not closed.
+"""
+
+import json
+import math
+
+try:
+	import numpy as np
+except ImportError:  # optional dependency
+	np = None
+
+EARTH_RADIUS_M = 6371000
+SQ_METERS_PER_ACRE = 4046.86
+
+
+def haversine(lat1, lon1, lat2, lon2):
+	"""Distance in meters between two points; accepts scalars or NumPy arrays."""
+	if np is not None and not all(isinstance(v, int | float) for v in (lat1, lon1, lat2, lon2)):
+		lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lon1, lat2, lon2))
+		a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+		return EARTH_RADIUS_M * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+	lat1_rad = math.radians(lat1)
+	lat2_rad = math.radians(lat2)
+	dlat = math.radians(lat2 - lat1)
+	dlon = math.radians(lon2 - lon1)
+	a = math.sin(dlat / 2) ** 2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon / 2) ** 2
+	return EARTH_RADIUS_M * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+def polygon_metrics(polygons):
+	"""
+	Area, perimeter and centroid of many polygons.
+
+	Returns:
+		list of (area_acres, perimeter_meters, centroid_lat, centroid_lng),
+		one per polygon, in input order
+	"""
+	polygons = [[(float(lat), float(lng)) for lat, lng in polygon] for polygon in polygons]
+	if np is None:
+		return [_metrics_python(polygon) for polygon in polygons]
+	return _metrics_numpy(polygons)
+
+
+def area_acres(vertices):
+	return polygon_metrics([vertices])[0][0]
+
+
+def perimeter_meters(vertices):
+	return polygon_metrics([vertices])[0][1]
+
+
+def centroid(vertices):
+	return polygon_metrics([vertices])[0][2:]
+
+
+def _metrics_python(vertices):
+	n = len(vertices)
+	area = perimeter = 0.0
+	x = y = z = 0.0
+	for i in range(n):
+		lat1, lon1 = vertices[i]
+		lat2, lon2 = vertices[(i + 1) % n]
+		# spherical excess component
+		area += math.radians(lon2 - lon1) * (2 + math.sin(math.radians(lat1)) + math.sin(math.radians(lat2)))
+		perimeter += haversine(lat1, lon1, lat2, lon2)
+		# unit vector sum for the centroid
+		lat_rad, lon_rad = math.radians(lat1), math.radians(lon1)
+		x += math.cos(lat_rad) * math.cos(lon_rad)
+		y += math.cos(lat_rad) * math.sin(lon_rad)
+		z += math.sin(lat_rad)
+
+	area_acres = abs(area * EARTH_RADIUS_M * EARTH_RADIUS_M / 2.0) / SQ_METERS_PER_ACRE if n >= 3 else 0.0
+	perimeter = perimeter if n >= 2 else 0.0
+	if not n:
+		return (0.0, 0.0, 0.0, 0.0)
+	x, y, z = x / n, y / n, z / n
+	centroid_lat = math.degrees(math.atan2(z, math.sqrt(x * x + y * y)))
+	centroid_lng = math.degrees(math.atan2(y, x))
+	return (round(area_acres, 2), round(perimeter, 2), round(centroid_lat, 6), round(centroid_lng, 6))
+
+
+def _metrics_numpy(polygons):
+	results = [(0.0, 0.0, 0.0, 0.0)] * len(polygons)
+	present = [i for i, polygon in enumerate(polygons) if polygon]
+	if not present:
+		return results
+
+	counts = np.array([len(polygons[i]) for i in present])
+	starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+	coords = np.radians(np.array([vertex for i in present for vertex in polygons[i]], dtype=float))
+	lat, lon = coords[:, 0], coords[:, 1]
+
+	# index of the next vertex, wrapping to the polygon's first vertex
+	following = np.arange(len(lat)) + 1
+	following[starts + counts - 1] = starts
+	lat2, lon2 = lat[following], lon[following]
+
+	sin_lat = np.sin(lat)
+	area = np.add.reduceat((lon2 - lon) * (2 + sin_lat + sin_lat[following]), starts)
+	area = np.abs(area * EARTH_RADIUS_M * EARTH_RADIUS_M / 2.0) / SQ_METERS_PER_ACRE
+	area[counts < 3] = 0.0
+
+	a = np.sin((lat2 - lat) / 2) ** 2 + np.cos(lat) * np.cos(lat2) * np.sin((lon2 - lon) / 2) ** 2
+	perimeter = np.add.reduceat(EARTH_RADIUS_M * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a)), starts)
+	perimeter[counts < 2] = 0.0
+
+	cos_lat = np.cos(lat)
+	x = np.add.reduceat(cos_lat * np.cos(lon), starts) / counts
+	y = np.add.reduceat(cos_lat * np.sin(lon), starts) / counts
+	z = np.add.reduceat(sin_lat, starts) / counts
+	centroid_lat = np.degrees(np.arctan2(z, np.hypot(x, y)))
+	centroid_lng = np.degrees(np.arctan2(y, x))
+
+	for j, i in enumerate(present):
+		results[i] = (
+			round(float(area[j]), 2),
+			round(float(perimeter[j]), 2),
+			round(float(centroid_lat[j]), 6),
+			round(float(centroid_lng[j]), 6),
+		)
+	return results
+
+
+def polygon_geojson(vertices, properties):
+	"""GeoJSON Feature for a polygon, closed as the spec requires."""
+	coordinates = [[float(lng), float(lat)] for lat, lng in vertices]
+	coordinates.append(coordinates[0])
+	feature = {
+		"type": "Feature",
+		"geometry": {"type": "Polygon", "coordinates": [coordinates]},
+		"properties": properties,
+	}
+	return json.dumps(feature, separators=(",", ":"))
+
+
+def point_in_polygon(lat, lng, vertices):
+	"""Ray casting test; points on the boundary may fall either way."""
+	inside = False
+	n = len(vertices)
+	for i in range(n):
+		lat1, lng1 = vertices[i - 1]
+		lat2, lng2 = vertices[i]
+		if (lat1 > lat) != (lat2 > lat):
+			if lng < lng1 + (lat - lat1) * (lng2 - lng1) / (lat2 - lat1):
+				inside = not inside
+	return inside
+
+
+def distance_to_polygon(lat, lng, vertices):
+	"""
+	Meters from a point to the polygon's boundary, 0 when the point is inside.
+
+	Edges are measured in an equirectangular projection around the point, which
+	is accurate to well under a meter at the distances a visit is checked for.
+	"""
+	if len(vertices) < 3:
+		return haversine(lat, lng, *vertices[0]) if vertices else None
+	if point_in_polygon(lat, lng, vertices):
+		return 0.0
+
+	scale = math.radians(1) * EARTH_RADIUS_M
+	cos_lat = math.cos(math.radians(lat))
+	points = [((v_lng - lng) * scale * cos_lat, (v_lat - lat) * scale) for v_lat, v_lng in vertices]
+	nearest = math.inf
+	for i in range(len(points)):
+		(ax, ay), (bx, by) = points[i - 1], points[i]
+		dx, dy = bx - ax, by - ay
+		length = dx * dx + dy * dy
+		t = max(0.0, min(1.0, -(ax * dx + ay * dy) / length)) if length else 0.0
+		nearest = min(nearest, math.hypot(ax + t * dx, ay + t * dy))
+	return nearest
@@ -0,0 +1,285 @@
+# Copyright (c) 2026, NASECO and contributors
+# For license information, please see license.txt
+
+"""
+Plot maps: a streamed GeoJSON FeatureCollection and Mapbox Vector Tiles.
+
+Both read plots in batches with one vertex query per batch, filter by region
+(through the plot's outgrower) or outgrower, and simplify polygons with
+Douglas-Peucker to about one pixel at the requested zoom, so a dashboard
+showing thousands of plots never downloads full-precision outlines.
+
+Plots that simplify away (smaller than a pixel) are drawn as their bounding
+box, at least a pixel wide, so they stay visible when zoomed out.
+
+Tiles up to MAX_CACHE_ZOOM are cached per z/x/y for TILE_CACHE_TTL, one Redis
+hash per tile with a field per filter. `invalidate_plot_tiles` drops the tiles
+a plot's bounding box touches, before and after a change, at every cached zoom,
+right away and again when the transaction commits or rolls back, so a tile
+built concurrently from the old outlines does not stay cached.
+"""
+
+import json
+import math
+
+import frappe
+from frappe.utils import cint, flt
+from werkzeug.wrappers import Response
+
+# geo.plots imports this module too, so both refer to each other as modules
+from naseco_fieldopsbackend.geo import mvt, plots, spatial
+from naseco_fieldopsbackend.sync.hydration import chunked
+from naseco_fieldopsbackend.sync.stream import streaming_response
+
+GEOJSON_MIMETYPE = "application/geo+json"
+MVT_MIMETYPE = "application/vnd.mapbox-vector-tile"
+TILE_LAYER = "plots"
+TILE_CACHE_PREFIX = "naseco_fieldops:plot_tile"
+TILE_CACHE_TTL = 24 * 60 * 60
+
+# tiles below MIN_TILE_ZOOM would hold whole regions of sub-pixel plots
+MIN_TILE_ZOOM = 8
+MAX_TILE_ZOOM = 22
+# deeper tiles are cheap to build and too many to invalidate, so they are not cached
+MAX_CACHE_ZOOM = 16
+FEATURE_BATCH_SIZE = 500
+
+# one pixel of a 256 px tile, in tile units
+PIXEL = mvt.DEFAULT_EXTENT // 256
+
+PLOT_FIELDS = ["name", "plot_id", "plot_name", "outgrower", "area_acres"]
+
+
+def plot_filters(region=None, outgrower=None):
+	filters = []
+	if outgrower:
+		filters.append(["outgrower", "=", outgrower])
+	if region:
+		filters.append(
+			["outgrower", "in", frappe.get_all("Outgrower", {"region": region}, pluck="name") or [""]]
+		)
+	return filters
+
+
+def _segment_distance(point, start, end):
+	(px, py), (ax, ay), (bx, by) = point, start, end
+	dx, dy = bx - ax, by - ay
+	length = dx * dx + dy * dy
+	t = max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / length)) if length else 0.0
+	return math.hypot(px - ax - t * dx, py - ay - t * dy)
+
+
+def simplify_ring(ring, tolerance):
+	"""Douglas-Peucker on a ring of (x, y) points (not closed); keeps at least a triangle."""
+	if tolerance <= 0 or len(ring) <= 3:
+		return list(ring)
+	points = [*ring, ring[0]]
+	keep = {0, len(points) - 1}
+	stack = [(0, len(points) - 1)]
+	while stack:
+		first, last = stack.pop()
+		farthest, index = 0.0, None
+		for i in range(first + 1, last):
+			distance = _segment_distance(points[i], points[first], points[last])
+			if distance > farthest:
+				farthest, index = distance, i
+		if index is not None and farthest > tolerance:
+			keep.add(index)
+			stack.extend(((first, index), (index, last)))
+	simplified = [points[i] for i in sorted(keep)][:-1]
+	return simplified if len(simplified) >= 3 else []
+
+
+def _dedupe(ring):
+	return [point for i, point in enumerate(ring) if point != ring[i - 1]]
+
+
+def _box_ring(ring, minimum):
+	"""Bounding box of the ring as a ring, each side at least `minimum` long."""
+	xs, ys = [x for x, _ in ring], [y for _, y in ring]
+	x0, y0 = min(xs), min(ys)
+	x1, y1 = max(max(xs), x0 + minimum), max(max(ys), y0 + minimum)
+	return [(x0, y0), (x1, y0), (x1, y1), (x0, y1)]
+
+
+def _zoom_tolerance(zoom):
+	"""One pixel at `zoom`, in degrees."""
+	return 360 / (256 * 2**zoom)
+
+
+def iter_plots(filters, south=None, west=None, north=None, east=None):
+	"""Yield (plot, vertices) for the matching plots, a batch at a time."""
+	if south is not None:
+		batches = chunked(
+			spatial.plots_in_bbox(south, west, north, east, filters, limit=0), FEATURE_BATCH_SIZE
+		)
+	else:
+		batches = _keyset_batches(filters)
+
+	for batch in batches:
+		vertices = plots.get_plot_vertices([plot.name for plot in batch])
+		for plot in batch:
+			if len(vertices[plot.name]) >= 3:
+				yield plot, vertices[plot.name]
+
+
+def _keyset_batches(filters):
+	last_name = ""
+	while True:
+		batch = frappe.get_all(
+			"Farm Plot",
+			filters=[*filters, ["name", ">", last_name]],
+			fields=PLOT_FIELDS,
+			order_by="name asc",
+			limit_page_length=FEATURE_BATCH_SIZE,
+		)
+		if not batch:
+			return
+		last_name = batch[-1].name
+		yield batch
+
+
+def _properties(plot):
+	return {
+		"plot_id": plot.plot_id or plot.name,
+		"plot_name": plot.plot_name or "",
+		"outgrower": plot.outgrower or "",
+		"area_acres": flt(plot.area_acres),
+	}
+
+
+def feature_json(plot, vertices, zoom=None):
+	"""Compact GeoJSON Feature for a plot, simplified to one pixel at `zoom` when given."""
+	ring = [(lng, lat) for lat, lng in vertices]
+	if zoom is not None:
+		tolerance = _zoom_tolerance(zoom)
+		digits = max(1, math.ceil(-math.log10(tolerance)) + 1)
+		simplified = _dedupe(
+			[(round(x, digits), round(y, digits)) for x, y in simplify_ring(ring, tolerance)]
+		)
+		if len(simplified) < 3:
+			simplified = [(round(x, digits), round(y, digits)) for x, y in _box_ring(ring, tolerance)]
+		ring = simplified
+	coordinates = [list(point) for point in ring]
+	coordinates.append(coordinates[0])
+	return json.dumps(
+		{
+			"type": "Feature",
+			"id": plot.name,
+			"geometry": {"type": "Polygon", "coordinates": [coordinates]},
+			"properties": _properties(plot),
+		},
+		separators=(",", ":"),
+	)
+
+
+def iter_feature_collection(filters, zoom=None, bbox=None):
+	yield '{"type":"FeatureCollection","features":['
+	first = True
+	try:
+		for plot, vertices in iter_plots(filters, *(bbox or ())):
+			feature = feature_json(plot, vertices, zoom)
+			yield feature if first else "," + feature
+			first = False
+	except Exception as e:
+		frappe.log_error(f"Plot feature stream error: {e!s}")
+		yield '],"error":' + json.dumps(str(e)) + "}"
+		return
+	yield "]}"
+
+
+def feature_collection_response(region=None, outgrower=None, zoom=None, bbox=None):
+	"""
+	Stream all matching plots as one FeatureCollection.
+
+	Args:
+		zoom: simplify to one pixel at this zoom; full precision when omitted
+		bbox: optional "south,west,north,east" limiting the plots to that box
+	"""
+	zoom = None if zoom in (None, "") else max(0, min(cint(zoom), MAX_TILE_ZOOM))
+	if bbox:
+		bbox = [flt(value) for value in str(bbox).split(",")]
+		if len(bbox) != 4:
+			frappe.throw("bbox must be south,west,north,east", frappe.ValidationError)
+	filters = plot_filters(region, outgrower)
+	return streaming_response(iter_feature_collection(filters, zoom, bbox), GEOJSON_MIMETYPE)
+
+
+def _tile_key(z, x, y):
+	return f"{TILE_CACHE_PREFIX}:{z}:{x}:{y}"
+
+
+def build_tile(z, x, y, filters):
+	south, west, north, east = mvt.tile_bounds(z, x, y)
+	features = []
+	for plot, vertices in iter_plots(filters, south, west, north, east):
+		ring = [mvt.project(lat, lng, z, x, y) for lat, lng in vertices]
+		simplified = _dedupe(simplify_ring(_dedupe(ring), PIXEL))
+		if len(simplified) < 3:
+			simplified = _box_ring(ring, PIXEL)
+		features.append(([simplified], _properties(plot)))
+	return mvt.encode_layer(TILE_LAYER, features)
+
+
+def get_tile(z, x, y, region=None, outgrower=None):
+	"""Encoded MVT bytes of tile z/x/y; empty below MIN_TILE_ZOOM."""
+	z, x, y = cint(z), cint(x), cint(y)
+	if not MIN_TILE_ZOOM <= z <= MAX_TILE_ZOOM or not (0 <= x < 2**z and 0 <= y < 2**z):
+		return b""
+
+	if z > MAX_CACHE_ZOOM:
+		return build_tile(z, x, y, plot_filters(region, outgrower))
+
+	cache = frappe.cache()
+	key, variant = _tile_key(z, x, y), f"{region or ''}|{outgrower or ''}"
+	tile = cache.hget(key, variant)
+	if tile is None:
+		tile = build_tile(z, x, y, plot_filters(region, outgrower))
+		cache.hset(key, variant, tile)
+		cache.expire(cache.make_key(key), TILE_CACHE_TTL)
+	return tile
+
+
+def tile_response(z, x, y, region=None, outgrower=None):
+	response = Response(get_tile(z, x, y, region, outgrower), mimetype=MVT_MIMETYPE)
+	response.headers["Cache-Control"] = "private, max-age=60"
+	return response
+
+
+def _tile_range(z, south, west, north, east):
+	n = 2**z
+	x0, y1 = (math.floor(v / mvt.DEFAULT_EXTENT) for v in mvt.project(south, west, z, 0, 0))
+	x1, y0 = (math.floor(v / mvt.DEFAULT_EXTENT) for v in mvt.project(north, east, z, 0, 0))
+	return range(max(x0, 0), min(x1, n - 1) + 1), range(max(y0, 0), min(y1, n - 1) + 1)
+
+
+def invalidate_plot_tiles(*bboxes):
+	"""
+	Drop the cached tiles covering any of the (min_lat, min_lng, max_lat, max_lng) boxes.
+
+	Pass a plot's box before and after a change so moved plots leave no stale
+	tiles behind. Boxes with unset corners are skipped.
+	"""
+	keys = set()
+	for bbox in bboxes:
+		if not bbox or any(value is None for value in bbox):
+			continue
+		for z in range(MIN_TILE_ZOOM, MAX_CACHE_ZOOM + 1):
+			columns, rows = _tile_range(z, *bbox)
+			keys.update(_tile_key(z, x, y) for x in columns for y in rows)
+	if not keys:
+		return
+	frappe.cache().delete_value(list(keys))
+	pending = frappe.flags.plot_tiles_pending
+	if pending is None:
+		pending = frappe.flags.plot_tiles_pending = set()
+		frappe.db.after_commit.add(_drop_pending_tiles)
+		frappe.db.after_rollback.add(_drop_pending_tiles)
+	pending.update(keys)
+
+
+def _drop_pending_tiles():
+	keys = frappe.flags.plot_tiles_pending
+	frappe.flags.plot_tiles_pending = None
+	if keys:
+		frappe.cache().delete_value(list(keys))
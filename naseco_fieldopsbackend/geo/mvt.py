@@ -0,0 +1,142 @@
+# Copyright (c) 2026, NASECO and contributors
+# For license information, please see license.txt
+
+"""
+Minimal Mapbox Vector Tile (v2) encoder for polygon layers.
+
+Only what plot maps need: one or more layers of Polygon features with string
+and number properties. The protobuf wire format is written by hand, so no
+protobuf or mapbox-vector-tile package is required.
+
+Geometry is given in tile coordinates (0..extent, y down) as rings of integer
+(x, y) points, not closed. Exterior rings are re-oriented to the positive
+surveyor's-formula area the specification requires.
+"""
+
+import math
+import struct
+
+DEFAULT_EXTENT = 4096
+
+# Tile.Layer.Feature.GeomType
+POLYGON = 3
+
+# geometry commands
+MOVE_TO = 1
+LINE_TO = 2
+CLOSE_PATH = 7
+
+
+def _varint(value):
+	out = bytearray()
+	while True:
+		byte = value & 0x7F
+		value >>= 7
+		if value:
+			out.append(byte | 0x80)
+		else:
+			out.append(byte)
+			return bytes(out)
+
+
+def _zigzag(value):
+	return (value << 1) ^ (value >> 63)
+
+
+def _field(number, wire_type):
+	return _varint((number << 3) | wire_type)
+
+
+def _bytes_field(number, payload):
+	return _field(number, 2) + _varint(len(payload)) + payload
+
+
+def _uint_field(number, value):
+	return _field(number, 0) + _varint(value)
+
+
+def _packed(number, values):
+	return _bytes_field(number, b"".join(_varint(value) for value in values))
+
+
+def _value(value):
+	if isinstance(value, bool):
+		return _uint_field(7, int(value))
+	if isinstance(value, int | float):
+		# double_value
+		return _field(3, 1) + struct.pack("<d", float(value))
+	return _bytes_field(1, str(value).encode())
+
+
+def ring_area(ring):
+	"""Surveyor's formula in tile coordinates; positive for MVT exterior rings."""
+	n = len(ring)
+	return sum(ring[i][0] * ring[(i + 1) % n][1] - ring[(i + 1) % n][0] * ring[i][1] for i in range(n)) / 2
+
+
+def _geometry(rings):
+	commands = []
+	x = y = 0
+	for i, ring in enumerate(rings):
+		area = ring_area(ring)
+		# the first ring is the exterior, any others are holes
+		if (area < 0) == (i == 0):
+			ring = ring[::-1]
+		commands.append((1 << 3) | MOVE_TO)
+		for j, (px, py) in enumerate(ring):
+			if j == 1:
+				commands.append(((len(ring) - 1) << 3) | LINE_TO)
+			commands.extend((_zigzag(px - x), _zigzag(py - y)))
+			x, y = px, py
+		commands.append((1 << 3) | CLOSE_PATH)
+	return commands
+
+
+def encode_layer(name, features, extent=DEFAULT_EXTENT):
+	"""
+	Encode one layer.
+
+	Args:
+		features: iterable of (rings, properties dict)
+	"""
+	keys, values = {}, {}
+	encoded = []
+	for rings, properties in features:
+		rings = [ring for ring in rings if len(ring) >= 3 and ring_area(ring)]
+		if not rings:
+			continue
+		tags = []
+		for key, value in properties.items():
+			if value is None:
+				continue
+			tags.append(keys.setdefault(key, len(keys)))
+			tags.append(values.setdefault((type(value).__name__, value), len(values)))
+		feature = _packed(2, tags) + _uint_field(3, POLYGON) + _packed(4, _geometry(rings))
+		encoded.append(_bytes_field(2, feature))
+
+	if not encoded:
+		return b""
+	layer = _uint_field(15, 2) + _bytes_field(1, name.encode()) + b"".join(encoded)
+	layer += b"".join(_bytes_field(3, key.encode()) for key in keys)
+	layer += b"".join(_bytes_field(4, _value(value)) for _type, value in values)
+	layer += _uint_field(5, extent)
+	return _bytes_field(3, layer)
+
+
+def tile_bounds(z, x, y):
+	"""(south, west, north, east) in degrees of a Web Mercator tile."""
+	n = 2**z
+
+	def lat(row):
+		return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+	return lat(y + 1), x / n * 360 - 180, lat(y), (x + 1) / n * 360 - 180
+
+
+def project(lat, lng, z, x, y, extent=DEFAULT_EXTENT):
+	"""(lat, lng) to integer tile coordinates of tile z/x/y."""
+	n = 2**z
+	lat = max(min(lat, 85.0511), -85.0511)
+	tx = (lng + 180) / 360 * n
+	ty = (1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n
+	return round((tx - x) * extent), round((ty - y) * extent)
@@ -0,0 +1,289 @@
+# Copyright (c) 2026, NASECO and contributors
+# For license information, please see license.txt
+
+"""
+Overlapping and duplicate Farm Plots.
+
+Candidate pairs come from the stored bounding boxes (see `geo.spatial`), never
+from comparing every plot with every other:
+
+- on save, `check_plot_overlaps` compares one plot with the plots whose boxes
+  intersect its own (one indexed query);
+- `detect_plot_overlaps` scans all plots, hashing every box into a grid of
+  GRID_CELL_DEG cells so that only plots sharing a cell are compared.
+
+Each candidate pair gets an exact test: both polygons are projected to local
+meters and the intersection area is summed over their triangle fans, each
+triangle pair clipped with Sutherland-Hodgman. Signed fan triangles describe
+any simple polygon, convex or not, so this is exact for real plot outlines.
+
+Overlaps smaller than `farm_plot_overlap_min_m2` (site config,
+DEFAULT_MIN_OVERLAP_M2) are GPS noise along shared boundaries and are ignored.
+An overlap covering DUPLICATE_RATIO of the smaller plot is reported as a
+Duplicate. Results are stored as Farm Plot Overlap rows, one per pair.
+"""
+
+import math
+from collections import defaultdict
+
+import frappe
+from frappe.utils import flt, now_datetime
+
+from naseco_fieldopsbackend.geo import spatial
+from naseco_fieldopsbackend.geo.geodesy import EARTH_RADIUS_M, SQ_METERS_PER_ACRE
+from naseco_fieldopsbackend.geo.plots import get_plot_vertices
+from naseco_fieldopsbackend.sync.hydration import chunked
+
+OVERLAP_DOCTYPE = "Farm Plot Overlap"
+DEFAULT_MIN_OVERLAP_M2 = 25
+DUPLICATE_RATIO = 0.9
+GRID_CELL_DEG = 0.01
+PAIR_CHUNK_SIZE = 2000
+BOX_BATCH_SIZE = 10000
+
+BOX_FIELDS = ["name", "min_lat", "min_lng", "max_lat", "max_lng"]
+
+
+def get_min_overlap():
+	return flt(frappe.conf.get("farm_plot_overlap_min_m2", DEFAULT_MIN_OVERLAP_M2))
+
+
+def _project(vertices, lat0, lng0):
+	"""Equirectangular projection to meters around (lat0, lng0); exact enough at plot scale."""
+	scale = math.radians(1) * EARTH_RADIUS_M
+	cos_lat = math.cos(math.radians(lat0))
+	return [((lng - lng0) * scale * cos_lat, (lat - lat0) * scale) for lat, lng in vertices]
+
+
+def _signed_area(points):
+	n = len(points)
+	return (
+		sum(points[i][0] * points[(i + 1) % n][1] - points[(i + 1) % n][0] * points[i][1] for i in range(n))
+		/ 2.0
+	)
+
+
+def _clip(subject, clip):
+	"""Sutherland-Hodgman: the part of `subject` inside the counter-clockwise convex `clip`."""
+	output = subject
+	for i in range(len(clip)):
+		if not output:
+			break
+		(ax, ay), (bx, by) = clip[i], clip[(i + 1) % len(clip)]
+		points, output = output, []
+		# which side of the clip line each point is on, computed once per point
+		sides = [(bx - ax) * (y - ay) - (by - ay) * (x - ax) for x, y in points]
+		for j in range(len(points)):
+			(px, py), (qx, qy) = points[j - 1], points[j]
+			side_p, side_q = sides[j - 1], sides[j]
+			if (side_q >= 0) != (side_p >= 0):
+				# the edge p -> q crosses the clip line; the signs differ, so the
+				# denominator is never zero
+				t = side_p / (side_p - side_q)
+				output.append((px + t * (qx - px), py + t * (qy - py)))
+			if side_q >= 0:
+				output.append((qx, qy))
+	return output
+
+
+def _fan(points):
+	"""Counter-clockwise fan triangles with their sign and bounding box."""
+	triangles = []
+	for i in range(1, len(points) - 1):
+		triangle = [points[0], points[i], points[i + 1]]
+		area = _signed_area(triangle)
+		if area == 0:
+			continue
+		if area < 0:
+			triangle.reverse()
+		xs, ys = [x for x, _ in triangle], [y for _, y in triangle]
+		triangles.append((triangle, 1 if area > 0 else -1, (min(xs), min(ys), max(xs), max(ys))))
+	return triangles
+
+
+def intersection_area(a, b):
+	"""
+	Area in square meters shared by two polygons of (lat, lng) vertices.
+
+	Returns:
+		(intersection, area of a, area of b), all in square meters
+	"""
+	lat0, lng0 = a[0]
+	a, b = _project(a, lat0, lng0), _project(b, lat0, lng0)
+	total = 0.0
+	fan_b = _fan(b)
+	for triangle_a, sign_a, box_a in _fan(a):
+		for triangle_b, sign_b, box_b in fan_b:
+			if box_a[0] > box_b[2] or box_b[0] > box_a[2] or box_a[1] > box_b[3] or box_b[1] > box_a[3]:
+				continue
+			clipped = _clip(triangle_a, triangle_b)
+			if len(clipped) >= 3:
+				total += sign_a * sign_b * _signed_area(clipped)
+	return abs(total), abs(_signed_area(a)), abs(_signed_area(b))
+
+
+def measure_overlap(a, b, min_area=None):
+	"""Overlap row values for two plots' vertices, or None when they do not overlap."""
+	if len(a) < 3 or len(b) < 3:
+		return None
+	shared, area_a, area_b = intersection_area(a, b)
+	if shared < (get_min_overlap() if min_area is None else min_area):
+		return None
+	ratio = shared / min(area_a, area_b) if min(area_a, area_b) else 1.0
+	return {
+		"overlap_type": "Duplicate" if ratio >= DUPLICATE_RATIO else "Overlap",
+		"overlap_acres": round(shared / SQ_METERS_PER_ACRE, 4),
+		"overlap_ratio": round(min(ratio, 1.0) * 100, 2),
+	}
+
+
+def _boxes_intersect(a, b):
+	return (
+		a.max_lat >= b.min_lat
+		and b.max_lat >= a.min_lat
+		and a.max_lng >= b.min_lng
+		and b.max_lng >= a.min_lng
+	)
+
+
+def _cell(lat, lng):
+	return math.floor(lat / GRID_CELL_DEG), math.floor(lng / GRID_CELL_DEG)
+
+
+def candidate_pairs(boxes):
+	"""
+	Pairs of plots whose bounding boxes intersect, from a uniform grid.
+
+	A pair sharing several cells is reported once, from the cell holding the
+	lower-left corner of the boxes' intersection.
+	"""
+	grid = defaultdict(list)
+	for box in boxes:
+		(row_lo, col_lo), (row_hi, col_hi) = _cell(box.min_lat, box.min_lng), _cell(box.max_lat, box.max_lng)
+		for row in range(row_lo, row_hi + 1):
+			for col in range(col_lo, col_hi + 1):
+				grid[(row, col)].append(box)
+
+	pairs = []
+	for cell, members in grid.items():
+		for i, a in enumerate(members):
+			for b in members[i + 1 :]:
+				if not _boxes_intersect(a, b):
+					continue
+				if _cell(max(a.min_lat, b.min_lat), max(a.min_lng, b.min_lng)) != cell:
+					continue
+				pairs.append((a.name, b.name) if a.name < b.name else (b.name, a.name))
+	return sorted(pairs)
+
+
+def _overlap_rows(pairs, vertices):
+	rows = []
+	for plot, other_plot in pairs:
+		values = measure_overlap(vertices[plot], vertices[other_plot])
+		if values:
+			rows.append(dict(values, plot=plot, other_plot=other_plot))
+	return rows
+
+
+def _insert_rows(rows):
+	if not rows:
+		return
+	now = now_datetime()
+	user = frappe.session.user
+	frappe.db.bulk_insert(
+		OVERLAP_DOCTYPE,
+		(
+			"name",
+			"creation",
+			"modified",
+			"owner",
+			"modified_by",
+			"docstatus",
+			"idx",
+			"plot",
+			"other_plot",
+			"overlap_type",
+			"overlap_acres",
+			"overlap_ratio",
+			"detected_on",
+		),
+		[
+			(
+				frappe.generate_hash(length=10),
+				now,
+				now,
+				user,
+				user,
+				0,
+				0,
+				row["plot"],
+				row["other_plot"],
+				row["overlap_type"],
+				row["overlap_acres"],
+				row["overlap_ratio"],
+				now,
+			)
+			for row in rows
+		],
+	)
+
+
+def clear_plot_overlaps(plot):
+	frappe.db.delete(OVERLAP_DOCTYPE, {"plot": plot})
+	frappe.db.delete(OVERLAP_DOCTYPE, {"other_plot": plot})
+
+
+def check_plot_overlaps(plot, vertices):
+	"""Replace the stored overlaps of one plot, comparing it with its neighbours only."""
+	clear_plot_overlaps(plot)
+	if len(vertices) < 3:
+		return []
+
+	min_lat, min_lng, max_lat, max_lng = spatial.bbox_of(vertices)
+	neighbours = [
+		row.name
+		for row in spatial.plots_in_bbox(min_lat, min_lng, max_lat, max_lng, [["name", "!=", plot]], limit=0)
+	]
+	if not neighbours:
+		return []
+
+	others = get_plot_vertices(neighbours)
+	others[plot] = vertices
+	pairs = [(plot, other) if plot < other else (other, plot) for other in neighbours]
+	rows = _overlap_rows(pairs, others)
+	_insert_rows(rows)
+	return rows
+
+
+def detect_plot_overlaps(dry_run=False):
+	"""
+	Scan all plots for overlaps and replace the stored Farm Plot Overlap rows.
+
+	Returns:
+		list of dicts with plot, other_plot, overlap_type, overlap_acres and overlap_ratio
+	"""
+	boxes = []
+	last_name = ""
+	while True:
+		batch = frappe.get_all(
+			"Farm Plot",
+			filters=[["name", ">", last_name], ["geohash", "is", "set"]],
+			fields=BOX_FIELDS,
+			order_by="name asc",
+			limit_page_length=BOX_BATCH_SIZE,
+		)
+		if not batch:
+			break
+		last_name = batch[-1].name
+		boxes.extend(batch)
+
+	rows = []
+	for pairs in chunked(candidate_pairs(boxes), PAIR_CHUNK_SIZE):
+		vertices = get_plot_vertices({name for pair in pairs for name in pair})
+		rows.extend(_overlap_rows(pairs, vertices))
+
+	if not dry_run:
+		frappe.db.delete(OVERLAP_DOCTYPE)
+		_insert_rows(rows)
+		frappe.db.commit()
+	return rows
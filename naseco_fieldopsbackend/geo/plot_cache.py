@@ -0,0 +1,117 @@
+# Copyright (c) 2026, NASECO and contributors
+# For license information, please see license.txt
+
+"""
+Cached, lightweight Farm Plot geometry.
+
+Validators that only need a plot's shape should not `frappe.get_doc` it: that
+loads the photos and map image along with the polygon. `get_plot_geometries`
+returns, per plot, the centroid, the bounding box and the vertices packed into
+one flat tuple (lat, lng, lat, lng, ...), read with two queries for all plots
+not already cached.
+
+Entries are cached per plot and dropped by `invalidate_plot_geometry` when a
+plot is saved, renamed or deleted, or rewritten by `recompute_plot_geometry`:
+right away, so the writing transaction reads its own changes, and again once it
+commits or rolls back, so a validation running concurrently cannot leave the
+old geometry (or a rolled back one) cached for CACHE_TTL.
+"""
+
+import frappe
+from frappe.utils import flt
+
+from naseco_fieldopsbackend.geo.geodesy import distance_to_polygon, haversine
+from naseco_fieldopsbackend.sync.hydration import chunked, fetch_child_rows
+
+CACHE_PREFIX = "naseco_fieldops:plot_geometry"
+CACHE_TTL = 24 * 60 * 60
+
+
+def _cache_key(plot):
+	return f"{CACHE_PREFIX}:{plot}"
+
+
+def unpack_vertices(packed):
+	return list(zip(packed[0::2], packed[1::2], strict=True))
+
+
+def _load(plots):
+	geometries = {}
+	for names in chunked(plots):
+		for row in frappe.get_all(
+			"Farm Plot",
+			filters={"name": ["in", names]},
+			fields=["name", "centroid_lat", "centroid_lng", "min_lat", "min_lng", "max_lat", "max_lng"],
+		):
+			geometries[row.name] = frappe._dict(
+				centroid=(flt(row.centroid_lat), flt(row.centroid_lng)) if row.centroid_lat else None,
+				bbox=(row.min_lat, row.min_lng, row.max_lat, row.max_lng)
+				if row.min_lat is not None
+				else None,
+				vertices=[],
+			)
+
+	for row in fetch_child_rows("Farm Plot", "polygon", "Plot Vertex", list(geometries)):
+		geometries[row.parent].vertices.extend((flt(row.latitude), flt(row.longitude)))
+	for geometry in geometries.values():
+		geometry.vertices = tuple(geometry.vertices)
+	return geometries
+
+
+def get_plot_geometries(plots):
+	"""Map plot name to its geometry; plots that do not exist are left out."""
+	cache = frappe.cache()
+	geometries, missing = {}, []
+	for plot in set(filter(None, plots)):
+		geometry = cache.get_value(_cache_key(plot))
+		if geometry is None:
+			missing.append(plot)
+		else:
+			geometries[plot] = geometry
+
+	for plot, geometry in _load(missing).items():
+		cache.set_value(_cache_key(plot), geometry, expires_in_sec=CACHE_TTL)
+		geometries[plot] = geometry
+	return geometries
+
+
+def get_plot_geometry(plot):
+	return get_plot_geometries([plot]).get(plot)
+
+
+def _drop(plots):
+	if plots:
+		frappe.cache().delete_value([_cache_key(plot) for plot in plots])
+
+
+def _drop_pending():
+	plots = frappe.flags.plot_geometry_pending
+	frappe.flags.plot_geometry_pending = None
+	_drop(plots)
+
+
+def invalidate_plot_geometry(*plots):
+	"""Drop the cached geometry of `plots` now and when the current transaction ends."""
+	plots = set(filter(None, plots))
+	if not plots:
+		return
+	_drop(plots)
+	pending = frappe.flags.plot_geometry_pending
+	if pending is None:
+		pending = frappe.flags.plot_geometry_pending = set()
+		frappe.db.after_commit.add(_drop_pending)
+		frappe.db.after_rollback.add(_drop_pending)
+	pending.update(plots)
+
+
+def distance_to_plot(geometry, lat, lng):
+	"""
+	Meters from a point to the plot: 0 inside its polygon, otherwise to the
+	nearest edge. Falls back to the centroid for plots without a polygon.
+	"""
+	lat, lng = flt(lat), flt(lng)
+	if len(geometry.vertices) >= 6:
+		return distance_to_polygon(lat, lng, unpack_vertices(geometry.vertices))
+	if geometry.centroid:
+		return haversine(lat, lng, *geometry.centroid)
+	return None
@@ -0,0 +1,104 @@
+# Copyright (c) 2026, NASECO and contributors
+# For license information, please see license.txt
+
+"""
+Set-based maintenance of Farm Plot geometry.
+
+`recompute_plot_geometry` walks all plots in keyset batches and, per batch,
+reads the vertices with one query, computes every metric with
+`geodesy.polygon_metrics` and writes the changed plots with one bulk update.
+No controller runs, so a formula change or a surveyed import does not need a
+`doc.save()` per plot.
+"""
+
+import frappe
+
+from naseco_fieldopsbackend.geo import maps
+from naseco_fieldopsbackend.geo.geodesy import polygon_geojson, polygon_metrics
+from naseco_fieldopsbackend.geo.plot_cache import invalidate_plot_geometry
+from naseco_fieldopsbackend.geo.spatial import INDEX_FIELDS, index_values
+from naseco_fieldopsbackend.sync import journal
+from naseco_fieldopsbackend.sync.hydration import fetch_child_rows
+
+RECOMPUTE_BATCH_SIZE = 5000
+
+GEOMETRY_FIELDS = ("area_acres", "perimeter_meters", "centroid_lat", "centroid_lng", "geojson", *INDEX_FIELDS)
+
+
+def get_plot_vertices(plots):
+	"""Map plot name to its [(lat, lng)] vertices, in table order."""
+	vertices = {plot: [] for plot in plots}
+	for row in fetch_child_rows("Farm Plot", "polygon", "Plot Vertex", list(plots)):
+		vertices[row.parent].append((float(row.latitude or 0), float(row.longitude or 0)))
+	return vertices
+
+
+def _bbox(values):
+	return (values["min_lat"], values["min_lng"], values["max_lat"], values["max_lng"])
+
+
+def plot_geojson(plot_id, plot_name, area_acres, perimeter_meters, vertices):
+	return polygon_geojson(
+		vertices,
+		{
+			"plot_id": plot_id,
+			"plot_name": plot_name or "",
+			"area_acres": area_acres or 0,
+			"perimeter_meters": perimeter_meters or 0,
+		},
+	)
+
+
+def recompute_plot_geometry(batch_size=RECOMPUTE_BATCH_SIZE, dry_run=False):
+	"""
+	Recompute area, perimeter, centroid, GeoJSON and spatial index columns of every Farm Plot.
+
+	Plots with fewer than three vertices are left alone, as in `before_save`.
+
+	Returns:
+		(plots checked, plots changed)
+	"""
+	checked = changed = 0
+	last_name = ""
+	while True:
+		plots = frappe.get_all(
+			"Farm Plot",
+			filters=[["name", ">", last_name]],
+			fields=["name", "plot_id", "plot_name", *GEOMETRY_FIELDS],
+			order_by="name asc",
+			limit_page_length=batch_size,
+		)
+		if not plots:
+			break
+		last_name = plots[-1].name
+
+		vertices = get_plot_vertices([plot.name for plot in plots])
+		plots = [plot for plot in plots if len(vertices[plot.name]) >= 3]
+		metrics = polygon_metrics([vertices[plot.name] for plot in plots])
+
+		updates = {}
+		for plot, (area, perimeter, lat, lng) in zip(plots, metrics, strict=True):
+			values = {
+				"area_acres": area,
+				"perimeter_meters": perimeter,
+				"centroid_lat": lat,
+				"centroid_lng": lng,
+				"geojson": plot_geojson(plot.plot_id, plot.plot_name, area, perimeter, vertices[plot.name]),
+				**index_values(vertices[plot.name], lat, lng),
+			}
+			if any(plot.get(field) != value for field, value in values.items()):
+				updates[plot.name] = values
+
+		checked += len(plots)
+		changed += len(updates)
+		if updates and not dry_run:
+			frappe.db.bulk_update("Farm Plot", updates)
+			journal.append_many("Farm Plot", list(updates))
+			invalidate_plot_geometry(*updates)
+			maps.invalidate_plot_tiles(
+				*(_bbox(plot) for plot in plots if plot.name in updates),
+				*(_bbox(values) for values in updates.values()),
+			)
+			frappe.db.commit()
+
+	return checked, changed
@@ -0,0 +1,183 @@
+# Copyright (c) 2026, NASECO and contributors
+# For license information, please see license.txt
+
+"""
+Spatial index for Farm Plots.
+
+Every plot stores its bounding box (`min_lat` .. `max_lng`) and the geohash
+of its centroid (`geohash`, indexed), both kept current in
+`FarmPlot.before_save`. A query area is covered with a handful of geohash
+cells, which become indexed `geohash LIKE 'prefix%'` range scans; the stored
+bounding boxes then give the exact answer.
+
+Centroid cells alone would miss large plots whose centroid lies just outside
+the area, so the area is widened by `farm_plot_max_extent_m` (site config,
+DEFAULT_MAX_EXTENT_M by default), roughly half the diagonal of the largest
+plot, before it is covered with cells.
+"""
+
+import math
+
+import frappe
+from frappe.utils import cint, flt
+
+from naseco_fieldopsbackend.geo.geodesy import haversine
+
+GEOHASH_PRECISION = 9
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+METERS_PER_DEGREE = 111320
+DEFAULT_MAX_EXTENT_M = 2000
+MAX_CELLS = 16
+
+INDEX_FIELDS = ("min_lat", "min_lng", "max_lat", "max_lng", "geohash")
+
+PLOT_FIELDS = [
+	"name",
+	"plot_id",
+	"plot_name",
+	"outgrower",
+	"area_acres",
+	"centroid_lat",
+	"centroid_lng",
+	"min_lat",
+	"min_lng",
+	"max_lat",
+	"max_lng",
+]
+
+
+def geohash_encode(lat, lng, precision=GEOHASH_PRECISION):
+	lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+	chars = []
+	bits = value = 0
+	even = True
+	while len(chars) < precision:
+		interval, coord = (lng_range, lng) if even else (lat_range, lat)
+		mid = (interval[0] + interval[1]) / 2
+		value <<= 1
+		if coord >= mid:
+			value |= 1
+			interval[0] = mid
+		else:
+			interval[1] = mid
+		even = not even
+		bits += 1
+		if bits == 5:
+			chars.append(GEOHASH_ALPHABET[value])
+			bits = value = 0
+	return "".join(chars)
+
+
+def cell_size(precision):
+	"""(height, width) of a geohash cell in degrees."""
+	lng_bits = math.ceil(5 * precision / 2)
+	lat_bits = 5 * precision - lng_bits
+	return 180.0 / 2**lat_bits, 360.0 / 2**lng_bits
+
+
+def bbox_of(vertices):
+	"""(min_lat, min_lng, max_lat, max_lng) of [(lat, lng)] vertices."""
+	lats = [lat for lat, _ in vertices]
+	lngs = [lng for _, lng in vertices]
+	return min(lats), min(lngs), max(lats), max(lngs)
+
+
+def index_values(vertices, centroid_lat, centroid_lng):
+	"""Spatial index columns for a plot."""
+	if not vertices:
+		return dict.fromkeys(INDEX_FIELDS)
+	min_lat, min_lng, max_lat, max_lng = bbox_of(vertices)
+	return {
+		"min_lat": min_lat,
+		"min_lng": min_lng,
+		"max_lat": max_lat,
+		"max_lng": max_lng,
+		"geohash": geohash_encode(flt(centroid_lat), flt(centroid_lng)),
+	}
+
+
+def covering_cells(south, west, north, east):
+	"""Geohash prefixes whose cells together cover the box, at most MAX_CELLS of them."""
+	for precision in range(GEOHASH_PRECISION, 0, -1):
+		height, width = cell_size(precision)
+		rows = math.floor(north / height) - math.floor(south / height) + 1
+		cols = math.floor(east / width) - math.floor(west / width) + 1
+		if rows * cols <= MAX_CELLS:
+			break
+
+	cells = set()
+	lat = south
+	while lat < north + height:
+		lng = west
+		while lng < east + width:
+			cells.add(geohash_encode(min(lat, north), min(lng, east), precision))
+			lng += width
+		lat += height
+	return sorted(cells)
+
+
+def get_max_extent():
+	return flt(frappe.conf.get("farm_plot_max_extent_m", DEFAULT_MAX_EXTENT_M))
+
+
+def _widen(south, west, north, east, meters):
+	dlat = meters / METERS_PER_DEGREE
+	dlng = meters / (METERS_PER_DEGREE * max(math.cos(math.radians((south + north) / 2)), 0.01))
+	return (
+		max(south - dlat, -90.0),
+		max(west - dlng, -180.0),
+		min(north + dlat, 90.0),
+		min(east + dlng, 180.0),
+	)
+
+
+def _candidates(south, west, north, east, filters=None, limit=None):
+	"""Plots whose bounding box intersects the box, via the geohash index."""
+	cells = covering_cells(*_widen(south, west, north, east, get_max_extent()))
+	return frappe.get_all(
+		"Farm Plot",
+		filters=[
+			*(filters or []),
+			["max_lat", ">=", south],
+			["min_lat", "<=", north],
+			["max_lng", ">=", west],
+			["min_lng", "<=", east],
+		],
+		or_filters=[["geohash", "like", f"{cell}%"] for cell in cells],
+		fields=PLOT_FIELDS,
+		limit_page_length=limit or 0,
+	)
+
+
+def _distance_to_bbox(lat, lng, plot):
+	"""Meters from the point to the nearest point of the plot's bounding box (0 inside)."""
+	nearest_lat = min(max(lat, plot.min_lat), plot.max_lat)
+	nearest_lng = min(max(lng, plot.min_lng), plot.max_lng)
+	return haversine(lat, lng, nearest_lat, nearest_lng)
+
+
+def plots_near(lat, lng, radius, filters=None, limit=50):
+	"""
+	Plots within `radius` meters of the point, nearest first.
+
+	Distance is measured to the plot's bounding box, so a point inside a plot is
+	at distance 0; `centroid_distance` is returned as well.
+	"""
+	lat, lng, radius = flt(lat), flt(lng), flt(radius)
+	south, west, north, east = _widen(lat, lng, lat, lng, radius)
+
+	plots = []
+	for plot in _candidates(south, west, north, east, filters):
+		distance = _distance_to_bbox(lat, lng, plot)
+		if distance <= radius:
+			plot.distance = round(distance, 1)
+			plot.centroid_distance = round(haversine(lat, lng, plot.centroid_lat, plot.centroid_lng), 1)
+			plots.append(plot)
+
+	plots.sort(key=lambda plot: (plot.distance, plot.centroid_distance))
+	return plots[: cint(limit) or None]
+
+
+def plots_in_bbox(south, west, north, east, filters=None, limit=500):
+	"""Plots whose bounding box intersects the given box."""
+	return _candidates(flt(south), flt(west), flt(north), flt(east), filters, cint(limit))
@@ -145,9 +145,49 @@ app_license = "mit"
 # 	}
 # }
 
+_reference_snapshot_events = {
+	"on_update": "naseco_fieldopsbackend.sync.reference.invalidate_reference_snapshot",
+	"on_trash": "naseco_fieldopsbackend.sync.reference.invalidate_reference_snapshot",
+	"after_rename": "naseco_fieldopsbackend.sync.reference.invalidate_reference_snapshot",
+}
+
+doc_events = {
+	"*": {
+		"after_insert": "naseco_fieldopsbackend.sync.journal.record_change",
+		"on_update": "naseco_fieldopsbackend.sync.journal.record_change",
+		"on_trash": "naseco_fieldopsbackend.sync.journal.record_delete",
+		"after_rename": "naseco_fieldopsbackend.sync.journal.record_rename",
+	},
+	"Outgrower": {
+		"after_insert": "naseco_fieldopsbackend.sync.scope.invalidate_scope",
+		"on_update": "naseco_fieldopsbackend.sync.scope.invalidate_scope",
+		"on_trash": "naseco_fieldopsbackend.sync.scope.invalidate_scope",
+		"after_rename": "naseco_fieldopsbackend.sync.scope.invalidate_scope",
+	},
+	"Crop": _reference_snapshot_events,
+	"Crop Variety": _reference_snapshot_events,
+	"Season": _reference_snapshot_events,
+	"Crop Recipe": _reference_snapshot_events,
+	"Visit Type": _reference_snapshot_events,
+	"Region": _reference_snapshot_events,
+	"Unit": _reference_snapshot_events,
+	"Inspection Attribute": _reference_snapshot_events,
+}
+
 # Scheduled Tasks
 # ---------------
 
+scheduler_events = {
+	"cron": {
+		"*/10 * * * *": [
+			"naseco_fieldopsbackend.sync.push_jobs.requeue_stale_jobs",
+		],
+	},
+	"daily_long": [
+		"naseco_fieldopsbackend.sync.retention.run_retention",
+	],
+}
+
 # scheduler_events = {
 # 	"all": [
 # 		"naseco_fieldopsbackend.tasks.all"
@@ -0,0 +1,91 @@
+# Copyright (c) 2026, NASECO and contributors
+# For license information, please see license.txt
+
+"""
+Content-addressed file storage for images sent by the mobile app.
+
+Files are named after the SHA-256 of their content (the hash the app can
+compute with WebCrypto). Storing the same image twice for the same document,
+or twice unattached, reuses the existing File. A File attached elsewhere is
+never reused, since deleting that document would delete the file with it;
+a new File row is made instead, and frappe's own content-hash check points it
+at the copy already on disk.
+"""
+
+import base64
+import hashlib
+import re
+
+import frappe
+from frappe.utils.file_manager import save_file
+
+DATA_URL_RE = re.compile(r"^data:(image/[^;]+);base64,(.*)$", flags=re.IGNORECASE | re.DOTALL)
+
+EXTENSIONS = {
+	"image/png": ".png",
+	"image/jpeg": ".jpg",
+	"image/jpg": ".jpg",
+	"image/webp": ".webp",
+	"image/gif": ".gif",
+}
+DEFAULT_EXTENSION = ".png"
+
+
+def content_hash(content):
+	return hashlib.sha256(content).hexdigest()
+
+
+def decode_data_url(value):
+	"""
+	Decode a base64 string, optionally a `data:image/...;base64,` URL.
+
+	Returns:
+		(content bytes, file extension)
+	Raises:
+		ValueError when the value is not valid base64
+	"""
+	mime = None
+	data = (value or "").strip()
+	match = DATA_URL_RE.match(data)
+	if match:
+		mime = match.group(1).lower()
+		data = match.group(2)
+
+	try:
+		content = base64.b64decode(data, validate=False)
+	except Exception as e:
+		raise ValueError("Invalid base64 image") from e
+	if not content:
+		raise ValueError("Empty image")
+	return content, EXTENSIONS.get(mime, DEFAULT_EXTENSION)
+
+
+def find_file(digest, is_private=0, doctype=None, name=None):
+	"""URL of a stored file with this content hash attached to `doctype` `name` (or to nothing), if any."""
+	files = frappe.get_all(
+		"File",
+		filters=[
+			["file_name", "like", f"{digest}.%"],
+			["is_private", "=", is_private],
+			["attached_to_doctype", "=", doctype] if doctype else ["attached_to_doctype", "is", "not set"],
+			["attached_to_name", "=", name] if name else ["attached_to_name", "is", "not set"],
+		],
+		pluck="file_url",
+		limit_page_length=1,
+	)
+	return files[0] if files else None
+
+
+def store_content(content, extension=DEFAULT_EXTENSION, doctype=None, name=None, is_private=0, digest=None):
+	"""
+	Store `content` under its content hash, reusing an existing copy.
+
+	Returns:
+		(file url, content hash)
+	"""
+	digest = digest or content_hash(content)
+	file_url = find_file(digest, is_private, doctype, name)
+	if not file_url:
+		file_doc = save_file(f"{digest}{extension}", content, doctype, name, is_private=is_private)
+		file_url = file_doc.file_url
+	return file_url, digest
@@ -0,0 +1,256 @@
+# Copyright (c) 2026, NASECO and contributors
+# For license information, please see license.txt
+
+"""
+Resumable, chunked photo uploads.
+
+Photos are uploaded outside the sync payload and addressed by the SHA-256 of
+their content:
+
+1. `start_upload(photo_hash, size)` returns `complete` with the file URL when
+   the photo is already stored; otherwise it opens (or resumes) an upload and
+   lists the chunks the server already has.
+2. `put_chunk(photo_hash, index, data, chunk_hash)` stores one chunk.
+   Chunks are written to the site's private upload directory, so a broken
+   connection only loses the chunk in flight.
+3. `finish_upload(photo_hash)` assembles the chunks, checks the hash and
+   stores the photo through `media.store`.
+
+The whitelisted wrappers live in `api.py`. Synced Field Visit, Farm Plot and
+Finding rows may then reference a photo by its hash (`sha256:<hash>` or the
+bare hash); the push pipeline swaps the reference for the file URL via
+`resolve_photo_refs`. A record referencing a photo that was not uploaded yet
+is rejected with a retryable MissingPhotoError, so the app uploads the photo
+and pushes the record again. Abandoned uploads are purged by the retention
+job (`sync.retention.purge_stale_uploads`).
+
+Site config:
+	photo_upload_max_size: largest photo accepted, in bytes (DEFAULT_MAX_SIZE)
+"""
+
+import base64
+import json
+import os
+import re
+import shutil
+
+import frappe
+from frappe import _
+from frappe.utils import cint
+
+from naseco_fieldopsbackend.media.store import (
+	DEFAULT_EXTENSION,
+	EXTENSIONS,
+	content_hash,
+	find_file,
+	store_content,
+)
+from naseco_fieldopsbackend.sync.hydration import chunked
+
+UPLOAD_DIR = "photo_uploads"
+DEFAULT_CHUNK_SIZE = 256 * 1024
+MAX_CHUNK_SIZE = 2 * 1024 * 1024
+DEFAULT_MAX_SIZE = 20 * 1024 * 1024
+
+HASH_RE = re.compile(r"^(?:sha256:)?([0-9a-f]{64})$")
+
+
+class MissingPhotoError(frappe.ValidationError):
+	"""A record references photos that are not uploaded yet."""
+
+	# the push succeeds once the photos are uploaded
+	retryable = True
+
+
+# doctype -> (photo table field, column holding the photo)
+PHOTO_TABLES = {
+	"Field Visit": ("photos", "photo"),
+	"Farm Plot": ("photos", "file"),
+	"Finding": ("photos", "photo"),
+}
+
+
+def parse_hash(value):
+	"""The hex digest in `value`, or None when it is not a photo hash reference."""
+	match = HASH_RE.match(str(value or "").strip().lower())
+	return match.group(1) if match else None
+
+
+def _validate_hash(value):
+	digest = parse_hash(value)
+	if not digest:
+		frappe.throw(_("Invalid photo hash"), frappe.ValidationError)
+	return digest
+
+
+def get_upload_root():
+	return frappe.get_site_path("private", UPLOAD_DIR)
+
+
+def get_upload_path(digest, *parts):
+	return os.path.join(get_upload_root(), digest, *parts)
+
+
+def _read_manifest(digest):
+	try:
+		with open(get_upload_path(digest, "manifest.json")) as f:
+			return json.load(f)
+	except FileNotFoundError:
+		return None
+
+
+def _received_chunks(digest, manifest):
+	return [
+		i for i in range(manifest["total_chunks"]) if os.path.exists(get_upload_path(digest, f"{i}.part"))
+	]
+
+
+def _status(digest, manifest):
+	return {
+		"complete": False,
+		"hash": digest,
+		"chunk_size": manifest["chunk_size"],
+		"total_chunks": manifest["total_chunks"],
+		"received": _received_chunks(digest, manifest),
+	}
+
+
+def start_upload(photo_hash, size, chunk_size=None, content_type=None):
+	"""Open or resume an upload; also serves as the status call."""
+	digest = _validate_hash(photo_hash)
+	file_url = find_file(digest)
+	if file_url:
+		return {"complete": True, "hash": digest, "file_url": file_url}
+
+	size = cint(size)
+	max_size = cint(frappe.conf.get("photo_upload_max_size", DEFAULT_MAX_SIZE))
+	if size <= 0 or size > max_size:
+		frappe.throw(_("Photo size must be between 1 and {0} bytes").format(max_size), frappe.ValidationError)
+
+	manifest = _read_manifest(digest)
+	if manifest is None or manifest["size"] != size:
+		chunk_size = min(cint(chunk_size) or DEFAULT_CHUNK_SIZE, MAX_CHUNK_SIZE)
+		manifest = {
+			"size": size,
+			"chunk_size": chunk_size,
+			"total_chunks": -(-size // chunk_size),
+			"extension": EXTENSIONS.get((content_type or "").lower(), DEFAULT_EXTENSION),
+		}
+		shutil.rmtree(get_upload_path(digest), ignore_errors=True)
+		os.makedirs(get_upload_path(digest), exist_ok=True)
+		with open(get_upload_path(digest, "manifest.json"), "w") as f:
+			json.dump(manifest, f)
+
+	return _status(digest, manifest)
+
+
+def put_chunk(photo_hash, index, data=None, chunk_hash=None):
+	"""
+	Store one chunk, sent as base64 `data` or as a multipart file named `chunk`.
+
+	Re-sending a chunk that is already stored is a no-op.
+	"""
+	digest = _validate_hash(photo_hash)
+	manifest = _read_manifest(digest)
+	if manifest is None:
+		frappe.throw(_("Upload {0} was not started").format(digest), frappe.ValidationError)
+
+	index = cint(index)
+	if index < 0 or index >= manifest["total_chunks"]:
+		frappe.throw(_("Chunk index out of range"), frappe.ValidationError)
+
+	path = get_upload_path(digest, f"{index}.part")
+	if not os.path.exists(path):
+		request = getattr(frappe.local, "request", None)
+		request_file = request.files.get("chunk") if request is not None else None
+		content = request_file.stream.read() if request_file else base64.b64decode(data or "")
+
+		expected = manifest["chunk_size"]
+		if index == manifest["total_chunks"] - 1:
+			expected = manifest["size"] - index * manifest["chunk_size"]
+		if len(content) != expected:
+			frappe.throw(_("Chunk {0} must be {1} bytes").format(index, expected), frappe.ValidationError)
+		if chunk_hash and content_hash(content) != str(chunk_hash).lower():
+			frappe.throw(_("Chunk {0} does not match its hash").format(index), frappe.ValidationError)
+
+		# write then rename, so an interrupted write never looks like a stored chunk
+		with open(f"{path}.tmp", "wb") as f:
+			f.write(content)
+		os.replace(f"{path}.tmp", path)
+
+	return _status(digest, manifest)
+
+
+def finish_upload(photo_hash):
+	"""Assemble the chunks into the stored photo and return its URL."""
+	digest = _validate_hash(photo_hash)
+	file_url = find_file(digest)
+	if file_url:
+		return {"complete": True, "hash": digest, "file_url": file_url}
+
+	manifest = _read_manifest(digest)
+	if manifest is None:
+		frappe.throw(_("Upload {0} was not started").format(digest), frappe.ValidationError)
+	status = _status(digest, manifest)
+	if len(status["received"]) != manifest["total_chunks"]:
+		return status
+
+	parts = []
+	for i in range(manifest["total_chunks"]):
+		with open(get_upload_path(digest, f"{i}.part"), "rb") as f:
+			parts.append(f.read())
+	content = b"".join(parts)
+
+	if content_hash(content) != digest:
+		# start over; a corrupted chunk cannot be told apart from the others
+		shutil.rmtree(get_upload_path(digest), ignore_errors=True)
+		frappe.throw(_("Uploaded photo does not match its hash"), frappe.ValidationError)
+
+	file_url, _digest = store_content(content, manifest["extension"], digest=digest)
+	shutil.rmtree(get_upload_path(digest), ignore_errors=True)
+	return {"complete": True, "hash": digest, "file_url": file_url}
+
+
+def resolve_photo_refs(docs):
+	"""
+	Replace photo hash references in the photo tables of `docs` with file URLs.
+
+	All hashes are resolved with one query.
+
+	Returns:
+		one set per doc, in order, of the hashes of photos not uploaded yet;
+		those references are left as they are
+	"""
+	docs = list(docs)
+	rows = []
+	for position, doc in enumerate(docs):
+		table = PHOTO_TABLES.get(doc.get("doctype"))
+		if not table:
+			continue
+		fieldname, column = table
+		for row in doc.get(fieldname) or []:
+			if isinstance(row, dict) and parse_hash(row.get(column)):
+				rows.append((position, row, column))
+	missing = [set() for _doc in docs]
+	if not rows:
+		return missing
+
+	extensions = set(EXTENSIONS.values())
+	file_names = {f"{parse_hash(row[column])}{ext}" for _, row, column in rows for ext in extensions}
+	urls = {}
+	for chunk in chunked(sorted(file_names)):
+		for file_name, file_url in frappe.get_all(
+			"File",
+			filters={"file_name": ["in", chunk], "is_private": 0, "attached_to_doctype": ["is", "not set"]},
+			fields=["file_name", "file_url"],
+			as_list=True,
+		):
+			urls[file_name.split(".", 1)[0]] = file_url
+
+	for position, row, column in rows:
+		digest = parse_hash(row[column])
+		if digest in urls:
+			row[column] = urls[digest]
+		else:
+			missing[position].add(digest)
+	return missing
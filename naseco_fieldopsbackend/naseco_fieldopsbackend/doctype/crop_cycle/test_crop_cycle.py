@@ -4,6 +4,27 @@
 # import frappe
 from frappe.tests.utils import FrappeTestCase
 
+from naseco_fieldopsbackend.sync import push
+
+# an offline backlog, children first
+BACKLOG = ["findings", "visits", "crop_cycle_stages", "crop_cycles", "plots", "outgrowers"]
+
 
 class TestCropCycle(FrappeTestCase):
-	pass
+	def test_dependency_rank_breaks_the_current_stage_cycle(self):
+		# Crop Cycle.current_stage and Crop Cycle Stage.crop_cycle link both ways
+		rank = push.dependency_rank(
+			["Finding", "Field Visit", "Crop Cycle Stage", "Crop Cycle", "Farm Plot", "Outgrower"]
+		)
+		self.assertEqual(
+			sorted(rank, key=rank.get),
+			["Outgrower", "Farm Plot", "Crop Cycle", "Crop Cycle Stage", "Field Visit", "Finding"],
+		)
+
+	def test_dependency_order_applies_parents_first(self):
+		records = [{"storeName": store, "recordId": f"{store}-1", "payload": {}} for store in BACKLOG]
+		self.assertEqual(push.dependency_order(records), [5, 4, 3, 2, 1, 0])
+
+		# deletes run after the upserts, children first
+		deletes = [dict(record, operation="DELETE") for record in records]
+		self.assertEqual(push.dependency_order(records + deletes), [5, 4, 3, 2, 1, 0, 6, 7, 8, 9, 10, 11])
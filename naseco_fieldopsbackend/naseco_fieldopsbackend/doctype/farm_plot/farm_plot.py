@@ -1,15 +1,18 @@
 # Copyright (c) 2026, Naseco and contributors
 # For license information, please see license.txt
 
-import base64
-import json
-import math
-import re
-import time
-
 import frappe
 from frappe.model.document import Document
-from frappe.utils.file_manager import save_file
+
+from naseco_fieldopsbackend.geo import geodesy
+from naseco_fieldopsbackend.geo.geodesy import polygon_metrics
+from naseco_fieldopsbackend.geo.maps import invalidate_plot_tiles
+from naseco_fieldopsbackend.geo.overlaps import check_plot_overlaps, clear_plot_overlaps
+from naseco_fieldopsbackend.geo.plot_cache import invalidate_plot_geometry
+from naseco_fieldopsbackend.geo.plots import plot_geojson
+from naseco_fieldopsbackend.geo.spatial import index_values
+from naseco_fieldopsbackend.media.store import content_hash, decode_data_url, store_content
+from naseco_fieldopsbackend.sync import journal
 
 
 class FarmPlot(Document):
@@ -18,189 +21,114 @@ class FarmPlot(Document):
 		if self.polygon and len(self.polygon) >= 3:
 			self.calculate_geospatial_values()
 			self.generate_geojson()
-
-	def after_insert(self):
-		self._ensure_map_image_from_base64()
+			self.update(index_values(self.get_vertices(), self.centroid_lat, self.centroid_lng))
+		else:
+			self.update(index_values([], None, None))
 
 	def on_update(self):
-		self._ensure_map_image_from_base64()
-
-	def _ensure_map_image_from_base64(self):
-		if not self.map_image_base64 or self.map_image:
-			return
-
-		b64 = (self.map_image_base64 or "").strip()
-		if not b64:
-			return
-
-		mime = None
-		data = b64
-		match = re.match(r"^data:(image/[^;]+);base64,(.*)$", b64, flags=re.IGNORECASE | re.DOTALL)
-		if match:
-			mime = match.group(1).lower()
-			data = match.group(2)
-
-		try:
-			content = base64.b64decode(data)
-		except Exception:
-			frappe.log_error("Invalid base64 map image for Farm Plot")
-			return
-
-		ext_map = {
-			"image/png": ".png",
-			"image/jpeg": ".jpg",
-			"image/jpg": ".jpg",
-			"image/webp": ".webp",
-			"image/gif": ".gif",
-		}
-		ext = ext_map.get(mime, ".png")
-		filename = f"plot_{self.plot_id or self.name or 'map'}_{int(time.time())}{ext}"
-
-		try:
-			file_doc = save_file(filename, content, self.doctype, self.name, is_private=0)
-			if file_doc and file_doc.file_url:
-				frappe.db.set_value(self.doctype, self.name, "map_image", file_doc.file_url, update_modified=False)
-		except Exception:
-			frappe.log_error("Failed to save map image file from base64")
+		"""Runs on insert too; decoding the map image is left to a background job"""
+		invalidate_plot_geometry(self.name)
+		if self.map_image_base64 and self.has_value_changed("map_image_base64"):
+			frappe.enqueue(
+				"naseco_fieldopsbackend.naseco_fieldopsbackend.doctype.farm_plot.farm_plot.process_map_image",
+				queue="short",
+				plot=self.name,
+				enqueue_after_commit=True,
+			)
+
+		geometry_changed = self.has_value_changed("geojson") or self.has_value_changed("geohash")
+		if geometry_changed:
+			check_plot_overlaps(self.name, self.get_vertices() if len(self.polygon or []) >= 3 else [])
+		if geometry_changed or self.has_value_changed("outgrower"):
+			before = self.get_doc_before_save()
+			invalidate_plot_tiles(self.get_bbox(), before.get_bbox() if before else None)
+
+	def on_trash(self):
+		clear_plot_overlaps(self.name)
+		invalidate_plot_geometry(self.name)
+		invalidate_plot_tiles(self.get_bbox())
+
+	def after_rename(self, old, new, merge=False):
+		invalidate_plot_geometry(old, new)
+		invalidate_plot_tiles(self.get_bbox())
+
+	def get_bbox(self):
+		return (self.min_lat, self.min_lng, self.max_lat, self.max_lng)
 
 	def calculate_geospatial_values(self):
 		"""Calculate area (acres), perimeter (meters), and centroid from GPS vertices"""
-		vertices = [(float(v.latitude), float(v.longitude)) for v in self.polygon]
-
-		# Calculate area using spherical polygon formula
-		self.area_acres = self.calculate_area_acres(vertices)
+		vertices = self.get_vertices()
+		area, perimeter, lat, lng = polygon_metrics([vertices])[0]
+		self.area_acres = area
+		self.perimeter_meters = perimeter
+		self.centroid_lat = lat
+		self.centroid_lng = lng
 
-		# Calculate perimeter using Haversine distance
-		self.perimeter_meters = self.calculate_perimeter_meters(vertices)
-
-		# Calculate centroid using unit vector averaging
-		centroid = self.calculate_centroid(vertices)
-		self.centroid_lat = centroid[0]
-		self.centroid_lng = centroid[1]
+	def get_vertices(self):
+		return [(float(v.latitude), float(v.longitude)) for v in self.polygon]
 
 	def calculate_area_acres(self, vertices):
-		"""
-		Calculate area of spherical polygon using spherical excess formula.
-		Returns area in acres.
-		"""
-		if len(vertices) < 3:
-			return 0.0
-
-		# Earth's radius in meters
-		R = 6371000
-
-		# Convert to radians
-		vertices_rad = [(math.radians(lat), math.radians(lon)) for lat, lon in vertices]
-
-		# Calculate area using spherical excess
-		area_sq_meters = 0.0
-		n = len(vertices_rad)
-
-		for i in range(n):
-			lat1, lon1 = vertices_rad[i]
-			lat2, lon2 = vertices_rad[(i + 1) % n]
-
-			# Spherical excess formula component
-			area_sq_meters += (lon2 - lon1) * (2 + math.sin(lat1) + math.sin(lat2))
-
-		area_sq_meters = abs(area_sq_meters * R * R / 2.0)
-
-		# Convert square meters to acres (1 acre = 4046.86 sq meters)
-		acres = area_sq_meters / 4046.86
-
-		return round(acres, 2)
+		"""Area of the spherical polygon in acres (see `geo.geodesy`)"""
+		return geodesy.area_acres(vertices)
 
 	def calculate_perimeter_meters(self, vertices):
-		"""
-		Calculate perimeter using Haversine distance formula.
-		Returns perimeter in meters.
-		"""
-		if len(vertices) < 2:
-			return 0.0
-
-		perimeter = 0.0
-		n = len(vertices)
-
-		for i in range(n):
-			lat1, lon1 = vertices[i]
-			lat2, lon2 = vertices[(i + 1) % n]
-
-			# Haversine distance
-			distance = self.haversine_distance(lat1, lon1, lat2, lon2)
-			perimeter += distance
-
-		return round(perimeter, 2)
+		"""Perimeter in meters using the Haversine distance"""
+		return geodesy.perimeter_meters(vertices)
 
 	def haversine_distance(self, lat1, lon1, lat2, lon2):
-		"""
-		Calculate distance between two GPS points using Haversine formula.
-		Returns distance in meters.
-		"""
-		R = 6371000  # Earth's radius in meters
-
-		lat1_rad = math.radians(lat1)
-		lat2_rad = math.radians(lat2)
-		dlat = math.radians(lat2 - lat1)
-		dlon = math.radians(lon2 - lon1)
-
-		a = math.sin(dlat / 2) ** 2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon / 2) ** 2
-		c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-
-		distance = R * c
-		return distance
+		"""Distance in meters between two GPS points"""
+		return geodesy.haversine(lat1, lon1, lat2, lon2)
 
 	def calculate_centroid(self, vertices):
-		"""
-		Calculate centroid of polygon using unit vector averaging.
-		Returns (latitude, longitude) tuple.
-		"""
-		if not vertices:
-			return (0.0, 0.0)
-
-		# Convert to Cartesian coordinates
-		x = y = z = 0.0
-
-		for lat, lon in vertices:
-			lat_rad = math.radians(lat)
-			lon_rad = math.radians(lon)
-
-			x += math.cos(lat_rad) * math.cos(lon_rad)
-			y += math.cos(lat_rad) * math.sin(lon_rad)
-			z += math.sin(lat_rad)
-
-		n = len(vertices)
-		x /= n
-		y /= n
-		z /= n
-
-		# Convert back to latitude/longitude
-		lon_centroid = math.atan2(y, x)
-		hyp = math.sqrt(x * x + y * y)
-		lat_centroid = math.atan2(z, hyp)
-
-		return (round(math.degrees(lat_centroid), 6), round(math.degrees(lon_centroid), 6))
+		"""Centroid (latitude, longitude) by unit vector averaging"""
+		return geodesy.centroid(vertices)
 
 	def generate_geojson(self):
 		"""Generate GeoJSON representation of the polygon"""
 		if not self.polygon:
 			return
 
-		coordinates = [[float(v.longitude), float(v.latitude)] for v in self.polygon]
-		# Close the polygon by adding the first point at the end
-		coordinates.append(coordinates[0])
-
-		geojson = {
-			"type": "Feature",
-			"geometry": {
-				"type": "Polygon",
-				"coordinates": [coordinates]
-			},
-			"properties": {
-				"plot_id": self.plot_id,
-				"plot_name": self.plot_name or "",
-				"area_acres": self.area_acres or 0,
-				"perimeter_meters": self.perimeter_meters or 0
-			}
-		}
-
-		self.geojson = json.dumps(geojson, indent=2)
+		self.geojson = plot_geojson(
+			self.plot_id, self.plot_name, self.area_acres, self.perimeter_meters, self.get_vertices()
+		)
+
+
+def process_map_image(plot):
+	"""
+	Move a plot's base64 map image into a content-addressed file.
+
+	Sets `map_image` and `map_image_hash` and clears `map_image_base64`, unless
+	the plot received a newer image in the meantime. Every save of a new image
+	queues its own job (they are not deduplicated, as a job already running
+	would swallow the newer image), so that one is processed by the next job.
+	"""
+	row = frappe.db.get_value(
+		"Farm Plot", plot, ["map_image_base64", "map_image", "map_image_hash"], as_dict=True
+	)
+	if not row or not (row.map_image_base64 or "").strip():
+		return
+
+	try:
+		content, extension = decode_data_url(row.map_image_base64)
+	except ValueError:
+		frappe.log_error(f"Invalid base64 map image for Farm Plot {plot}")
+		return
+
+	digest = content_hash(content)
+	if digest == row.map_image_hash and row.map_image:
+		file_url = row.map_image
+	else:
+		try:
+			file_url, digest = store_content(content, extension, "Farm Plot", plot, digest=digest)
+		except Exception:
+			frappe.log_error(f"Failed to save map image file for Farm Plot {plot}")
+			return
+
+	# like update_modified=False; devices pick the new file up from the journal
+	frappe.db.sql(
+		"""update `tabFarm Plot`
+		set `map_image` = %(file_url)s, `map_image_hash` = %(digest)s, `map_image_base64` = null
+		where `name` = %(plot)s and `map_image_base64` = %(base64)s""",
+		{"file_url": file_url, "digest": digest, "plot": plot, "base64": row.map_image_base64},
+	)
+	journal.append("Farm Plot", plot)
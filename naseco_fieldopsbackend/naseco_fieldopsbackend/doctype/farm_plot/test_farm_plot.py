@@ -1,9 +1,208 @@
 # Copyright (c) 2026, Naseco and Contributors
 # See license.txt
 
-# import frappe
+import json
+import unittest
+
+import frappe
 from frappe.tests.utils import FrappeTestCase
 
+from naseco_fieldopsbackend import api
+from naseco_fieldopsbackend.geo import geodesy, maps, mvt, overlaps
+
+# 0.001 degree square at the equator, about 111 m a side
+SQUARE = [(0.0, 0.0), (0.0, 0.001), (0.001, 0.001), (0.001, 0.0)]
+# L-shaped plot of three such squares, its notch in the north-east
+L_SHAPE = [(0.0, 0.0), (0.0, 0.002), (0.001, 0.002), (0.001, 0.001), (0.002, 0.001), (0.002, 0.0)]
+NOTCH = [(0.001, 0.001), (0.001, 0.002), (0.002, 0.002), (0.002, 0.001)]
+
 
 class TestFarmPlot(FrappeTestCase):
-	pass
+	def test_mobile_mapper_round_trip(self):
+		mapper = api._get_mapper("Farm Plot")
+		doc = {
+			"doctype": "Farm Plot",
+			"name": "PLOT-0001",
+			"owner": "officer@example.com",
+			"modified": "2026-02-01 10:00:00",
+			"plot_id": "P-1",
+			"outgrower": "OG-1",
+			"area_acres": 1.5,
+			"map_image_base64": "aGVsbG8=",
+			"polygon": [
+				{"latitude": 0.1, "longitude": 32.1, "order_index": 1},
+				{"latitude": 0.2, "longitude": 32.2, "order_index": 2},
+			],
+			"photos": [{"file": "/files/a.jpg"}, {"url": "/files/b.jpg"}],
+		}
+
+		record = mapper.to_mobile(doc)
+		self.assertEqual(record["plotId"], "P-1")
+		self.assertEqual(record["outgrowerId"], "OG-1")
+		self.assertEqual(record["areaAcres"], 1.5)
+		self.assertEqual(record["updatedAt"], "2026-02-01 10:00:00")
+		self.assertEqual(record["polygon"][1], {"lat": 0.2, "lng": 32.2, "orderIndex": 2})
+		self.assertEqual(record["photos"], ["/files/a.jpg", "/files/b.jpg"])
+		for field in ("doctype", "owner", "map_image_base64", "mapImageBase64", "plot_id"):
+			self.assertNotIn(field, record)
+
+		payload = mapper.to_doc(dict(record, name="ignored", synced=True))
+		self.assertEqual(payload["plot_id"], "P-1")
+		self.assertEqual(payload["outgrower"], "OG-1")
+		self.assertEqual(payload["polygon"], doc["polygon"])
+		self.assertEqual(payload["photos"], [{"file": "/files/a.jpg"}, {"file": "/files/b.jpg"}])
+		self.assertNotIn("name", payload)
+		self.assertNotIn("synced", payload)
+
+	def test_mobile_mapper_numbers_vertices_without_order_index(self):
+		payload = api._get_mapper("Farm Plot").to_doc(
+			{"polygon": [{"lat": 0.1, "lng": 32.1}, {"lat": 0.2, "lng": 32.2}]}
+		)
+		self.assertEqual([v["order_index"] for v in payload["polygon"]], [1, 2])
+
+	def test_haversine(self):
+		self.assertAlmostEqual(geodesy.haversine(0, 0, 0, 1), 111194.93, places=2)
+		self.assertEqual(geodesy.haversine(0.3, 32.5, 0.3, 32.5), 0)
+
+	def test_polygon_metrics(self):
+		square, empty, line = geodesy.polygon_metrics([SQUARE, [], [(0, 0), (0, 1)]])
+		self.assertEqual(square, (3.06, 444.78, 0.0005, 0.0005))
+		self.assertEqual(empty, (0.0, 0.0, 0.0, 0.0))
+		# two vertices have a length but no area
+		self.assertEqual(line[0], 0.0)
+		self.assertAlmostEqual(line[1], 2 * 111194.93, places=1)
+
+	def test_polygon_metrics_ignore_orientation(self):
+		self.assertEqual(geodesy.polygon_metrics([SQUARE[::-1]]), geodesy.polygon_metrics([SQUARE]))
+
+	@unittest.skipIf(geodesy.np is None, "NumPy is not installed")
+	def test_polygon_metrics_numpy_matches_python(self):
+		polygons = [SQUARE, [(0.31, 32.58), (0.312, 32.581), (0.311, 32.584), (0.309, 32.582)], [(1, 1)]]
+		self.assertEqual(
+			geodesy.polygon_metrics(polygons), [geodesy._metrics_python(polygon) for polygon in polygons]
+		)
+
+	def assertOverlap(self, a, b, shared, area_a, area_b):
+		result = overlaps.intersection_area(a, b)
+		for value, expected in zip(result, (shared, area_a, area_b), strict=True):
+			self.assertAlmostEqual(value, expected, delta=0.5)
+
+	def test_intersection_area_convex(self):
+		square_m2 = 12364.31
+		east_half = [(lat, lng + 0.0005) for lat, lng in SQUARE]
+		self.assertOverlap(SQUARE, SQUARE, square_m2, square_m2, square_m2)
+		self.assertOverlap(SQUARE, east_half, square_m2 / 2, square_m2, square_m2)
+		far = [(lat + 0.01, lng) for lat, lng in SQUARE]
+		self.assertOverlap(SQUARE, far, 0, square_m2, square_m2)
+
+	def test_intersection_area_concave(self):
+		square_m2 = 12364.31
+		# the notch lies inside the L's bounding box but outside the L
+		self.assertOverlap(L_SHAPE, NOTCH, 0, 3 * square_m2, square_m2)
+		self.assertOverlap(L_SHAPE, SQUARE, square_m2, 3 * square_m2, square_m2)
+		self.assertOverlap(SQUARE, L_SHAPE, square_m2, square_m2, 3 * square_m2)
+
+	def test_intersection_area_ignores_orientation(self):
+		expected = overlaps.intersection_area(L_SHAPE, SQUARE)
+		for a, b in ((L_SHAPE[::-1], SQUARE[::-1]), (L_SHAPE[::-1], SQUARE), (L_SHAPE, SQUARE[::-1])):
+			for value, reference in zip(overlaps.intersection_area(a, b), expected, strict=True):
+				self.assertAlmostEqual(value, reference, delta=0.01)
+
+	def test_intersection_area_shared_edge(self):
+		east = [(lat, lng + 0.001) for lat, lng in SQUARE]
+		self.assertAlmostEqual(overlaps.intersection_area(SQUARE, east)[0], 0, delta=0.01)
+		self.assertAlmostEqual(overlaps.intersection_area(L_SHAPE[::-1], NOTCH[::-1])[0], 0, delta=0.01)
+		self.assertIsNone(overlaps.measure_overlap(SQUARE, east, min_area=25))
+
+	def test_intersection_area_near_duplicate_vertices(self):
+		# near-duplicate GPS points used to make the clipper divide by zero
+		a = [(0.311, 32.581500001), (0.311000001, 32.5815), (0.3115, 32.5805), (0.31, 32.5805)]
+		b = [(0.3115, 32.5805), (0.311, 32.581), (0.312, 32.58), (0.310500001, 32.58), (0.311, 32.5815)]
+		shared = overlaps.intersection_area(a, b)[0]
+		for x, y in ((a[::-1], b[::-1]), (b, a), (b[::-1], a[::-1])):
+			self.assertAlmostEqual(overlaps.intersection_area(x, y)[0], shared, delta=0.01)
+
+	def test_measure_overlap_types(self):
+		east_half = [(lat, lng + 0.0005) for lat, lng in SQUARE]
+		self.assertEqual(
+			overlaps.measure_overlap(SQUARE, east_half, min_area=25),
+			{"overlap_type": "Overlap", "overlap_acres": 1.5276, "overlap_ratio": 50.0},
+		)
+		self.assertEqual(overlaps.measure_overlap(L_SHAPE, SQUARE, min_area=25)["overlap_type"], "Duplicate")
+
+	def test_simplify_ring_drops_collinear_points(self):
+		ring = [(0, 0), (5, 0), (10, 0), (10, 10), (0, 10)]
+		self.assertEqual(maps.simplify_ring(ring, 1), [(0, 0), (10, 0), (10, 10), (0, 10)])
+		# bends larger than the tolerance are kept
+		self.assertEqual(maps.simplify_ring(ring, 0.0001), [(0, 0), (10, 0), (10, 10), (0, 10)])
+		notched = [(0, 0), (5, 2), (10, 0), (10, 10), (0, 10)]
+		self.assertEqual(maps.simplify_ring(notched, 1), notched)
+
+	def test_simplify_ring_edge_cases(self):
+		ring = [(0, 0), (5, 0), (10, 0), (10, 10), (0, 10)]
+		simplified = maps.simplify_ring(ring, 0)
+		self.assertEqual(simplified, ring)
+		self.assertIsNot(simplified, ring)
+		self.assertEqual(maps.simplify_ring([(0, 0), (1, 0), (0, 1)], 10), [(0, 0), (1, 0), (0, 1)])
+		# a sliver thinner than the tolerance collapses
+		self.assertEqual(maps.simplify_ring([(0, 0), (10, 0.1), (20, 0), (10, -0.1)], 1), [])
+
+	def test_feature_json(self):
+		plot = frappe._dict(
+			name="PLOT-0001", plot_id="P-1", plot_name=None, outgrower="OG-1", area_acres=3.06
+		)
+		feature = json.loads(maps.feature_json(plot, SQUARE))
+		self.assertEqual(feature["id"], "PLOT-0001")
+		self.assertEqual(
+			feature["properties"],
+			{"plot_id": "P-1", "plot_name": "", "outgrower": "OG-1", "area_acres": 3.06},
+		)
+		ring = feature["geometry"]["coordinates"][0]
+		self.assertEqual(ring[0], ring[-1])
+		# GeoJSON is (lng, lat)
+		self.assertEqual([tuple(point) for point in ring[:-1]], [(lng, lat) for lat, lng in SQUARE])
+
+	def test_feature_json_keeps_sub_pixel_plots(self):
+		plot = frappe._dict(name="PLOT-0001")
+		feature = json.loads(maps.feature_json(plot, SQUARE, zoom=5))
+		ring = feature["geometry"]["coordinates"][0]
+		self.assertEqual(len(ring), 5)
+		self.assertEqual(ring[0], ring[-1])
+		self.assertGreater(ring[2][0] - ring[0][0], 0)
+
+	def test_mvt_varint_and_zigzag(self):
+		self.assertEqual(mvt._varint(1), b"\x01")
+		self.assertEqual(mvt._varint(300), b"\xac\x02")
+		self.assertEqual([mvt._zigzag(value) for value in (0, -1, 1, -2, 2)], [0, 1, 2, 3, 4])
+
+	def test_mvt_ring_area(self):
+		ring = [(0, 0), (10, 0), (10, 10), (0, 10)]
+		self.assertEqual(mvt.ring_area(ring), 100)
+		self.assertEqual(mvt.ring_area(ring[::-1]), -100)
+
+	def test_mvt_geometry_orients_rings(self):
+		exterior = [(0, 0), (10, 0), (10, 10), (0, 10)]
+		hole = [(2, 2), (2, 8), (8, 8), (8, 2)]
+		self.assertEqual(mvt._geometry([exterior[::-1], hole[::-1]]), mvt._geometry([exterior, hole]))
+		# MoveTo(1), x, y, LineTo(3), 3 pairs, ClosePath(1)
+		self.assertEqual(mvt._geometry([exterior]), [9, 0, 0, 26, 20, 0, 0, 20, 19, 0, 15])
+
+	def test_mvt_encode_layer(self):
+		self.assertEqual(mvt.encode_layer("plots", []), b"")
+		# rings without area are dropped
+		self.assertEqual(mvt.encode_layer("plots", [([[(0, 0), (5, 0), (10, 0)]], {})]), b"")
+
+		tile = mvt.encode_layer("plots", [([[(0, 0), (10, 0), (10, 10), (0, 10)]], {"plot_id": "P-1"})])
+		# Tile.layers is field 3, length delimited
+		self.assertEqual(tile[:1], b"\x1a")
+		self.assertEqual(tile[1:2], mvt._varint(len(tile) - 2))
+		self.assertIn(b"plots", tile)
+		self.assertIn(b"plot_id", tile)
+
+	def test_mvt_project_tile_corners(self):
+		z, x, y = 15, 19431, 16352
+		south, west, north, east = mvt.tile_bounds(z, x, y)
+		self.assertLess(south, north)
+		self.assertLess(west, east)
+		self.assertEqual(mvt.project(north, west, z, x, y), (0, 0))
+		self.assertEqual(mvt.project(south, east, z, x, y), (mvt.DEFAULT_EXTENT, mvt.DEFAULT_EXTENT))
@@ -3,25 +3,24 @@
 
 import frappe
 from frappe.model.document import Document
-import math
+
+from naseco_fieldopsbackend.geo.geodesy import haversine
+from naseco_fieldopsbackend.geo.plot_cache import distance_to_plot, get_plot_geometry
 
 
 class FieldVisit(Document):
 	def validate(self):
-		"""Validate GPS distance from plot centroid"""
+		"""Validate GPS distance from the plot"""
 		if self.plot and self.gps_lat and self.gps_lng:
 			self.calculate_distance_from_plot()
 			self.validate_gps_proximity()
 
 	def calculate_distance_from_plot(self):
-		"""Calculate distance from visit GPS to plot centroid"""
-		plot = frappe.get_doc("Farm Plot", self.plot)
+		"""Calculate distance from visit GPS to the plot boundary (0 inside the plot)"""
+		geometry = get_plot_geometry(self.plot)
+		distance = distance_to_plot(geometry, self.gps_lat, self.gps_lng) if geometry else None
 
-		if plot.centroid_lat and plot.centroid_lng:
-			distance = self.haversine_distance(
-				self.gps_lat, self.gps_lng,
-				plot.centroid_lat, plot.centroid_lng
-			)
+		if distance is not None:
 			# Convert meters to kilometers
 			self.distance_from_plot = round(distance / 1000, 2)
 
@@ -29,26 +28,12 @@ class FieldVisit(Document):
 		"""Warn if visit is too far from plot"""
 		if self.distance_from_plot and self.distance_from_plot > 5:
 			frappe.msgprint(
-				f"Warning: Visit location is {self.distance_from_plot} km from plot centroid. "
+				f"Warning: Visit location is {self.distance_from_plot} km from the plot boundary. "
 				"Please verify the GPS coordinates.",
 				indicator="orange",
 				title="GPS Distance Warning"
 			)
 
 	def haversine_distance(self, lat1, lon1, lat2, lon2):
-		"""
-		Calculate distance between two GPS points using Haversine formula.
-		Returns distance in meters.
-		"""
-		R = 6371000  # Earth's radius in meters
-
-		lat1_rad = math.radians(lat1)
-		lat2_rad = math.radians(lat2)
-		dlat = math.radians(lat2 - lat1)
-		dlon = math.radians(lon2 - lon1)
-
-		a = math.sin(dlat / 2) ** 2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon / 2) ** 2
-		c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-
-		distance = R * c
-		return distance
+		"""Distance in meters between two GPS points"""
+		return haversine(lat1, lon1, lat2, lon2)
@@ -4,6 +4,51 @@
 # import frappe
 from frappe.tests.utils import FrappeTestCase
 
+from naseco_fieldopsbackend import api
+from naseco_fieldopsbackend.geo.geodesy import distance_to_polygon, haversine, point_in_polygon
+
+# 0.001 degree square at the equator, about 111 m a side
+SQUARE = [(0.0, 0.0), (0.0, 0.001), (0.001, 0.001), (0.001, 0.0)]
+# L-shaped plot, its notch in the north-east
+L_SHAPE = [(0.0, 0.0), (0.0, 0.002), (0.001, 0.002), (0.001, 0.001), (0.002, 0.001), (0.002, 0.0)]
+
 
 class TestFieldVisit(FrappeTestCase):
-	pass
+	def test_mobile_mapper_fills_visit_status_and_photos(self):
+		payload = api._get_mapper("Field Visit").to_doc(
+			{"visitId": "V-1", "plotId": "PLOT-0001", "status": "completed", "photos": ["/files/a.jpg"]}
+		)
+		self.assertEqual(payload["visit_id"], "V-1")
+		self.assertEqual(payload["plot"], "PLOT-0001")
+		self.assertEqual(payload["visit_status"], "Submitted")
+		self.assertEqual(payload["photos"], [{"photo": "/files/a.jpg"}])
+
+		draft = api._get_mapper("Field Visit").to_doc({"status": "pending", "visit_status": None})
+		self.assertEqual(draft["visit_status"], "Draft")
+
+	def test_mobile_mapper_keeps_explicit_visit_status(self):
+		payload = api._get_mapper("Field Visit").to_doc({"status": "completed", "visit_status": "Draft"})
+		self.assertEqual(payload["visit_status"], "Draft")
+
+	def test_point_in_polygon(self):
+		self.assertTrue(point_in_polygon(0.0005, 0.0005, SQUARE))
+		self.assertFalse(point_in_polygon(0.0015, 0.0005, SQUARE))
+		self.assertTrue(point_in_polygon(0.0015, 0.0005, L_SHAPE))
+		self.assertFalse(point_in_polygon(0.0015, 0.0015, L_SHAPE))
+
+	def test_distance_to_polygon(self):
+		# inside the plot
+		self.assertEqual(distance_to_polygon(0.0005, 0.0005, SQUARE), 0)
+		self.assertEqual(distance_to_polygon(0.0005, 0.0005, SQUARE[::-1]), 0)
+		# to the nearest edge, not the centroid
+		self.assertAlmostEqual(distance_to_polygon(0.0005, 0.002, SQUARE), 111.19, places=1)
+		# to the nearest corner
+		self.assertAlmostEqual(
+			distance_to_polygon(0.002, 0.002, SQUARE), haversine(0.001, 0.001, 0.002, 0.002), places=1
+		)
+		# in the notch of a concave plot, off its boundary
+		self.assertAlmostEqual(distance_to_polygon(0.0015, 0.0015, L_SHAPE), 55.6, places=1)
+
+	def test_distance_to_polygon_without_polygon(self):
+		self.assertIsNone(distance_to_polygon(0.0, 0.0, []))
+		self.assertAlmostEqual(distance_to_polygon(0.0, 0.001, [(0.0, 0.0)]), 111.19, places=1)
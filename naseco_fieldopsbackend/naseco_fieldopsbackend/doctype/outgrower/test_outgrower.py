@@ -1,10 +1,84 @@
 # Copyright (c) 2026, Naseco and Contributors
 # See license.txt
 
+import base64
+import json
+from unittest.mock import patch
+
 import frappe
 from frappe.tests.utils import FrappeTestCase
 
 from naseco_fieldopsbackend import api
+from naseco_fieldopsbackend.sync import cursor
+
+OFFICER = "sync-scope-officer@example.com"
+
+
+def make_officer():
+	if not frappe.db.exists("User", OFFICER):
+		frappe.get_doc(
+			{"doctype": "User", "email": OFFICER, "first_name": "Scope Officer", "send_welcome_email": 0}
+		).insert(ignore_permissions=True)
+	return OFFICER
+
+
+def make_portfolio(name, assigned_to=None):
+	"""An outgrower with one plot and one visit on it, all named after the outgrower."""
+	frappe.get_doc(
+		{
+			"doctype": "Outgrower",
+			"outgrower_id": name,
+			"full_name": "Scope Test Farmer",
+			"registration_date": "2026-02-01",
+			"assigned_to": assigned_to,
+		}
+	).insert(ignore_permissions=True)
+	frappe.get_doc({"doctype": "Farm Plot", "plot_id": f"{name}-P", "outgrower": name}).insert(
+		ignore_permissions=True
+	)
+	frappe.get_doc(
+		{
+			"doctype": "Field Visit",
+			"visit_id": f"{name}-V",
+			"plot": f"{name}-P",
+			"timestamp": "2026-02-01 10:00:00",
+		}
+	).insert(ignore_permissions=True)
+
+
+def delete_portfolio(name):
+	for doctype, docname in (("Field Visit", f"{name}-V"), ("Farm Plot", f"{name}-P"), ("Outgrower", name)):
+		if frappe.db.exists(doctype, docname):
+			frappe.delete_doc(doctype, docname, force=1, ignore_permissions=True)
+
+
+def outgrower_record(name, **payload):
+	return {
+		"storeName": "outgrowers",
+		"recordId": name,
+		"operation": "SYNC",
+		"payload": {
+			"outgrowerId": name,
+			"fullName": "Push Test Farmer",
+			"registrationDate": "2026-02-01",
+			**payload,
+		},
+	}
+
+
+def delete_outgrowers(*names):
+	for name in names:
+		if frappe.db.exists("Outgrower", name):
+			frappe.delete_doc("Outgrower", name, force=1, ignore_permissions=True)
+	frappe.db.commit()
+
+
+def pull_as(user):
+	frappe.set_user(user)
+	try:
+		return api.get_sync_data(last_sync="2000-01-01T00:00:00Z")["data"]
+	finally:
+		frappe.set_user("Administrator")
 
 
 class TestOutgrower(FrappeTestCase):
@@ -76,3 +150,198 @@ class TestOutgrower(FrappeTestCase):
 		finally:
 			if frappe.db.exists("Outgrower", outgrower_name):
 				frappe.delete_doc("Outgrower", outgrower_name, force=1, ignore_permissions=True)
+
+	def test_continuation_token_round_trip(self):
+		state = {"store": "outgrowers", "after": ["2026-02-01 10:00:00.000001", "OG-0001"], "seq": 42}
+		token = cursor.encode_token(state)
+
+		self.assertNotIn("=", token)
+		self.assertRegex(token, r"^[A-Za-z0-9_-]+$")
+		self.assertEqual(cursor.decode_token(token), dict(state, v=cursor.TOKEN_VERSION))
+
+	def test_continuation_token_rejects_garbage_and_other_versions(self):
+		with self.assertRaises(frappe.ValidationError):
+			cursor.decode_token("not a token!")
+
+		raw = json.dumps({"store": "outgrowers", "v": cursor.TOKEN_VERSION + 1}).encode()
+		with self.assertRaises(frappe.ValidationError):
+			cursor.decode_token(base64.urlsafe_b64encode(raw).decode().rstrip("="))
+
+	def test_keyset_filters(self):
+		self.assertEqual(cursor.keyset_filters(None), ([], []))
+		filters, or_filters = cursor.keyset_filters(["2026-02-01 10:00:00", "OG-0001"])
+		self.assertEqual(filters, [["modified", ">=", "2026-02-01 10:00:00"]])
+		self.assertEqual(or_filters, [["modified", ">", "2026-02-01 10:00:00"], ["name", ">", "OG-0001"]])
+
+	def test_page_budget_is_clamped(self):
+		self.assertEqual(cursor.get_page_budget(), (cursor.DEFAULT_PAGE_SIZE, cursor.DEFAULT_PAGE_BYTES))
+		self.assertEqual(cursor.get_page_budget(10**9, 1), (cursor.MAX_PAGE_SIZE, 1024))
+		self.assertEqual(cursor.get_page_budget(-5, "2048")[1], 2048)
+
+	def test_sync_data_is_scoped_to_assigned_outgrowers(self):
+		officer = make_officer()
+		suffix = frappe.generate_hash(length=8)
+		mine, other = f"OG-MINE-{suffix}", f"OG-OTHER-{suffix}"
+		try:
+			make_portfolio(mine, assigned_to=officer)
+			make_portfolio(other)
+			# the cached roots are dropped after commit
+			frappe.db.commit()
+
+			data = pull_as(officer)
+			self.assertEqual([d.get("outgrowerId") for d in data["outgrowers"]], [mine])
+			self.assertEqual([d.get("plotId") for d in data["plots"]], [f"{mine}-P"])
+			self.assertEqual([d.get("visitId") for d in data["visits"]], [f"{mine}-V"])
+
+			# reassigning refreshes the cached roots of the officer
+			doc = frappe.get_doc("Outgrower", other)
+			doc.assigned_to = officer
+			doc.save(ignore_permissions=True)
+			frappe.db.commit()
+
+			data = pull_as(officer)
+			self.assertEqual(sorted(d.get("outgrowerId") for d in data["outgrowers"]), [mine, other])
+			self.assertEqual(sorted(d.get("visitId") for d in data["visits"]), [f"{mine}-V", f"{other}-V"])
+		finally:
+			delete_portfolio(mine)
+			delete_portfolio(other)
+			frappe.db.commit()
+
+	def test_push_returns_a_result_per_record(self):
+		ok, bad = (f"OG-PUSH-{frappe.generate_hash(length=8)}" for _ in range(2))
+		try:
+			result = api.push_sync_data(
+				{"data": [outgrower_record(ok), outgrower_record(bad, fullName=""), "not a record"]}
+			)
+			self.assertTrue(result.get("success"))
+			self.assertEqual([r["status"] for r in result["results"]], ["success", "error", "error"])
+			self.assertEqual(result["results"][0]["name"], ok)
+			self.assertEqual(
+				(result["results"][1]["doctype"], result["results"][1]["name"]), ("Outgrower", bad)
+			)
+		finally:
+			delete_outgrowers(ok, bad)
+
+	def test_bulk_sync_returns_legacy_results(self):
+		name = f"OG-PUSH-{frappe.generate_hash(length=8)}"
+		doc = {
+			"doctype": "Outgrower",
+			"name": name,
+			"outgrower_id": name,
+			"full_name": "Push Test Farmer",
+			"registration_date": "2026-02-01",
+		}
+		try:
+			result = api.bulk_sync(
+				[
+					{"doctype": "Outgrower", "operation": "CREATE", "doc": doc},
+					{"doctype": "Outgrower", "operation": "DELETE", "doc": {"name": f"{name}-missing"}},
+					{"doctype": "Outgrower", "operation": "ARCHIVE", "doc": {"name": name}},
+				]
+			)
+			self.assertTrue(result.get("success"))
+			self.assertEqual(
+				[(r["status"], r["operation"]) for r in result["results"]],
+				[("success", "CREATE"), ("not_found", "DELETE"), ("error", "ARCHIVE")],
+			)
+			self.assertTrue(frappe.db.exists("Outgrower", name))
+		finally:
+			delete_outgrowers(name)
+
+	def test_failing_record_rolls_back_alone(self):
+		first, bad, last = (f"OG-PUSH-{frappe.generate_hash(length=8)}" for _ in range(3))
+		records = [outgrower_record(first), outgrower_record(bad, fullName=""), outgrower_record(last)]
+		try:
+			with patch.dict(frappe.conf, {"sync_push_commit_every": 2}):
+				result = api.push_sync_data({"data": records})
+			self.assertEqual([r["status"] for r in result["results"]], ["success", "error", "success"])
+
+			# the records around the failing one were committed
+			frappe.db.rollback()
+			self.assertTrue(frappe.db.exists("Outgrower", first))
+			self.assertFalse(frappe.db.exists("Outgrower", bad))
+			self.assertTrue(frappe.db.exists("Outgrower", last))
+		finally:
+			delete_outgrowers(first, bad, last)
+
+	def test_push_detects_conflicts(self):
+		name = f"OG-PUSH-{frappe.generate_hash(length=8)}"
+		try:
+			api.push_sync_data({"data": [outgrower_record(name)]})
+
+			# the device edited a copy older than the server's
+			stale = outgrower_record(name, fullName="Stale Name", updatedAt="2000-01-01 00:00:00")
+			result = api.push_sync_data({"data": [stale]})
+			self.assertEqual(result["results"][0]["status"], "conflict")
+			self.assertEqual(frappe.db.get_value("Outgrower", name, "full_name"), "Push Test Farmer")
+			self.assertTrue(
+				frappe.db.exists("Sync Conflict", {"doctype_name": "Outgrower", "doc_name": name})
+			)
+
+			stale["force"] = 1
+			result = api.push_sync_data({"data": [stale]})
+			self.assertEqual(result["results"][0]["status"], "success")
+			self.assertEqual(frappe.db.get_value("Outgrower", name, "full_name"), "Stale Name")
+		finally:
+			frappe.db.delete("Sync Conflict", {"doctype_name": "Outgrower", "doc_name": name})
+			delete_outgrowers(name)
+
+	def test_replayed_batch_returns_stored_result(self):
+		name = f"OG-PUSH-{frappe.generate_hash(length=8)}"
+		payload = {"batchId": frappe.generate_hash(), "data": [outgrower_record(name)]}
+		try:
+			first = api.push_sync_data(payload)
+			self.assertEqual(first["results"][0]["status"], "success")
+			delete_outgrowers(name)
+
+			# the retry is answered from the replay cache, nothing is applied again
+			replay = api.push_sync_data(payload)
+			self.assertTrue(replay.get("replayed"))
+			self.assertEqual(replay["results"], first["results"])
+			self.assertFalse(frappe.db.exists("Outgrower", name))
+		finally:
+			delete_outgrowers(name)
+
+	def test_replayed_record_returns_stored_result(self):
+		name = f"OG-PUSH-{frappe.generate_hash(length=8)}"
+		record = dict(outgrower_record(name), idempotencyKey=frappe.generate_hash())
+		try:
+			first = api.push_sync_data({"data": [record]})
+			delete_outgrowers(name)
+
+			# the same record inside another batch
+			replay = api.push_sync_data({"batchId": frappe.generate_hash(), "data": [record]})
+			self.assertEqual(replay["results"][0], dict(first["results"][0], replayed=True))
+			self.assertFalse(frappe.db.exists("Outgrower", name))
+		finally:
+			delete_outgrowers(name)
+
+	def test_push_applies_a_backlog_parents_first(self):
+		name = f"OG-PUSH-{frappe.generate_hash(length=8)}"
+		records = [
+			{
+				"storeName": "visits",
+				"recordId": f"{name}-V",
+				"payload": {
+					"visitId": f"{name}-V",
+					"plotId": f"{name}-P",
+					"timestamp": "2026-02-01 10:00:00",
+				},
+			},
+			{
+				"storeName": "plots",
+				"recordId": f"{name}-P",
+				"payload": {"plotId": f"{name}-P", "outgrowerId": name},
+			},
+			outgrower_record(name),
+		]
+		try:
+			result = api.push_sync_data({"data": records})
+			# results keep the request order
+			self.assertEqual(
+				[(r["doctype"], r["status"]) for r in result["results"]],
+				[("Field Visit", "success"), ("Farm Plot", "success"), ("Outgrower", "success")],
+			)
+		finally:
+			delete_portfolio(name)
+			frappe.db.commit()
@@ -1,8 +1,94 @@
-# Copyright (c) 2026, NASECO and Contributors
+# Copyright (c) 2026, Naseco and Contributors
 # See license.txt
 
+from unittest.mock import patch
+
 import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from naseco_fieldopsbackend.sync import push
+
+
+def make_crop_cycle(name):
+	"""A crop cycle on a new plot of a new outgrower, all named after `name`."""
+	if not frappe.db.exists("Crop", "Ingest Test Crop"):
+		frappe.get_doc({"doctype": "Crop", "crop_name": "Ingest Test Crop"}).insert(ignore_permissions=True)
+	frappe.get_doc(
+		{
+			"doctype": "Outgrower",
+			"outgrower_id": name,
+			"full_name": "Ingest Test Farmer",
+			"registration_date": "2026-02-01",
+		}
+	).insert(ignore_permissions=True)
+	frappe.get_doc({"doctype": "Farm Plot", "plot_id": f"{name}-P", "outgrower": name}).insert(
+		ignore_permissions=True
+	)
+	return (
+		frappe.get_doc(
+			{
+				"doctype": "Crop Cycle",
+				"crop_cycle_id": f"{name}-C",
+				"plot": f"{name}-P",
+				"crop": "Ingest Test Crop",
+				"start_date": "2026-02-01",
+			}
+		)
+		.insert(ignore_permissions=True)
+		.name
+	)
+
+
+def activity_record(activity_id, crop_cycle, **payload):
+	return {
+		"storeName": "stage_activities",
+		"recordId": activity_id,
+		"payload": {"activityId": activity_id, "cropCycleId": crop_cycle, "title": "Weeding", **payload},
+	}
+
+
+class TestStageActivity(FrappeTestCase):
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def test_new_activities_take_the_bulk_path(self):
+		name = f"OG-INGEST-{frappe.generate_hash(length=8)}"
+		crop_cycle = make_crop_cycle(name)
+		records = [
+			activity_record(f"{name}-A1", crop_cycle),
+			activity_record(f"{name}-A2", crop_cycle, title=""),
+			activity_record(f"{name}-A3", f"{name}-missing"),
+			activity_record(f"{name}-A4", crop_cycle),
+		]
+
+		# the per-record path is not taken for new append-only records
+		with (
+			patch.object(push.PushPipeline, "upsert", side_effect=AssertionError("per-record path")),
+			patch.object(push.frappe.db, "commit"),
+		):
+			results = push.run_push(records)
+
+		self.assertEqual(
+			[(r["name"], r["status"]) for r in results],
+			[
+				(f"{name}-A1", "success"),
+				(f"{name}-A2", "error"),
+				(f"{name}-A3", "error"),
+				(f"{name}-A4", "success"),
+			],
+		)
+		self.assertIn(f"{name}-missing", results[2]["error"])
+		self.assertEqual(
+			frappe.get_all("Stage Activity", {"crop_cycle": crop_cycle}, pluck="name", order_by="name asc"),
+			[f"{name}-A1", f"{name}-A4"],
+		)
 
+	def test_existing_activities_are_updated(self):
+		name = f"OG-INGEST-{frappe.generate_hash(length=8)}"
+		crop_cycle = make_crop_cycle(name)
+		with patch.object(push.frappe.db, "commit"):
+			push.run_push([activity_record(f"{name}-A1", crop_cycle)])
+			results = push.run_push([activity_record(f"{name}-A1", crop_cycle, title="Spraying")])
 
-def test_stage_activity():
-	pass
+		self.assertEqual(results[0]["status"], "success")
+		self.assertEqual(frappe.db.get_value("Stage Activity", f"{name}-A1", "title"), "Spraying")
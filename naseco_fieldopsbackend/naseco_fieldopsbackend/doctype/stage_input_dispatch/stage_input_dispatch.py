@@ -3,6 +3,11 @@
 
 import frappe
 from frappe.model.document import Document
+from frappe.utils import flt
+
+from naseco_fieldopsbackend.naseco_fieldopsbackend.doctype.stage_input_request.stage_input_request import (
+	add_dispatch_delta,
+)
 
 
 class StageInputDispatch(Document):
@@ -14,20 +19,17 @@ class StageInputDispatch(Document):
 			self.stage = request.stage
 			self.input_name = request.input_name
 
-	def after_insert(self):
-		"""Update parent request fulfillment status"""
-		self.update_request_status()
-
 	def on_update(self):
-		"""Update parent request fulfillment status"""
+		"""Update parent request fulfillment status (also runs on insert)"""
 		self.update_request_status()
 
 	def on_trash(self):
 		"""Update parent request when dispatch is deleted"""
-		self.update_request_status()
+		add_dispatch_delta(self.input_request, -flt(self.quantity_dispatched))
 
 	def update_request_status(self):
-		"""Trigger recalculation of parent request fulfillment status"""
-		if self.input_request:
-			request = frappe.get_doc("Stage Input Request", self.input_request)
-			request.update_fulfillment_status()
+		"""Queue the change of dispatched quantity on the parent request(s)"""
+		before = self.get_doc_before_save()
+		if before:
+			add_dispatch_delta(before.input_request, -flt(before.quantity_dispatched))
+		add_dispatch_delta(self.input_request, flt(self.quantity_dispatched))
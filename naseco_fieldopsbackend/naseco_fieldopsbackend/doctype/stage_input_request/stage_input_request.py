@@ -3,6 +3,9 @@
 
 import frappe
 from frappe.model.document import Document
+from frappe.utils import flt, now_datetime
+
+from naseco_fieldopsbackend.sync import journal
 
 
 class StageInputRequest(Document):
@@ -28,19 +31,131 @@ class StageInputRequest(Document):
 		)
 
 		# Sum up dispatched quantities
-		total_dispatched = sum([d.quantity_dispatched for d in dispatches])
+		total_dispatched = sum([flt(d.quantity_dispatched) for d in dispatches])
 		self.quantity_dispatched = total_dispatched
-		self.quantity_remaining = self.quantity_needed - total_dispatched
-
-		# Update status based on fulfillment
-		if self.quantity_remaining <= 0:
-			self.status = "Fulfilled"
-		elif self.quantity_dispatched > 0:
-			self.status = "Partially Fulfilled"
-		elif self.status == "Pending":
-			# Keep pending status if nothing dispatched
-			pass
-
-		# Save without triggering recursion
+		self.quantity_remaining = flt(self.quantity_needed) - total_dispatched
+		self.status = get_fulfillment_status(self.quantity_remaining, total_dispatched, self.status)
+
+		# queued dispatch deltas are part of the new total
+		pending = frappe.flags.fulfillment_deltas
+		if pending:
+			pending.pop(self.name, None)
+
+		# Save without triggering recursion; the caller's transaction commits it
 		self.db_update()
-		frappe.db.commit()
+
+
+def get_fulfillment_status(quantity_remaining, quantity_dispatched, current_status):
+	"""Status after a change of the dispatched quantity"""
+	if quantity_remaining <= 0:
+		return "Fulfilled"
+	if quantity_dispatched > 0:
+		return "Partially Fulfilled"
+	# Keep the current (e.g. pending) status if nothing is dispatched
+	return current_status
+
+
+def add_dispatch_delta(request, delta):
+	"""
+	Queue a change of the quantity dispatched against `request`.
+
+	Deltas are summed per request and applied with one atomic update each just
+	before the transaction commits, so a push of many dispatches for the same
+	request updates it once.
+	"""
+	if not request or not flt(delta):
+		return
+	pending = frappe.flags.fulfillment_deltas
+	if pending is None:
+		pending = frappe.flags.fulfillment_deltas = {}
+		frappe.db.before_commit.add(flush_dispatch_deltas)
+		frappe.db.after_rollback.add(_clear_dispatch_deltas)
+	pending[request] = pending.get(request, 0) + flt(delta)
+
+
+def get_pending_deltas():
+	"""Copy of the queued deltas, to restore after rolling back to a savepoint"""
+	return dict(frappe.flags.fulfillment_deltas or {})
+
+
+def restore_pending_deltas(snapshot):
+	if frappe.flags.fulfillment_deltas is not None:
+		frappe.flags.fulfillment_deltas = dict(snapshot)
+
+
+def flush_dispatch_deltas():
+	pending = frappe.flags.fulfillment_deltas or {}
+	frappe.flags.fulfillment_deltas = None
+	for request, delta in pending.items():
+		if flt(delta):
+			apply_dispatch_delta(request, delta)
+
+
+def _clear_dispatch_deltas():
+	frappe.flags.fulfillment_deltas = None
+
+
+def apply_dispatch_delta(request, delta):
+	"""Add `delta` to the dispatched quantity of `request` in one update statement."""
+	# every expression reads the old column values, so the assignment order
+	# does not matter on MariaDB (left to right) or Postgres (all at once)
+	frappe.db.sql(
+		"""update `tabStage Input Request`
+		set `status` = case
+				when coalesce(`quantity_needed`, 0) - (coalesce(`quantity_dispatched`, 0) + %(delta)s) <= 0
+					then 'Fulfilled'
+				when coalesce(`quantity_dispatched`, 0) + %(delta)s > 0 then 'Partially Fulfilled'
+				else `status`
+			end,
+			`quantity_remaining` = coalesce(`quantity_needed`, 0) - (coalesce(`quantity_dispatched`, 0) + %(delta)s),
+			`quantity_dispatched` = coalesce(`quantity_dispatched`, 0) + %(delta)s,
+			`modified` = %(now)s
+		where `name` = %(request)s""",
+		{"delta": flt(delta), "now": now_datetime(), "request": request},
+	)
+	journal.append("Stage Input Request", request)
+
+
+def reconcile_fulfillment(dry_run=False):
+	"""
+	Recompute the fulfillment of every request from one GROUP BY over the dispatches.
+
+	Returns:
+		list of (request, stored quantity dispatched, actual quantity dispatched)
+		for the requests that had drifted; these are fixed unless `dry_run`
+	"""
+	totals = dict(
+		frappe.db.sql(
+			"""select `input_request`, sum(coalesce(`quantity_dispatched`, 0))
+			from `tabStage Input Dispatch`
+			where `input_request` is not null and `input_request` != ''
+			group by `input_request`"""
+		)
+	)
+	requests = frappe.get_all(
+		"Stage Input Request",
+		fields=["name", "quantity_needed", "quantity_dispatched", "quantity_remaining", "status"],
+		order_by="name asc",
+	)
+
+	drifted = []
+	for request in requests:
+		dispatched = flt(totals.get(request.name))
+		remaining = flt(request.quantity_needed) - dispatched
+		status = get_fulfillment_status(remaining, dispatched, request.status)
+		if (
+			flt(request.quantity_dispatched, 6) == flt(dispatched, 6)
+			and flt(request.quantity_remaining, 6) == flt(remaining, 6)
+			and request.status == status
+		):
+			continue
+
+		drifted.append((request.name, flt(request.quantity_dispatched), dispatched))
+		if not dry_run:
+			frappe.db.set_value(
+				"Stage Input Request",
+				request.name,
+				{"quantity_dispatched": dispatched, "quantity_remaining": remaining, "status": status},
+			)
+			journal.append("Stage Input Request", request.name)
+	return drifted
@@ -0,0 +1,87 @@
+# Copyright (c) 2026, Naseco and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from naseco_fieldopsbackend.naseco_fieldopsbackend.doctype.stage_activity.test_stage_activity import (
+	make_crop_cycle,
+)
+from naseco_fieldopsbackend.naseco_fieldopsbackend.doctype.stage_input_request.stage_input_request import (
+	apply_dispatch_delta,
+	flush_dispatch_deltas,
+	reconcile_fulfillment,
+)
+
+
+def make_request(quantity_needed=10):
+	crop_cycle = make_crop_cycle(f"OG-INPUT-{frappe.generate_hash(length=8)}")
+	return frappe.get_doc(
+		{
+			"doctype": "Stage Input Request",
+			"crop_cycle": crop_cycle,
+			"input_name": "Fertilizer",
+			"quantity_needed": quantity_needed,
+		}
+	).insert(ignore_permissions=True)
+
+
+def make_dispatch(request, quantity):
+	return frappe.get_doc(
+		{"doctype": "Stage Input Dispatch", "input_request": request, "quantity_dispatched": quantity}
+	).insert(ignore_permissions=True)
+
+
+def get_fulfillment(request):
+	return frappe.db.get_value(
+		"Stage Input Request", request, ["quantity_dispatched", "quantity_remaining", "status"]
+	)
+
+
+class TestStageInputRequest(FrappeTestCase):
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def test_concurrent_deltas_add_up(self):
+		request = make_request().name
+		# two workers holding the same stale copy of the request
+		apply_dispatch_delta(request, 3)
+		apply_dispatch_delta(request, 4)
+		self.assertEqual(get_fulfillment(request), (7, 3, "Partially Fulfilled"))
+
+		apply_dispatch_delta(request, 3)
+		self.assertEqual(get_fulfillment(request), (10, 0, "Fulfilled"))
+
+	def test_dispatches_queue_one_delta_per_request(self):
+		request = make_request().name
+		make_dispatch(request, 2)
+		second = make_dispatch(request, 5)
+		# nothing is written before the commit
+		self.assertEqual(get_fulfillment(request), (0, 10, "Pending"))
+		self.assertEqual(frappe.flags.fulfillment_deltas, {request: 7})
+
+		flush_dispatch_deltas()
+		self.assertEqual(get_fulfillment(request), (7, 3, "Partially Fulfilled"))
+
+		second.delete(ignore_permissions=True)
+		flush_dispatch_deltas()
+		self.assertEqual(get_fulfillment(request), (2, 8, "Partially Fulfilled"))
+
+	def test_reconcile_fixes_a_drifted_total(self):
+		request = make_request().name
+		make_dispatch(request, 2)
+		make_dispatch(request, 5)
+		flush_dispatch_deltas()
+
+		frappe.db.set_value(
+			"Stage Input Request", request, {"quantity_dispatched": 99, "quantity_remaining": -89}
+		)
+
+		drifted = [row for row in reconcile_fulfillment(dry_run=True) if row[0] == request]
+		self.assertEqual(drifted, [(request, 99, 7)])
+		self.assertEqual(get_fulfillment(request)[0], 99)
+
+		drifted = [row for row in reconcile_fulfillment() if row[0] == request]
+		self.assertEqual(drifted, [(request, 99, 7)])
+		self.assertEqual(get_fulfillment(request), (7, 3, "Partially Fulfilled"))
+		self.assertFalse([row for row in reconcile_fulfillment(dry_run=True) if row[0] == request])
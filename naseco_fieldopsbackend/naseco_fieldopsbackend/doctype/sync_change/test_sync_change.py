@@ -0,0 +1,95 @@
+# Copyright (c) 2026, Naseco and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from naseco_fieldopsbackend import api
+from naseco_fieldopsbackend.sync import journal
+
+
+def make_outgrower(name):
+	return frappe.get_doc(
+		{
+			"doctype": "Outgrower",
+			"outgrower_id": name,
+			"full_name": "Journal Test Farmer",
+			"registration_date": "2026-02-01",
+		}
+	).insert(ignore_permissions=True)
+
+
+class TestSyncChange(FrappeTestCase):
+	def setUp(self):
+		self.name = f"OG-JOURNAL-{frappe.generate_hash(length=8)}"
+		# entries are readable as soon as they are committed
+		self.settle = patch.dict(frappe.conf, {"sync_journal_settle_seconds": 0})
+		self.settle.start()
+
+	def tearDown(self):
+		self.settle.stop()
+		if frappe.db.exists("Outgrower", self.name):
+			frappe.delete_doc("Outgrower", self.name, force=1, ignore_permissions=True)
+		frappe.db.delete(journal.JOURNAL_DOCTYPE, {"ref_name": self.name})
+		frappe.db.commit()
+
+	def get_changes(self):
+		return frappe.get_all(
+			journal.JOURNAL_DOCTYPE,
+			filters={"ref_doctype": "Outgrower", "ref_name": self.name},
+			pluck="change_type",
+			order_by="name asc",
+		)
+
+	def test_journal_is_written_at_commit(self):
+		doc = make_outgrower(self.name)
+		# after_insert and on_update queue one entry, written only by the commit
+		self.assertEqual(self.get_changes(), [])
+		frappe.db.commit()
+		self.assertEqual(self.get_changes(), ["Upsert"])
+
+		doc.full_name = "Journal Test Farmer 2"
+		doc.save(ignore_permissions=True)
+		frappe.db.commit()
+		self.assertEqual(self.get_changes(), ["Upsert", "Upsert"])
+
+		frappe.delete_doc("Outgrower", self.name, force=1, ignore_permissions=True)
+		frappe.db.commit()
+		self.assertEqual(self.get_changes(), ["Upsert", "Upsert", "Delete"])
+
+	def test_rollback_drops_queued_entries(self):
+		make_outgrower(self.name)
+		frappe.db.rollback()
+		frappe.db.commit()
+		self.assertEqual(self.get_changes(), [])
+
+	def test_pull_from_journal_cursor_returns_later_changes(self):
+		make_outgrower(self.name)
+		frappe.db.commit()
+		since_seq = journal.get_current_seq()
+		self.assertTrue(since_seq)
+
+		# nothing changed after the cursor
+		result = api.get_sync_changes(since_seq=since_seq)
+		self.assertTrue(result.get("success"))
+		self.assertEqual(result["data"], {})
+		self.assertEqual(result["last_seq"], since_seq)
+
+		doc = frappe.get_doc("Outgrower", self.name)
+		doc.full_name = "Journal Test Farmer 2"
+		doc.save(ignore_permissions=True)
+		frappe.db.commit()
+
+		result = api.get_sync_changes(since_seq=since_seq)
+		self.assertGreater(result["last_seq"], since_seq)
+		self.assertEqual([record.get("outgrowerId") for record in result["data"]["outgrowers"]], [self.name])
+		self.assertEqual(result["data"]["outgrowers"][0].get("fullName"), "Journal Test Farmer 2")
+
+		frappe.delete_doc("Outgrower", self.name, force=1, ignore_permissions=True)
+		frappe.db.commit()
+
+		result = api.get_sync_changes(since_seq=result["last_seq"])
+		self.assertEqual(result["data"], {})
+		self.assertEqual(result["deleted"], {"outgrowers": [self.name]})
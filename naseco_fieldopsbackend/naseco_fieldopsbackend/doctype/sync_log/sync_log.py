@@ -4,6 +4,10 @@
 # import frappe
 from frappe.model.document import Document
 
+from naseco_fieldopsbackend.sync.log_buffer import reserve_names
+
 
 class SyncLog(Document):
-	pass
+	def autoname(self):
+		# same counter as the bulk writes of the sync log buffer
+		self.name = reserve_names(1)[0]
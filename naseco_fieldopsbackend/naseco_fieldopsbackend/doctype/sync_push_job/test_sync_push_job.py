@@ -0,0 +1,47 @@
+# Copyright (c) 2026, Naseco and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_to_date, now_datetime
+
+from naseco_fieldopsbackend.sync import push_jobs
+
+
+def make_job(status, minutes_ago=0):
+	job = frappe.get_doc(
+		{
+			"doctype": push_jobs.PUSH_JOB_DOCTYPE,
+			"status": status,
+			"user": "Administrator",
+			"total_records": 0,
+			"payload": "[]",
+		}
+	).insert(ignore_permissions=True)
+	if minutes_ago:
+		modified = add_to_date(now_datetime(), minutes=-minutes_ago)
+		frappe.db.set_value(job.doctype, job.name, "modified", modified, update_modified=False)
+	return job.name
+
+
+class TestSyncPushJob(FrappeTestCase):
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def test_stale_running_jobs_are_queued_again(self):
+		stale = make_job("Running", minutes_ago=push_jobs.DEFAULT_STALE_MINUTES + 5)
+		running = make_job("Running")
+		finished = make_job("Completed", minutes_ago=push_jobs.DEFAULT_STALE_MINUTES + 5)
+
+		with (
+			patch.object(push_jobs.frappe, "enqueue") as enqueue,
+			patch.object(push_jobs.frappe.db, "commit"),
+		):
+			push_jobs.requeue_stale_jobs()
+
+		self.assertEqual([call.kwargs["push_job"] for call in enqueue.call_args_list], [stale])
+		self.assertEqual(frappe.db.get_value(push_jobs.PUSH_JOB_DOCTYPE, stale, "status"), "Queued")
+		self.assertEqual(frappe.db.get_value(push_jobs.PUSH_JOB_DOCTYPE, running, "status"), "Running")
+		self.assertEqual(frappe.db.get_value(push_jobs.PUSH_JOB_DOCTYPE, finished, "status"), "Completed")
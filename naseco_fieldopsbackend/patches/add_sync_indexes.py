@@ -0,0 +1,11 @@
+# Copyright (c) 2026, NASECO and contributors
+# For license information, please see license.txt
+import frappe
+
+from naseco_fieldopsbackend.sync.indexes import ensure_sync_indexes
+
+
+def execute():
+	"""Idempotently add the composite and cross-app indexes used by sync pulls."""
+	ensure_sync_indexes()
+	frappe.db.commit()
@@ -0,0 +1,8 @@
+# Copyright (c) 2026, NASECO and contributors
+# For license information, please see license.txt
+from naseco_fieldopsbackend.geo.plots import recompute_plot_geometry
+
+
+def execute():
+	"""Fill the bounding box and geohash columns of existing plots."""
+	recompute_plot_geometry()
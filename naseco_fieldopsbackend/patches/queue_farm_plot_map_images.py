@@ -0,0 +1,20 @@
+# Copyright (c) 2026, NASECO and contributors
+# For license information, please see license.txt
+import frappe
+
+
+def execute():
+	"""Move map images still stored as base64 into content-addressed files."""
+	plots = frappe.get_all(
+		"Farm Plot",
+		filters=[["map_image_base64", "is", "set"]],
+		pluck="name",
+	)
+	for plot in plots:
+		frappe.enqueue(
+			"naseco_fieldopsbackend.naseco_fieldopsbackend.doctype.farm_plot.farm_plot.process_map_image",
+			queue="long",
+			plot=plot,
+			job_id=f"farm_plot_map_image::{plot}",
+			deduplicate=True,
+		)
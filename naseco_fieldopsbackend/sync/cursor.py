@@ -0,0 +1,87 @@
+# Copyright (c) 2026, NASECO and contributors
+# For license information, please see license.txt
+
+"""
+Keyset pagination for sync pulls.
+
+Each store is read in `(modified, name)` order. A page stops when it reaches its
+record or byte budget and hands the client an opaque continuation token holding
+the position of the last record sent, so an interrupted pull resumes from there
+instead of starting over.
+"""
+
+import base64
+import json
+
+import frappe
+from frappe import _
+
+from naseco_fieldopsbackend.sync.hydration import hydrate_docs
+
+TOKEN_VERSION = 1
+
+DEFAULT_PAGE_SIZE = 2000
+MAX_PAGE_SIZE = 10000
+DEFAULT_PAGE_BYTES = 5 * 1024 * 1024
+
+
+def encode_token(state):
+	"""Serialize cursor state into a URL-safe opaque token."""
+	raw = json.dumps(dict(state, v=TOKEN_VERSION), separators=(",", ":"), default=str)
+	return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_token(token):
+	"""Parse a continuation token produced by `encode_token`."""
+	try:
+		padded = token + "=" * (-len(token) % 4)
+		state = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+	except Exception:
+		frappe.throw(_("Invalid continuation token"), frappe.ValidationError)
+
+	if not isinstance(state, dict) or state.get("v") != TOKEN_VERSION:
+		frappe.throw(_("Unsupported continuation token"), frappe.ValidationError)
+	return state
+
+
+def get_page_budget(page_size=None, page_bytes=None):
+	"""Return (max records, max bytes) for one page, clamped to sane bounds."""
+	records = frappe.utils.cint(page_size) or DEFAULT_PAGE_SIZE
+	records = max(1, min(records, MAX_PAGE_SIZE))
+	size = frappe.utils.cint(page_bytes) or DEFAULT_PAGE_BYTES
+	return records, max(1024, size)
+
+
+def keyset_filters(after):
+	"""
+	Return (filters, or_filters) selecting rows strictly after `(modified, name)`.
+
+	frappe ANDs `filters` with the OR of `or_filters`, which gives
+	`modified >= m AND (modified > m OR name > n)`.
+	"""
+	if not after:
+		return [], []
+	modified, name = after
+	return (
+		[["modified", ">=", modified]],
+		[["modified", ">", modified], ["name", ">", name]],
+	)
+
+
+def fetch_after(doctype, filters, after, limit):
+	"""Hydrate up to `limit` documents following the `(modified, name)` position."""
+	extra, or_filters = keyset_filters(after)
+	rows = frappe.get_all(
+		doctype,
+		filters=list(filters or []) + extra,
+		or_filters=or_filters or None,
+		fields=["*"],
+		order_by="modified asc, name asc",
+		limit_page_length=limit,
+	)
+	return hydrate_docs(doctype, rows=rows)
+
+
+def estimate_size(record):
+	"""Approximate serialized size of a record in bytes."""
+	return len(json.dumps(record, separators=(",", ":"), default=str))
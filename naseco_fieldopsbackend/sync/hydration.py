@@ -0,0 +1,97 @@
+# Copyright (c) 2026, NASECO and contributors
+# For license information, please see license.txt
+
+"""
+Bulk document hydration for sync pulls.
+
+Loading every record with `frappe.get_doc(...).as_dict()` costs one query for the
+parent plus one per child table. Here parents are read with a single query per
+doctype and every child table with a single `parent IN (...)` query per chunk, so
+the query count depends on the number of doctypes, not the number of records.
+"""
+
+import frappe
+
+# Upper bound on the number of names passed in one `IN (...)` clause
+IN_CHUNK_SIZE = 500
+
+
+def chunked(values, size=IN_CHUNK_SIZE):
+	values = list(values)
+	for start in range(0, len(values), size):
+		yield values[start : start + size]
+
+
+def get_table_fields(doctype):
+	"""Return (fieldname, child doctype) pairs for the Table fields of a doctype."""
+	meta = frappe.get_meta(doctype)
+	return [(df.fieldname, df.options) for df in meta.get_table_fields()]
+
+
+def hydrate_docs(doctype, filters=None, order_by="modified asc", limit=None, rows=None):
+	"""
+	Return full document dicts (parent fields plus child tables) for a doctype.
+
+	The result has the same shape as `frappe.get_doc(doctype, name).as_dict()`
+	and can be passed straight to `_map_doc_to_mobile`.
+
+	Args:
+		doctype: DocType to load
+		filters: frappe filters for the parent query
+		order_by: parent ordering
+		limit: optional page length for the parent query
+		rows: already fetched parent rows (skips the parent query)
+	"""
+	if rows is None:
+		rows = frappe.get_all(
+			doctype,
+			filters=filters or [],
+			fields=["*"],
+			order_by=order_by,
+			limit_page_length=limit or 0,
+		)
+	return attach_children(doctype, rows)
+
+
+def attach_children(doctype, rows):
+	"""Load every child table for `rows` in bulk and attach them in place."""
+	docs = []
+	for row in rows or []:
+		doc = frappe._dict(row)
+		doc["doctype"] = doctype
+		docs.append(doc)
+
+	table_fields = get_table_fields(doctype)
+	if not docs or not table_fields:
+		return docs
+
+	by_name = {doc.name: doc for doc in docs}
+	for fieldname, child_doctype in table_fields:
+		for doc in docs:
+			doc[fieldname] = []
+		for child in fetch_child_rows(doctype, fieldname, child_doctype, list(by_name)):
+			parent = by_name.get(child.parent)
+			if parent is not None:
+				parent[fieldname].append(child)
+
+	return docs
+
+
+def fetch_child_rows(parenttype, parentfield, child_doctype, parent_names):
+	"""Fetch all child rows of one table field for many parents, ordered by idx."""
+	out = []
+	for names in chunked(parent_names):
+		rows = frappe.get_all(
+			child_doctype,
+			filters={
+				"parenttype": parenttype,
+				"parentfield": parentfield,
+				"parent": ["in", names],
+			},
+			fields=["*"],
+			order_by="parent asc, idx asc",
+		)
+		for row in rows:
+			row["doctype"] = child_doctype
+			out.append(row)
+	return out
@@ -0,0 +1,110 @@
+# Copyright (c) 2026, NASECO and contributors
+# For license information, please see license.txt
+
+"""
+Replay cache for retried pushes.
+
+The app may send a batch key (`batchId` in the request body or an
+`Idempotency-Key` header) and a key per record (`idempotencyKey`). Results are
+kept in the redis cache per user for `sync_push_replay_ttl` seconds
+(site config, DEFAULT_TTL by default):
+
+- a replayed batch returns the stored response without touching any document;
+- a replayed record inside a new batch returns its stored result.
+
+While a batch is being applied its key is locked for BATCH_LOCK_TTL seconds,
+so a retry sent before the first attempt finished is answered "in progress"
+instead of applying the records a second time.
+
+Record results are only stored once the transaction that wrote them commits.
+Error results are never stored, and neither is a batch response holding one,
+so a failed record is retried normally.
+"""
+
+import frappe
+from frappe.utils import cint
+
+CACHE_PREFIX = "naseco_sync_push_replay"
+DEFAULT_TTL = 3600
+# longer than any synchronous push; the lock is released as soon as the batch is done
+BATCH_LOCK_TTL = 5 * 60
+
+BATCH_KEY_FIELDS = ("batchId", "batch_id", "idempotencyKey", "idempotency_key")
+RECORD_KEY_FIELDS = ("idempotencyKey", "idempotency_key")
+
+
+def get_ttl():
+	return cint(frappe.conf.get("sync_push_replay_ttl", DEFAULT_TTL))
+
+
+def _cache_key(kind, key, user=None):
+	return f"{CACHE_PREFIX}:{user or frappe.session.user}:{kind}:{key}"
+
+
+def get_batch_key(payload):
+	"""Batch key from the request body or the `Idempotency-Key` header."""
+	if isinstance(payload, dict):
+		for field in BATCH_KEY_FIELDS:
+			if payload.get(field):
+				return str(payload[field])
+	request = getattr(frappe.local, "request", None)
+	if request is not None:
+		return request.headers.get("Idempotency-Key")
+	return None
+
+
+def get_record_key(record):
+	for field in RECORD_KEY_FIELDS:
+		if record.get(field):
+			return str(record[field])
+	return None
+
+
+def get_batch_result(key):
+	return frappe.cache().get_value(_cache_key("batch", key))
+
+
+def store_batch_result(key, response):
+	"""Keep a batch response for replays, unless it failed or holds a record error."""
+	if not response.get("success"):
+		return
+	if any(result.get("status") == "error" for result in response.get("results") or []):
+		return
+	frappe.cache().set_value(_cache_key("batch", key), response, expires_in_sec=get_ttl())
+
+
+def acquire_batch_lock(key):
+	"""True when the caller may apply the batch, False while another request holds it."""
+	cache = frappe.cache()
+	return bool(cache.set(cache.make_key(_cache_key("lock", key)), 1, nx=True, ex=BATCH_LOCK_TTL))
+
+
+def release_batch_lock(key):
+	frappe.cache().delete_value(_cache_key("lock", key))
+
+
+def get_record_result(key):
+	return frappe.cache().get_value(_cache_key("record", key))
+
+
+def remember_record_result(key, result):
+	"""Queue a record result; it is written to the cache when the transaction commits."""
+	pending = frappe.flags.sync_push_pending_results
+	if pending is None:
+		pending = frappe.flags.sync_push_pending_results = {}
+		frappe.db.after_commit.add(_store_pending)
+		frappe.db.after_rollback.add(_clear_pending)
+	pending[_cache_key("record", key)] = result
+
+
+def _store_pending():
+	pending = frappe.flags.sync_push_pending_results or {}
+	frappe.flags.sync_push_pending_results = None
+	ttl = get_ttl()
+	cache = frappe.cache()
+	for cache_key, result in pending.items():
+		cache.set_value(cache_key, result, expires_in_sec=ttl)
+
+
+def _clear_pending():
+	frappe.flags.sync_push_pending_results = None
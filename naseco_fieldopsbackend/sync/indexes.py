@@ -0,0 +1,131 @@
+# Copyright (c) 2026, NASECO and contributors
+# For license information, please see license.txt
+
+"""
+Indexes for the sync hot paths, and an EXPLAIN-based advisor.
+
+Single Link-field indexes are declared with `search_index` in the doctype JSONs.
+The composite `(modified, name)` keyset indexes and the indexes on doctypes owned
+by other apps are created here, from the `add_sync_indexes` patch and the
+`sync-index-advisor` bench command.
+"""
+
+import frappe
+
+# Doctypes read by keyset pulls ordered on (modified, name)
+KEYSET_DOCTYPES = (
+	"Outgrower",
+	"Farm Plot",
+	"Crop Cycle",
+	"Crop Cycle Stage",
+	"Field Visit",
+	"Finding",
+	"Plot Crop Assignment",
+	"Stage Activity",
+	"Stage Input Request",
+	"Stage Input Dispatch",
+	"Attendance",
+	"Employee Checkin",
+	"Expense Claim",
+	"Leave Application",
+	"Employee Advance",
+)
+
+# (doctype, columns) for every index the sync endpoints rely on
+SYNC_INDEXES = [(doctype, ("modified", "name")) for doctype in KEYSET_DOCTYPES] + [
+	("Farm Plot", ("outgrower",)),
+	("Crop Cycle", ("plot",)),
+	("Crop Cycle Stage", ("crop_cycle",)),
+	("Field Visit", ("plot",)),
+	("Field Visit", ("crop_cycle",)),
+	("Finding", ("visit",)),
+	("Finding", ("crop_cycle",)),
+	("Plot Crop Assignment", ("plot",)),
+	("Stage Activity", ("crop_cycle",)),
+	("Stage Input Request", ("crop_cycle",)),
+	("Stage Input Dispatch", ("input_request",)),
+	("Outgrower", ("region",)),
+	("Outgrower", ("assigned_to",)),
+	("Outgrower", ("assigned_supervisor",)),
+	("Employee", ("user_id",)),
+	("Employee Checkin", ("employee",)),
+	("Attendance", ("employee", "attendance_date")),
+	# retention job batches
+	("Sync Log", ("creation",)),
+	("Sync Conflict", ("resolved", "modified")),
+]
+
+# (label, doctype, where clause) mirroring the filters built by the sync endpoints
+QUERY_SHAPES = [
+	(f"{doctype} keyset page", doctype, "`modified` >= %(ts)s order by `modified`, `name`")
+	for doctype in KEYSET_DOCTYPES
+] + [
+	("plots of outgrowers", "Farm Plot", "`outgrower` in (%(name)s)"),
+	("crop cycles of plots", "Crop Cycle", "`plot` in (%(name)s)"),
+	("stages of crop cycles", "Crop Cycle Stage", "`crop_cycle` in (%(name)s)"),
+	("visits of plots", "Field Visit", "`plot` in (%(name)s)"),
+	("visits of crop cycles", "Field Visit", "`crop_cycle` in (%(name)s)"),
+	("findings of visits", "Finding", "`visit` in (%(name)s)"),
+	("dispatches of requests", "Stage Input Dispatch", "`input_request` in (%(name)s)"),
+	("outgrowers of region", "Outgrower", "`region` = %(name)s"),
+	("outgrowers of officer", "Outgrower", "`assigned_to` = %(name)s"),
+	("outgrowers of supervisor", "Outgrower", "`assigned_supervisor` = %(name)s"),
+	("employee of user", "Employee", "`user_id` = %(name)s"),
+]
+
+
+def _table_columns(doctype):
+	if not frappe.db.table_exists(doctype):
+		return None
+	return set(frappe.db.get_table_columns(doctype))
+
+
+def ensure_sync_indexes():
+	"""Create every missing index in SYNC_INDEXES; returns the ones created."""
+	created = []
+	for doctype, columns in SYNC_INDEXES:
+		existing = _table_columns(doctype)
+		if existing is None or not set(columns) <= existing:
+			# doctype or field comes from an app that is not installed
+			continue
+		# single columns reuse the name frappe gives `search_index` indexes
+		index_name = columns[0] if len(columns) == 1 else "_".join(columns) + "_index"
+		if frappe.db.has_index(f"tab{doctype}", index_name):
+			continue
+		frappe.db.add_index(doctype, list(columns), index_name)
+		created.append((doctype, columns))
+	return created
+
+
+def explain(doctype, where):
+	"""Return the EXPLAIN rows for `select name from tab{doctype} where ...`."""
+	query = f"explain select `name` from `tab{doctype}` where {where}"
+	return frappe.db.sql(query, {"ts": "2000-01-01 00:00:00", "name": "x"}, as_dict=True)
+
+
+def _uses_index(plan):
+	if frappe.db.db_type == "postgres":
+		return not any("Seq Scan" in str(next(iter(row.values()))) for row in plan)
+	# on small tables the optimizer may still pick a scan, so a usable key is enough
+	return all(row.get("key") or row.get("possible_keys") for row in plan)
+
+
+def advise():
+	"""
+	EXPLAIN each sync query shape and report the ones that scan the full table.
+
+	Returns:
+		list of dicts with label, doctype, where and the raw plan
+	"""
+	report = []
+	for label, doctype, where in QUERY_SHAPES:
+		if _table_columns(doctype) is None:
+			continue
+		try:
+			plan = explain(doctype, where)
+		except Exception as e:
+			report.append({"label": label, "doctype": doctype, "where": where, "error": str(e)})
+			continue
+		if not _uses_index(plan):
+			report.append({"label": label, "doctype": doctype, "where": where, "plan": plan})
+	return report
@@ -0,0 +1,110 @@
+# Copyright (c) 2026, NASECO and contributors
+# For license information, please see license.txt
+
+"""
+Fast-path ingestion for append-only doctypes.
+
+Stage activities and findings are created on the device and practically never
+edited, so new records of these doctypes skip the per-record `insert()`. A
+batch is named and checked in memory with the same Document helpers `insert()`
+uses (defaults, mandatory fields, lengths, numeric types, select options), Link
+values are checked with one query per target doctype, and the parents and
+child rows are written with one multi-row insert per table.
+
+Naming still goes through `set_new_name` one document at a time, so doctypes
+named from a series (Finding's `format:FND-{####}`) take one series update per
+record; only the checks and the writes are batched.
+
+Controller methods and doc_events do not run on this path. The journal, the
+hook that matters for sync, is updated here directly. Site config
+`sync_push_append_only_doctypes` overrides APPEND_ONLY_DOCTYPES; an empty list
+turns the fast path off.
+
+Only list doctypes whose controllers do nothing a sync record depends on.
+Employee Checkin is not one: its validate rejects a second check-in for the
+same employee and time and fetches the shift, so it keeps the regular path.
+"""
+
+import frappe
+from frappe import _
+
+from naseco_fieldopsbackend.sync import journal
+from naseco_fieldopsbackend.sync.hydration import chunked
+
+APPEND_ONLY_DOCTYPES = ("Stage Activity", "Finding")
+
+
+def get_append_only_doctypes():
+	doctypes = frappe.conf.get("sync_push_append_only_doctypes")
+	return frozenset(APPEND_ONLY_DOCTYPES if doctypes is None else doctypes)
+
+
+class BulkIngest:
+	def __init__(self, doctype):
+		self.doctype = doctype
+		self.meta = frappe.get_meta(doctype)
+
+	def build(self, mapped):
+		"""Return a named, validated, unsaved document; raises like `insert()` would."""
+		doc = frappe.get_doc(dict(mapped, doctype=self.doctype))
+		# the private helpers are relied on deliberately: they are the steps of
+		# `Document.insert()` before the write, without the controller hooks
+		doc._set_defaults()
+		doc.set_user_and_timestamp()
+		doc.set_docstatus()
+		doc.set_new_name()
+		doc.set_parent_in_children()
+		doc._validate_mandatory()
+		for d in [doc, *doc.get_all_children()]:
+			d._fix_numeric_types()
+			d._validate_length()
+			d._validate_selects()
+		return doc
+
+	def validate_links(self, docs):
+		"""Return `{doc name: error}` for documents with Link values that do not exist."""
+		values_by_target = {}
+		for df in self.meta.get_link_fields():
+			for doc in docs:
+				value = doc.get(df.fieldname)
+				if value:
+					values_by_target.setdefault(df.options, set()).add(value)
+
+		found = {}
+		for target, values in values_by_target.items():
+			existing = found[target] = set()
+			for chunk in chunked(sorted(values)):
+				existing.update(frappe.get_all(target, filters={"name": ["in", chunk]}, pluck="name"))
+
+		errors = {}
+		for df in self.meta.get_link_fields():
+			for doc in docs:
+				value = doc.get(df.fieldname)
+				if value and value not in found[df.options] and doc.name not in errors:
+					errors[doc.name] = _("Could not find {0}: {1}").format(_(df.label), value)
+		return errors
+
+	def write(self, docs):
+		"""Insert parents and child rows with one multi-row insert per table."""
+		if not docs:
+			return
+
+		_bulk_insert(self.doctype, [doc.get_valid_dict(convert_dates_to_str=True) for doc in docs])
+
+		rows_by_child_doctype = {}
+		for doc in docs:
+			for d in doc.get_all_children():
+				rows_by_child_doctype.setdefault(d.doctype, []).append(
+					d.get_valid_dict(convert_dates_to_str=True)
+				)
+		for child_doctype, rows in rows_by_child_doctype.items():
+			_bulk_insert(child_doctype, rows)
+
+		# stand-in for the after_insert doc_event
+		if self.doctype in journal.get_journaled_doctypes():
+			journal.append_many(self.doctype, [doc.name for doc in docs])
+
+
+def _bulk_insert(doctype, rows):
+	fields = list(rows[0])
+	frappe.db.bulk_insert(doctype, fields, [[row.get(f) for f in fields] for row in rows])
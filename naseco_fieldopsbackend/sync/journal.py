@@ -0,0 +1,181 @@
+# Copyright (c) 2026, NASECO and contributors
+# For license information, please see license.txt
+
+"""
+Append-only change journal for sync doctypes.
+
+Every insert, update, rename and delete of a synced document appends a
+`Sync Change` row whose autoincrement name is a monotonically increasing
+sequence number. Devices keep the last sequence they applied and pull
+"changes after seq N" with a single range read, tombstones included.
+
+A reader that resumes after seq N never looks below N again, so a number must
+not become visible after a higher one. Entries are therefore queued for the
+transaction and written in one insert from a before_commit hook: the sequence
+is allocated just before the commit instead of at the write, however long the
+transaction ran. Two commits can still race in the moment between the journal
+insert and the commit itself, so readers only see entries older than
+`sync_journal_settle_seconds` (site config, DEFAULT_SETTLE_SECONDS). An entry
+that takes longer than that from its insert to its commit (e.g. a commit
+stalled on a lock) can be skipped by a device that pulled in between; lengthen
+the window on sites that see such stalls.
+"""
+
+import frappe
+from frappe.utils import add_to_date, cint, now_datetime
+
+JOURNAL_DOCTYPE = "Sync Change"
+DEFAULT_SETTLE_SECONDS = 2
+
+# global default holding the highest sequence removed by the retention job
+PURGED_SEQ_KEY = "naseco_sync_change_purged_seq"
+
+DEFAULT_CHANGE_LIMIT = 5000
+MAX_CHANGE_LIMIT = 20000
+
+_journaled_doctypes = None
+
+
+def get_journaled_doctypes():
+	global _journaled_doctypes
+	if _journaled_doctypes is None:
+		from naseco_fieldopsbackend.api import BASE_STORE_TO_DOCTYPE
+
+		_journaled_doctypes = frozenset(BASE_STORE_TO_DOCTYPE.values())
+	return _journaled_doctypes
+
+
+def get_settle_seconds():
+	return cint(frappe.conf.get("sync_journal_settle_seconds", DEFAULT_SETTLE_SECONDS))
+
+
+def _queue(doctype, names, change_type):
+	"""
+	Queue journal entries for the current transaction.
+
+	One entry per document and change type is enough because readers always
+	load the committed document; a repeated change moves its entry to the end,
+	so a delete followed by a re-insert stays in that order.
+	"""
+	pending = frappe.flags.sync_journal_pending
+	if pending is None:
+		pending = frappe.flags.sync_journal_pending = {}
+		frappe.db.before_commit.add(flush)
+		frappe.db.after_rollback.add(_clear_pending)
+	for name in names:
+		if name:
+			key = (doctype, name, change_type)
+			pending.pop(key, None)
+			pending[key] = True
+
+
+def _clear_pending():
+	frappe.flags.sync_journal_pending = None
+
+
+def get_pending():
+	"""Copy of the queued entries, to restore after rolling back to a savepoint"""
+	return dict(frappe.flags.sync_journal_pending or {})
+
+
+def restore_pending(snapshot):
+	if frappe.flags.sync_journal_pending is not None:
+		frappe.flags.sync_journal_pending = dict(snapshot)
+
+
+def flush():
+	"""before_commit: write the queued entries with one multi-row insert."""
+	pending = frappe.flags.sync_journal_pending or {}
+	frappe.flags.sync_journal_pending = None
+	if not pending:
+		return
+	now = now_datetime()
+	user = frappe.session.user
+	fields = ("creation", "modified", "owner", "modified_by", "docstatus", "idx")
+	frappe.db.bulk_insert(
+		JOURNAL_DOCTYPE,
+		(*fields, "ref_doctype", "ref_name", "change_type"),
+		[(now, now, user, user, 0, 0, *key) for key in pending],
+	)
+
+
+def append(doctype, name, change_type="Upsert"):
+	_queue(doctype, [name], change_type)
+
+
+def append_many(doctype, names, change_type="Upsert"):
+	_queue(doctype, names, change_type)
+
+
+def record_change(doc, method=None):
+	"""doc_events hook for after_insert / on_update."""
+	if doc.doctype in get_journaled_doctypes():
+		append(doc.doctype, doc.name, "Upsert")
+
+
+def record_delete(doc, method=None):
+	"""doc_events hook for on_trash."""
+	if doc.doctype in get_journaled_doctypes():
+		append(doc.doctype, doc.name, "Delete")
+
+
+def record_rename(doc, method=None, old=None, new=None, merge=False):
+	"""doc_events hook for after_rename: tombstone the old name, upsert the new one."""
+	if doc.doctype in get_journaled_doctypes():
+		append(doc.doctype, old, "Delete")
+		append(doc.doctype, new or doc.name, "Upsert")
+
+
+def _settle_cutoff():
+	return add_to_date(now_datetime(), seconds=-get_settle_seconds())
+
+
+def get_current_seq():
+	"""Highest sequence number a reader may safely resume from."""
+	rows = frappe.get_all(
+		JOURNAL_DOCTYPE,
+		filters=[["creation", "<", _settle_cutoff()]],
+		fields=["name"],
+		order_by="name desc",
+		limit_page_length=1,
+	)
+	return int(rows[0].name) if rows else 0
+
+
+def get_purged_seq():
+	return cint(frappe.db.get_global(PURGED_SEQ_KEY))
+
+
+def needs_reset(since_seq):
+	"""True when entries after `since_seq` were purged and the client must do a full pull."""
+	return cint(since_seq) < get_purged_seq()
+
+
+def read_changes(since_seq=0, limit=None):
+	"""
+	Return journal rows after `since_seq`, collapsed to the last change per document.
+
+	Returns:
+		(changes, last_seq, has_more) where `changes` maps doctype to
+		`{name: change_type}` in sequence order.
+	"""
+	since_seq = cint(since_seq)
+	limit = max(1, min(cint(limit) or DEFAULT_CHANGE_LIMIT, MAX_CHANGE_LIMIT))
+
+	rows = frappe.get_all(
+		JOURNAL_DOCTYPE,
+		filters=[["name", ">", since_seq], ["creation", "<", _settle_cutoff()]],
+		fields=["name", "ref_doctype", "ref_name", "change_type"],
+		order_by="name asc",
+		limit_page_length=limit,
+	)
+
+	changes = {}
+	for row in rows:
+		per_doctype = changes.setdefault(row.ref_doctype, {})
+		# re-insert so the latest change decides the document's position
+		per_doctype.pop(row.ref_name, None)
+		per_doctype[row.ref_name] = row.change_type
+
+	last_seq = int(rows[-1].name) if rows else since_seq
+	return changes, last_seq, len(rows) == limit
@@ -0,0 +1,173 @@
+# Copyright (c) 2026, NASECO and contributors
+# For license information, please see license.txt
+
+"""
+Request-scoped buffer for Sync Log entries.
+
+Inserting one `Sync Log` document per pushed record runs validation, the naming
+series lock and every hook once per record. During a push the entries are
+collected here instead and written with one multi-row insert just before the
+transaction commits, with the whole block of names reserved from the series in
+a single update. The series prefix and digits come from the Sync Log autoname,
+and `SyncLog.autoname` reserves through `reserve_names` as well, so single
+inserts and bulk writes share one counter.
+
+Success entries can be shed under load: once the site has logged
+`sync_log_success_budget_per_minute` success entries in the current minute,
+further ones are kept at `sync_log_success_sample_rate`. Without a budget the
+sample rate applies to every flush. Failures and conflicts are always kept.
+
+Site config:
+	sync_log_success_sample_rate: fraction (0..1) of success entries to keep; 1 by default
+	sync_log_success_budget_per_minute: success entries per minute kept before sampling; unset by default
+	sync_log_max_success_per_request: cap on success entries kept per request; unlimited by default
+"""
+
+import random
+import re
+from contextlib import contextmanager
+
+import frappe
+from frappe.utils import flt, now_datetime
+
+SYNC_LOG_DOCTYPE = "Sync Log"
+# used when the autoname is not a plain `format:PREFIX{#####}`
+SYNC_LOG_SERIES = "SYNC-"
+SYNC_LOG_DIGITS = 5
+
+# per-minute count of success entries logged, for load-based sampling
+LOAD_KEY = "naseco_fieldops:sync_log_successes"
+
+FIELDS = (
+	"name",
+	"creation",
+	"modified",
+	"owner",
+	"modified_by",
+	"docstatus",
+	"idx",
+	"user",
+	"doctype_name",
+	"doc_name",
+	"operation",
+	"status",
+	"error_message",
+	"sync_timestamp",
+)
+
+
+def get_series():
+	"""(prefix, digits) of the Sync Log autoname, e.g. `format:SYNC-{#####}`."""
+	match = re.fullmatch(r"format:([^{}]*)\{(#+)\}", frappe.get_meta(SYNC_LOG_DOCTYPE).autoname or "")
+	if not match:
+		return SYNC_LOG_SERIES, SYNC_LOG_DIGITS
+	return match.group(1), len(match.group(2))
+
+
+def reserve_names(count, prefix=None, digits=None):
+	"""Reserve `count` consecutive Sync Log names (or from another series) with one update."""
+	if prefix is None:
+		prefix, digits = get_series()
+	current = frappe.db.sql("select `current` from `tabSeries` where `name`=%s for update", prefix)
+	if current:
+		start = int(current[0][0] or 0)
+		frappe.db.sql("update `tabSeries` set `current` = `current` + %s where `name`=%s", (count, prefix))
+	else:
+		start = 0
+		frappe.db.sql("insert into `tabSeries` (`name`, `current`) values (%s, %s)", (prefix, count))
+	return [f"{prefix}{str(n).zfill(digits)}" for n in range(start + 1, start + count + 1)]
+
+
+def _count_successes(count):
+	"""Add `count` to this minute's success entries and return the new total."""
+	cache = frappe.cache()
+	key = cache.make_key(f"{LOAD_KEY}:{now_datetime().strftime('%Y%m%d%H%M')}")
+	total = cache.incrby(key, count)
+	cache.expire(key, 120)
+	return total
+
+
+class SyncLogBuffer:
+	def __init__(self, sample_rate=None, max_success=None, success_budget=None):
+		conf = frappe.conf
+		if sample_rate is None:
+			sample_rate = conf.get("sync_log_success_sample_rate", 1)
+		if max_success is None:
+			max_success = conf.get("sync_log_max_success_per_request")
+		if success_budget is None:
+			success_budget = conf.get("sync_log_success_budget_per_minute")
+		self.sample_rate = min(max(flt(sample_rate), 0.0), 1.0)
+		self.max_success = max_success
+		self.success_budget = success_budget
+		self.entries = []
+		self.success_count = 0
+		self._registered = False
+
+	def add(self, user, doctype, doc_name, operation, status, error_message=None):
+		"""Queue one entry; success entries are subject to the cap and, at flush, sampling."""
+		if status == "Success":
+			if self.max_success is not None and self.success_count >= int(self.max_success):
+				return
+			self.success_count += 1
+
+		self.entries.append((user, doctype, doc_name, operation, status, error_message, now_datetime()))
+		if not self._registered:
+			# callbacks run once, so re-register after every flush
+			frappe.db.before_commit.add(self.flush)
+			frappe.db.after_rollback.add(self.clear)
+			self._registered = True
+
+	def _sample(self, entries):
+		"""Drop success entries by the sample rate when the site is over its budget."""
+		if self.sample_rate >= 1:
+			return entries
+		successes = sum(1 for entry in entries if entry[4] == "Success")
+		if not successes:
+			return entries
+		if self.success_budget is not None and _count_successes(successes) <= int(self.success_budget):
+			return entries
+		return [entry for entry in entries if entry[4] != "Success" or random.random() < self.sample_rate]
+
+	def clear(self):
+		self.entries = []
+		self._registered = False
+
+	def flush(self):
+		"""Write all queued entries with one multi-row insert."""
+		entries, self.entries = self.entries, []
+		self._registered = False
+		entries = self._sample(entries)
+		if not entries:
+			return
+
+		names = reserve_names(len(entries))
+		now = now_datetime()
+		user = frappe.session.user
+		values = [
+			(name, now, now, user, user, 0, 0, *entry) for name, entry in zip(names, entries, strict=True)
+		]
+		frappe.db.bulk_insert(SYNC_LOG_DOCTYPE, FIELDS, values)
+
+
+def get_buffer():
+	return getattr(frappe.local, "sync_log_buffer", None)
+
+
+@contextmanager
+def buffered_sync_log(**kwargs):
+	"""Collect `log_sync` calls made inside the block into one buffer."""
+	previous = get_buffer()
+	if previous is not None:
+		# nested use shares the outer buffer
+		yield previous
+		return
+
+	buffer = frappe.local.sync_log_buffer = SyncLogBuffer(**kwargs)
+	try:
+		yield buffer
+	finally:
+		frappe.local.sync_log_buffer = None
+		try:
+			buffer.flush()
+		except Exception as e:
+			frappe.log_error(f"Error flushing sync log buffer: {e!s}")
@@ -0,0 +1,228 @@
+# Copyright (c) 2026, NASECO and contributors
+# For license information, please see license.txt
+
+"""
+Precompiled mobile <-> Frappe field mappers.
+
+A `MobileMapper` is built once per doctype and holds everything the per-record
+loops need: forward and reverse field maps, the skip sets and the child-table
+transforms. Mapping a record is then a single pass over its fields with dict
+lookups only.
+"""
+
+# Frappe bookkeeping fields never sent to the device
+DOC_SKIP_FIELDS = frozenset(
+	("doctype", "owner", "modified_by", "docstatus", "idx", "parent", "parenttype", "parentfield")
+)
+
+# doctype -> fields kept on the server only; Farm Plot map images travel as
+# `map_image` (file URL) and `map_image_hash` instead of the base64 upload
+DOC_OMIT_FIELDS = {"Farm Plot": frozenset(("map_image_base64",))}
+
+# Payload keys ignored when writing to Frappe (server-managed or client-only)
+PAYLOAD_SKIP_FIELDS = frozenset(
+	("doctype", "name", "owner", "creation", "modified", "modified_by", "docstatus", "synced")
+)
+
+DOC_RENAMES = {"creation": "createdAt", "modified": "updatedAt"}
+PAYLOAD_RENAMES = {"createdAt": "creation", "updatedAt": "modified"}
+
+
+def _visit_photos_to_mobile(rows):
+	return [p.get("photo") for p in (rows or [])]
+
+
+def _visit_photos_to_doc(values):
+	# child table photos: list of strings
+	return [{"photo": p} for p in values or []]
+
+
+def _plot_photos_to_mobile(rows):
+	return [p.get("file") or p.get("url") for p in (rows or [])]
+
+
+def _plot_photos_to_doc(values):
+	return [{"file": p} for p in values or []]
+
+
+def _polygon_to_mobile(rows):
+	return [
+		{
+			"lat": v.get("latitude"),
+			"lng": v.get("longitude"),
+			"orderIndex": v.get("order_index"),
+		}
+		for v in (rows or [])
+	]
+
+
+def _polygon_to_doc(values):
+	return [
+		{
+			"latitude": v.get("lat"),
+			"longitude": v.get("lng"),
+			"order_index": v.get("orderIndex", idx + 1),
+		}
+		for idx, v in enumerate(values or [])
+	]
+
+
+def _recipe_stages_to_mobile(rows):
+	stages = []
+	for s in rows or []:
+		stage = {
+			"name": s.get("stage_name"),
+			"orderIndex": s.get("order_index"),
+			"durationDays": s.get("duration_days"),
+		}
+		stage["inputsPerAcre"] = [
+			{
+				"type": inp.get("input_type"),
+				"name": inp.get("input_name"),
+				"quantityPerAcre": inp.get("quantity_per_acre"),
+				"unit": inp.get("unit"),
+			}
+			for inp in s.get("inputs", []) or []
+		]
+		stages.append(stage)
+	return stages
+
+
+def _recipe_stages_to_doc(values):
+	stages = []
+	for stage in values or []:
+		stage_doc = {
+			"stage_name": stage.get("name"),
+			"order_index": stage.get("orderIndex"),
+			"duration_days": stage.get("durationDays"),
+		}
+		stage_doc["inputs"] = [
+			{
+				"input_type": inp.get("type"),
+				"input_name": inp.get("name"),
+				"quantity_per_acre": inp.get("quantityPerAcre"),
+				"unit": inp.get("unit"),
+			}
+			for inp in stage.get("inputsPerAcre", []) or []
+		]
+		stages.append(stage_doc)
+	return stages
+
+
+# doctype -> {field: (to_mobile, to_doc)} for child tables with a custom shape
+CHILD_TRANSFORMS = {
+	"Field Visit": {"photos": (_visit_photos_to_mobile, _visit_photos_to_doc)},
+	"Farm Plot": {
+		"photos": (_plot_photos_to_mobile, _plot_photos_to_doc),
+		"polygon": (_polygon_to_mobile, _polygon_to_doc),
+	},
+	"Crop Recipe": {"stages": (_recipe_stages_to_mobile, _recipe_stages_to_doc)},
+}
+
+
+def _normalize_input_request(result):
+	if result.get("input_type") and not result.get("input_name"):
+		result["input_name"] = result.get("input_type")
+	if result.get("quantity") is not None and not result.get("quantity_needed"):
+		result["quantity_needed"] = result.get("quantity")
+	if result.get("requested_date") and not result.get("request_date"):
+		result["request_date"] = result.get("requested_date")
+
+
+def _normalize_input_dispatch(result):
+	if result.get("input_type") and not result.get("input_name"):
+		result["input_name"] = result.get("input_type")
+	if result.get("quantity") is not None and not result.get("quantity_dispatched"):
+		result["quantity_dispatched"] = result.get("quantity")
+	if result.get("request_id") and not result.get("input_request"):
+		result["input_request"] = result.get("request_id")
+
+
+def _normalize_field_visit(result):
+	if result.get("status") and not result.get("visit_status"):
+		result["visit_status"] = "Submitted" if result.get("status") == "completed" else "Draft"
+
+
+# doctype -> normalizer filling required Frappe fields from their mobile aliases
+DOC_NORMALIZERS = {
+	"Stage Input Request": _normalize_input_request,
+	"Stage Input Dispatch": _normalize_input_dispatch,
+	"Field Visit": _normalize_field_visit,
+}
+
+
+class MobileMapper:
+	"""Field mapper for one doctype, precomputed at construction."""
+
+	def __init__(self, doctype, field_map=None, id_field=None, finish_record=None):
+		"""
+		Args:
+			doctype: DocType the mapper serves
+			field_map: mobile field -> Frappe field (a MOBILE_FIELD_MAP entry)
+			id_field: Frappe field holding the mobile id (an ID_FIELD_MAP entry)
+			finish_record: optional callable applied to records after `to_mobile`
+		"""
+		self.doctype = doctype
+		self.forward = dict(field_map or {})
+		self.reverse = {v: k for k, v in self.forward.items()}
+		self.id_field = id_field
+		# first mobile field mapping to the id field, as the mobile id
+		self.mobile_id_field = next((k for k, v in self.forward.items() if v == id_field), None)
+		self.finish_record = finish_record
+		self.normalize = DOC_NORMALIZERS.get(doctype)
+		self.doc_skip = DOC_SKIP_FIELDS | DOC_OMIT_FIELDS.get(doctype, frozenset())
+
+		transforms = CHILD_TRANSFORMS.get(doctype, {})
+		self.to_mobile_transforms = {field: pair[0] for field, pair in transforms.items()}
+		self.to_doc_transforms = {field: pair[1] for field, pair in transforms.items()}
+
+		self.doc_renames = dict(self.reverse)
+		self.doc_renames.update(DOC_RENAMES)
+		self.payload_renames = dict(self.forward)
+		self.payload_renames.update(PAYLOAD_RENAMES)
+
+	def to_mobile(self, doc_dict):
+		"""Map a Frappe document dict to the mobile record shape."""
+		doc_dict = doc_dict or {}
+		renames = self.doc_renames
+		transforms = self.to_mobile_transforms
+		skip = self.doc_skip
+		result = {}
+		for key, value in doc_dict.items():
+			if key in skip:
+				continue
+			transform = transforms.get(key)
+			if transform is not None:
+				result[key] = transform(value)
+				continue
+			result[renames.get(key, key)] = value
+
+		# ensure id fields returned
+		if self.mobile_id_field and self.id_field in doc_dict:
+			result[self.mobile_id_field] = doc_dict.get(self.id_field)
+		if self.finish_record:
+			self.finish_record(result)
+		return result
+
+	def map_many(self, records):
+		"""Map a batch of Frappe document dicts to mobile records."""
+		to_mobile = self.to_mobile
+		return [to_mobile(record) for record in records or []]
+
+	def to_doc(self, payload):
+		"""Map a mobile payload to Frappe field names (without meta filtering)."""
+		renames = self.payload_renames
+		transforms = self.to_doc_transforms
+		result = {}
+		for key, value in (payload or {}).items():
+			if key in PAYLOAD_SKIP_FIELDS:
+				continue
+			transform = transforms.get(key)
+			if transform is not None:
+				result[key] = transform(value)
+				continue
+			result[renames.get(key, key)] = value
+
+		if self.normalize:
+			self.normalize(result)
+		return result
@@ -0,0 +1,513 @@
+# Copyright (c) 2026, NASECO and contributors
+# For license information, please see license.txt
+
+"""
+Batched push pipeline for records sent by the mobile app.
+
+All records of a push are normalized and mapped up front, then grouped by
+doctype so the names and `modified` timestamps of the documents that already
+exist are read with one `IN (...)` query per doctype. Conflict checks run
+against that in-memory map, and documents are created or updated in a single
+pass. Round trips for the bookkeeping depend on the number of doctypes in the
+batch, not on the number of records.
+
+Each record runs inside its own savepoint, so a failing record rolls back only
+its own writes, and the transaction is committed every `sync_push_commit_every`
+records (site config, DEFAULT_COMMIT_EVERY by default) to keep lock hold times
+short while many devices push at once.
+
+Records are applied in dependency order rather than arrival order: upserts of
+doctypes that others link to (Outgrower before Farm Plot before Crop Cycle, ...)
+go first and deletes run last in the reverse order, so a whole offline backlog
+passes Link validation in one push. Results keep the order of the request.
+
+New records of append-only doctypes take the bulk path in `sync.ingest`.
+
+Both push endpoints feed this pipeline. Store-style records
+(`{storeName, recordId, payload, operation}`) are mapped from the mobile field
+names; legacy `bulk_sync` records (`{doctype, operation, doc}` with
+CREATE/UPDATE/DELETE) already use Frappe field names and skip the conflict
+check, as before.
+"""
+
+import json
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import groupby
+
+import frappe
+from frappe.utils import cint
+
+from naseco_fieldopsbackend import api
+from naseco_fieldopsbackend.media.uploads import MissingPhotoError, resolve_photo_refs
+from naseco_fieldopsbackend.naseco_fieldopsbackend.doctype.stage_input_request.stage_input_request import (
+	get_pending_deltas,
+	restore_pending_deltas,
+)
+from naseco_fieldopsbackend.sync import idempotency, journal
+from naseco_fieldopsbackend.sync.hydration import chunked
+from naseco_fieldopsbackend.sync.ingest import BulkIngest, get_append_only_doctypes
+
+LEGACY_OPERATIONS = ("CREATE", "UPDATE", "DELETE")
+
+PUSH_SAVEPOINT = "sync_push_record"
+DEFAULT_COMMIT_EVERY = 100
+
+
+def get_commit_every():
+	return max(cint(frappe.conf.get("sync_push_commit_every", DEFAULT_COMMIT_EVERY)), 1)
+
+
+@contextmanager
+def record_savepoint():
+	"""Run one record's writes in a savepoint that is rolled back if the block raises."""
+	deltas, entries = get_pending_deltas(), journal.get_pending()
+	frappe.db.savepoint(PUSH_SAVEPOINT)
+	try:
+		yield
+	except Exception:
+		frappe.db.rollback(save_point=PUSH_SAVEPOINT)
+		# journal entries and queued fulfillment deltas of the record go with it
+		journal.restore_pending(entries)
+		restore_pending_deltas(deltas)
+		raise
+	else:
+		frappe.db.release_savepoint(PUSH_SAVEPOINT)
+
+
+# doctype -> (doctypes its Link fields point to, those of its mandatory Link fields)
+_link_targets = {}
+
+
+def get_link_targets(doctype):
+	targets = _link_targets.get(doctype)
+	if targets is None:
+		fields = [
+			df for df in frappe.get_meta(doctype).get_link_fields() if df.options and df.options != doctype
+		]
+		targets = _link_targets[doctype] = (
+			frozenset(df.options for df in fields),
+			frozenset(df.options for df in fields if df.reqd),
+		)
+	return targets
+
+
+def _reachable(doctype, depends_on, pending):
+	"""Pending doctypes `doctype` depends on, directly or through others."""
+	seen, stack = set(), [doctype]
+	while stack:
+		for target in depends_on[stack.pop()] & pending:
+			if target not in seen:
+				seen.add(target)
+				stack.append(target)
+	return seen
+
+
+def _break_cycle(doctypes, depends_on, required, pending):
+	"""
+	Doctypes to release when every pending doctype waits on another one.
+
+	Only doctypes whose unmet links all lead back to themselves, i.e. that wait
+	on nothing but their own cycle, are released; of those, the ones whose
+	mandatory links are met go first (Crop Cycle before Crop Cycle Stage, whose
+	`crop_cycle` is mandatory while `current_stage` is not).
+	"""
+	reachable = {doctype: _reachable(doctype, depends_on, pending) for doctype in pending}
+	in_cycle = [
+		doctype
+		for doctype in doctypes
+		if doctype in pending and all(doctype in reachable[target] for target in reachable[doctype])
+	]
+	return [doctype for doctype in in_cycle if not required[doctype] & pending] or in_cycle
+
+
+def dependency_rank(doctypes):
+	"""Map each doctype to its position in an order where linked-to doctypes come first."""
+	doctypes = list(dict.fromkeys(doctypes))
+	pending = set(doctypes)
+	depends_on, required = {}, {}
+	for doctype in doctypes:
+		targets, mandatory = get_link_targets(doctype)
+		depends_on[doctype], required[doctype] = targets & pending, mandatory & pending
+
+	rank = {}
+	while pending:
+		ready = [doctype for doctype in doctypes if doctype in pending and not depends_on[doctype] & pending]
+		if not ready:
+			ready = _break_cycle(doctypes, depends_on, required, pending)
+		for doctype in ready:
+			rank[doctype] = len(rank)
+			pending.discard(doctype)
+	return rank
+
+
+def is_store_record(record):
+	return bool(record.get("storeName") or record.get("store_name") or record.get("payload"))
+
+
+def record_doctype(record):
+	if not is_store_record(record):
+		return record.get("doctype")
+	store = record.get("storeName") or record.get("store_name") or record.get("doctype")
+	return api._resolve_doctype(store)
+
+
+def _application_key(rank, doctype, operation, index):
+	if operation == "DELETE":
+		# children are deleted before the documents they link to
+		return (1, -rank.get(doctype, 0), index)
+	return (0, rank.get(doctype, 0), index)
+
+
+def dependency_order(records):
+	"""Indexes of `records` in the order the pipeline applies them."""
+	doctypes, operations = [], []
+	for record in records:
+		try:
+			doctypes.append(record_doctype(record))
+			operations.append((record.get("operation") or "SYNC").upper())
+		except Exception:
+			doctypes.append(None)
+			operations.append(None)
+
+	rank = dependency_rank([doctype for doctype in doctypes if doctype])
+	return sorted(range(len(records)), key=lambda i: _application_key(rank, doctypes[i], operations[i], i))
+
+
+class ChunkedCommit:
+	"""Commit after every `every` processed records."""
+
+	def __init__(self, every=None):
+		# 0 leaves every commit to the caller
+		self.every = get_commit_every() if every is None else every
+		self.pending = 0
+
+	def step(self):
+		self.pending += 1
+		if self.every and self.pending >= self.every:
+			frappe.db.commit()
+			self.pending = 0
+
+
+class PushItem:
+	"""One incoming record, normalized to the Frappe doctype and field names."""
+
+	__slots__ = (
+		"doctype",
+		"error",
+		"force",
+		"index",
+		"key",
+		"legacy",
+		"mapped",
+		"name",
+		"operation",
+		"payload",
+		"record",
+		"replayed",
+	)
+
+	def __init__(self, index, record):
+		self.index = index
+		self.record = record
+		self.replayed = None
+		self.doctype = None
+		self.payload = {}
+		self.operation = None
+		self.name = None
+		self.mapped = None
+		self.force = None
+		self.error = None
+		if isinstance(record, dict):
+			self.legacy = not is_store_record(record)
+			self.key = idempotency.get_record_key(record)
+		else:
+			self.legacy = False
+			self.key = None
+			self.error = frappe.ValidationError(f"Record {index} is not an object")
+
+	def result(self, status, name=None, **extra):
+		result = {"status": status, "doctype": self.doctype, "name": name}
+		if self.legacy:
+			result["operation"] = self.operation
+		result.update(extra)
+		return result
+
+	def record_id(self):
+		"""Name of the record as sent, for results of records that failed before mapping."""
+		if self.name or not isinstance(self.record, dict):
+			return self.name
+		payload = self.record.get("payload") or self.record.get("doc")
+		if not isinstance(payload, dict):
+			payload = {}
+		return self.record.get("recordId") or payload.get("id") or payload.get("name")
+
+	def error_result(self, error):
+		doctype = self.doctype
+		if doctype is None and isinstance(self.record, dict):
+			doctype = self.record.get("doctype")
+		result = {"status": "error", "doctype": doctype, "name": self.record_id(), "error": str(error)}
+		if getattr(error, "retryable", False):
+			result["retryable"] = True
+		return result
+
+
+class PushPipeline:
+	def __init__(self, records, user=None, commit_every=None):
+		self.user = user or frappe.session.user
+		self.commit_every = commit_every
+		self.items = [self.prepare(index, record) for index, record in enumerate(records or [])]
+		# doctype -> {name: modified} for documents that exist on the server
+		self.existing = {}
+		self.append_only = get_append_only_doctypes()
+
+	def prepare(self, index, record):
+		item = PushItem(index, record)
+		if item.error:
+			return item
+		try:
+			item.doctype = record_doctype(record)
+			if item.legacy:
+				return self.prepare_legacy(item)
+
+			payload = record.get("payload") or record.get("doc") or {}
+			if item.doctype == "Outgrower":
+				payload = api._normalize_outgrower_payload(payload)
+			item.payload = payload
+			item.operation = (record.get("operation") or "SYNC").upper()
+			item.force = record.get("force") or payload.get("force")
+			record_id = record.get("recordId") or payload.get("id") or payload.get("name")
+
+			if item.operation == "DELETE":
+				item.name = record_id
+				return item
+
+			mapped = api._map_mobile_to_doc(item.doctype, payload)
+			id_field = api.ID_FIELD_MAP.get(item.doctype)
+			if record_id:
+				mapped["name"] = record_id
+			elif id_field and mapped.get(id_field):
+				mapped["name"] = mapped[id_field]
+			mapped["doctype"] = item.doctype
+			item.mapped = mapped
+			item.name = mapped.get("name")
+		except Exception as e:
+			item.error = e
+		return item
+
+	def prepare_legacy(self, item):
+		doc_data = item.record.get("doc") or {}
+		if item.doctype == "Outgrower":
+			doc_data = api._normalize_outgrower_payload(doc_data)
+		item.payload = doc_data
+		item.operation = (item.record.get("operation") or "").upper()
+		item.force = True
+		item.name = doc_data.get("name")
+		item.mapped = dict(doc_data, doctype=item.doctype)
+		return item
+
+	def load_replays(self):
+		"""Attach stored results to records that were already applied by an earlier push."""
+		for item in self.items:
+			if item.key:
+				item.replayed = idempotency.get_record_result(item.key)
+
+	def prefetch(self):
+		"""Read existing names and `modified` with one query per doctype (per chunk)."""
+		names_by_doctype = {}
+		for item in self.items:
+			if item.error is None and item.replayed is None and item.name:
+				names_by_doctype.setdefault(item.doctype, set()).add(item.name)
+
+		for doctype, names in names_by_doctype.items():
+			existing = self.existing.setdefault(doctype, {})
+			for chunk in chunked(sorted(names)):
+				for row in frappe.get_all(
+					doctype, filters={"name": ["in", chunk]}, fields=["name", "modified"]
+				):
+					existing[row.name] = row.modified
+
+	def exists(self, doctype, name):
+		return bool(name) and name in self.existing.get(doctype, {})
+
+	def run(self):
+		self.load_replays()
+		self.prefetch()
+		self.resolve_photos()
+		commit = ChunkedCommit(self.commit_every)
+		results = [None] * len(self.items)
+		# items of one doctype and operation are contiguous in application order
+		for _, group in groupby(
+			self.ordered_items(), key=lambda item: (item.operation == "DELETE", item.doctype)
+		):
+			group = list(group)
+			bulk = [item for item in group if self.takes_bulk_path(item)]
+			if bulk:
+				for chunk in chunked(bulk, commit.every or len(bulk)):
+					for item, result in self.ingest(chunk):
+						results[item.index] = result
+						commit.step()
+			for item in group:
+				if results[item.index] is None:
+					results[item.index] = self.apply(item)
+					commit.step()
+		return results
+
+	def resolve_photos(self):
+		"""Swap photo hash references for file URLs; records with photos not uploaded yet fail."""
+		items = [item for item in self.items if item.mapped and item.error is None and item.replayed is None]
+		for item, missing in zip(items, resolve_photo_refs(item.mapped for item in items), strict=True):
+			if missing:
+				item.error = MissingPhotoError(f"Photos not uploaded yet: {', '.join(sorted(missing))}")
+
+	def ordered_items(self):
+		rank = dependency_rank(
+			item.doctype for item in self.items if item.error is None and item.replayed is None
+		)
+		return sorted(
+			self.items, key=lambda item: _application_key(rank, item.doctype, item.operation, item.index)
+		)
+
+	def apply(self, item):
+		if item.replayed is not None:
+			return dict(item.replayed, replayed=True)
+		if item.error is not None:
+			return item.error_result(item.error)
+		if item.legacy and item.operation not in LEGACY_OPERATIONS:
+			api.log_sync(self.user, item.doctype, item.name, item.operation, "error")
+			return item.result("error", message=f"Unknown operation: {item.operation}")
+		try:
+			with record_savepoint():
+				if item.operation == "DELETE":
+					result = self.delete(item)
+				else:
+					result = self.upsert(item)
+		except Exception as e:
+			return item.error_result(e)
+
+		if item.key:
+			idempotency.remember_record_result(item.key, result)
+		return result
+
+	def takes_bulk_path(self, item):
+		return (
+			item.error is None
+			and item.replayed is None
+			and item.operation != "DELETE"
+			and not (item.legacy and item.operation not in LEGACY_OPERATIONS)
+			and item.doctype in self.append_only
+			and not self.exists(item.doctype, item.name)
+		)
+
+	def ingest(self, items):
+		"""
+		Insert new append-only records in bulk; yields (item, result).
+
+		Records rejected by validation get an error result; if the bulk write
+		itself fails the chunk falls back to the regular per-record path.
+		"""
+		bulk = BulkIngest(items[0].doctype)
+		built = []
+		for item in items:
+			try:
+				built.append((item, bulk.build(item.mapped)))
+			except Exception as e:
+				yield item, item.error_result(e)
+
+		link_errors = bulk.validate_links([doc for _, doc in built])
+		valid = []
+		for item, doc in built:
+			error = link_errors.get(doc.name)
+			if error:
+				yield item, item.error_result(error)
+			else:
+				valid.append((item, doc))
+
+		try:
+			with record_savepoint():
+				bulk.write([doc for _, doc in valid])
+		except Exception:
+			for item, _ in valid:
+				yield item, self.apply(item)
+			return
+
+		for item, doc in valid:
+			self.existing.setdefault(item.doctype, {})[doc.name] = doc.modified
+			api.log_sync(self.user, item.doctype, doc.name, item.operation, "Success")
+			result = item.result("success", doc.name)
+			if item.key:
+				idempotency.remember_record_result(item.key, result)
+			yield item, result
+
+	def delete(self, item):
+		if self.exists(item.doctype, item.name):
+			frappe.delete_doc(item.doctype, item.name, ignore_permissions=True)
+			self.existing[item.doctype].pop(item.name, None)
+			status = "success" if item.legacy else "deleted"
+			result = item.result(status, item.name)
+		elif item.legacy:
+			status = "not_found"
+			result = item.result(status, message=f"Document {item.doctype} {item.name} not found")
+		else:
+			status = "deleted"
+			result = item.result(status, item.name)
+		api.log_sync(self.user, item.doctype, item.name, "DELETE", status)
+		return result
+
+	def upsert(self, item):
+		doctype = item.doctype
+		# legacy CREATE always inserts, as bulk_sync did
+		if item.operation != "CREATE" and self.exists(doctype, item.name):
+			conflict = self.check_conflict(item, self.existing[doctype][item.name])
+			if conflict:
+				return conflict
+			doc = frappe.get_doc(doctype, item.name)
+			doc.update(item.mapped)
+			doc.save(ignore_permissions=True)
+		else:
+			doc = frappe.get_doc(item.mapped)
+			doc.insert(ignore_permissions=True)
+
+		self.existing.setdefault(doctype, {})[doc.name] = doc.modified
+		api.log_sync(self.user, doctype, doc.name, item.operation, "Success")
+		return item.result("success", doc.name)
+
+	def check_conflict(self, item, server_modified):
+		"""Return a conflict result when the server copy is newer than the client's `updatedAt`."""
+		client_modified = item.payload.get("updatedAt")
+		if not client_modified or item.force:
+			return None
+
+		client_dt = datetime.fromisoformat(str(client_modified).replace("Z", "+00:00"))
+		if not server_modified or not server_modified > client_dt:
+			return None
+
+		# Log conflict for manual resolution
+		try:
+			doc = frappe.get_doc(item.doctype, item.name)
+			frappe.get_doc(
+				{
+					"doctype": "Sync Conflict",
+					"doctype_name": item.doctype,
+					"doc_name": doc.name,
+					"user": self.user,
+					"mobile_data": json.dumps(
+						{"modified": client_dt.isoformat(), "payload": item.payload}, default=str
+					),
+					"server_data": json.dumps(
+						{"modified": server_modified.isoformat(), "doc": doc.as_dict()}, default=str
+					),
+					"resolution": "Pending",
+					"resolved": 0,
+				}
+			).insert(ignore_permissions=True)
+		except Exception:
+			frappe.log_error(f"Failed to log conflict for {item.doctype} {item.name}")
+
+		api.log_sync(self.user, item.doctype, item.name, item.operation, "Conflict")
+		return item.result("conflict", item.name)
+
+
+def run_push(records, user=None, commit_every=None):
+	"""Apply a list of pushed records and return the per-record results in request order."""
+	return PushPipeline(records, user=user, commit_every=commit_every).run()
@@ -0,0 +1,172 @@
+# Copyright (c) 2026, NASECO and contributors
+# For license information, please see license.txt
+
+"""
+Background processing for large push batches.
+
+Batches pushed to `push_sync_data` with at least `sync_push_async_threshold`
+records (site config, DEFAULT_ASYNC_THRESHOLD by default; 0 disables it), or
+to either push endpoint with `async: 1`, are stored in a `Sync Push Job` and
+processed by a worker on the `sync` queue, or on `long` when no sync worker is
+configured. `bulk_sync` callers expect the results in the reply, so their
+batches only go to the background when they ask for it. The worker
+applies the records in chunks of `sync_push_commit_every` and saves progress
+and results with each chunk's commit. A job left Running by a worker that died
+is queued again by `requeue_stale_jobs` once it has not saved progress for
+`sync_push_stale_minutes` (site config, DEFAULT_STALE_MINUTES), and resumes
+after its last committed chunk. Clients poll `get_push_status` with the
+returned job id.
+
+The batch is stored in dependency order (see `push.dependency_order`) so
+every chunk can link to records of earlier chunks. Each record is stored with
+its position in the request, as `[index, record]`, and so is each result;
+`get_status` returns the results in request order.
+"""
+
+import json
+
+import frappe
+from frappe import _
+from frappe.utils import add_to_date, cint, now_datetime
+
+from naseco_fieldopsbackend.sync import push
+from naseco_fieldopsbackend.sync.log_buffer import buffered_sync_log
+
+PUSH_JOB_DOCTYPE = "Sync Push Job"
+DEFAULT_ASYNC_THRESHOLD = 500
+SYNC_QUEUE = "sync"
+FALLBACK_QUEUE = "long"
+# a Running job that saved no progress for this long has lost its worker
+DEFAULT_STALE_MINUTES = 30
+
+
+def get_async_threshold():
+	return cint(frappe.conf.get("sync_push_async_threshold", DEFAULT_ASYNC_THRESHOLD))
+
+
+def should_enqueue(records, payload=None, by_size=True):
+	"""
+	True when the batch should be processed in the background.
+
+	Args:
+		by_size: also queue batches over the async threshold; without it only
+			an explicit `async: 1` in the payload does
+	"""
+	if isinstance(payload, dict) and payload.get("async") is not None:
+		return bool(cint(payload.get("async")))
+	if not by_size:
+		return False
+	threshold = get_async_threshold()
+	return threshold > 0 and len(records) >= threshold
+
+
+def get_queue():
+	from frappe.utils.background_jobs import get_queues_timeout
+
+	queue = frappe.conf.get("sync_push_queue") or SYNC_QUEUE
+	return queue if queue in get_queues_timeout() else FALLBACK_QUEUE
+
+
+def get_stale_minutes():
+	return cint(frappe.conf.get("sync_push_stale_minutes", DEFAULT_STALE_MINUTES))
+
+
+def _enqueue_job(push_job):
+	frappe.enqueue(
+		"naseco_fieldopsbackend.sync.push_jobs.process_push_job",
+		queue=get_queue(),
+		push_job=push_job,
+		enqueue_after_commit=True,
+	)
+
+
+def enqueue_push(records, batch_key=None):
+	"""Store the batch, queue it and return the acknowledgement sent to the client."""
+	entries = [[index, records[index]] for index in push.dependency_order(records)]
+	job = frappe.get_doc(
+		{
+			"doctype": PUSH_JOB_DOCTYPE,
+			"status": "Queued",
+			"user": frappe.session.user,
+			"batch_key": batch_key,
+			"total_records": len(records),
+			"processed_records": 0,
+			"payload": json.dumps(entries),
+		}
+	).insert(ignore_permissions=True)
+
+	_enqueue_job(job.name)
+	return {"success": True, "queued": True, "job_id": job.name, "total": len(records)}
+
+
+def process_push_job(push_job):
+	"""Worker entry point."""
+	job = frappe.get_doc(PUSH_JOB_DOCTYPE, push_job)
+	if job.status in ("Completed", "Failed"):
+		return
+
+	entries = json.loads(job.payload or "[]")
+	results = json.loads(job.results or "[]")
+	job.db_set({"status": "Running", "started_at": job.started_at or now_datetime()}, commit=True)
+
+	size = push.get_commit_every()
+	try:
+		with buffered_sync_log():
+			for offset in range(len(results), len(entries), size):
+				chunk = entries[offset : offset + size]
+				records = [record for _index, record in chunk]
+				chunk_results = push.run_push(records, user=job.user, commit_every=0)
+				results.extend(
+					[index, result] for (index, _record), result in zip(chunk, chunk_results, strict=True)
+				)
+				job.db_set({"processed_records": len(results), "results": json.dumps(results)})
+				frappe.db.commit()
+
+		job.db_set(
+			{"status": "Completed", "finished_at": now_datetime(), "payload": None},
+			commit=True,
+		)
+	except Exception as e:
+		frappe.db.rollback()
+		job.db_set({"status": "Failed", "finished_at": now_datetime(), "error": str(e)}, commit=True)
+		frappe.log_error(title=f"Sync push job {push_job} failed")
+
+
+def requeue_stale_jobs():
+	"""Scheduler: queue Running jobs again whose worker died, to resume after their last chunk."""
+	cutoff = add_to_date(now_datetime(), minutes=-get_stale_minutes())
+	stale = frappe.get_all(
+		PUSH_JOB_DOCTYPE, filters={"status": "Running", "modified": ["<", cutoff]}, pluck="name"
+	)
+	for push_job in stale:
+		frappe.db.set_value(PUSH_JOB_DOCTYPE, push_job, "status", "Queued")
+		_enqueue_job(push_job)
+	frappe.db.commit()
+
+
+def get_status(job_id):
+	job = frappe.db.get_value(
+		PUSH_JOB_DOCTYPE,
+		job_id,
+		["name", "status", "user", "total_records", "processed_records", "results", "error"],
+		as_dict=True,
+	)
+	if not job:
+		frappe.throw(_("Push job {0} not found").format(job_id), frappe.DoesNotExistError)
+	if job.user != frappe.session.user and "System Manager" not in frappe.get_roles():
+		frappe.throw(_("Not permitted"), frappe.PermissionError)
+
+	# request order; records not applied yet have no result
+	results = [None] * cint(job.total_records)
+	for index, result in json.loads(job.results or "[]"):
+		results[index] = result
+
+	return {
+		"success": job.status != "Failed",
+		"job_id": job.name,
+		"status": job.status,
+		"total": job.total_records,
+		"processed": job.processed_records,
+		"results": results,
+		"error": job.error,
+	}
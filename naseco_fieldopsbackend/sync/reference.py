@@ -0,0 +1,121 @@
+# Copyright (c) 2026, NASECO and contributors
+# For license information, please see license.txt
+
+"""
+Versioned reference-data snapshots.
+
+Reference doctypes change a few times a season but are read on every sync. Each
+snapshot is built once, stored in the redis cache together with a content hash
+and rebuilt only after one of its doctypes changes. Clients send the hash they
+hold and get a small "unchanged" reply while it still matches.
+
+Snapshots are dropped when the changing transaction commits, not when the
+document is saved: dropping earlier lets a concurrent rebuild cache the
+pre-change rows again, where they would stay until the next reference edit.
+
+Only slow-changing doctypes belong here. Transactional ones such as Crop Cycle
+Stage would drop the snapshot on nearly every push; they are pulled through the
+journal and incremental sync instead.
+"""
+
+import hashlib
+import json
+
+import frappe
+from frappe.utils.response import json_handler
+
+CACHE_KEY = "naseco_fieldops:reference_snapshot"
+
+# Snapshot kinds and the doctypes each one is built from
+SNAPSHOT_DOCTYPES = {
+	# mobile-mapped stores sent with get_sync_data
+	"mobile": [
+		"Crop",
+		"Crop Variety",
+		"Season",
+		"Crop Recipe",
+		"Visit Type",
+		"Region",
+		"Unit",
+		"Inspection Attribute",
+	],
+	# raw rows keyed by doctype, returned by get_reference_data
+	"raw": [
+		"Crop",
+		"Crop Variety",
+		"Season",
+		"Crop Recipe",
+		"Visit Type",
+		"Region",
+		"Unit",
+		"Inspection Attribute",
+	],
+}
+
+# Still part of a full get_reference_data reply, but read live outside the
+# snapshot: they change too often to cache (see the module docstring)
+LIVE_DOCTYPES = ["Crop Cycle Stage"]
+
+
+def content_hash(data):
+	raw = json.dumps(data, sort_keys=True, separators=(",", ":"), default=json_handler)
+	return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def get_snapshot(kind, builder):
+	"""
+	Return `{"hash": ..., "data": ...}` for a snapshot kind, building it on a miss.
+
+	Args:
+		kind: key of SNAPSHOT_DOCTYPES
+		builder: callable taking the doctype list and returning the snapshot data
+	"""
+	cache = frappe.cache()
+	snapshot = cache.hget(CACHE_KEY, kind)
+	if snapshot:
+		return snapshot
+
+	data = builder(SNAPSHOT_DOCTYPES[kind])
+	snapshot = {"hash": content_hash(data), "data": data}
+	cache.hset(CACHE_KEY, kind, snapshot)
+	return snapshot
+
+
+def get_client_hash(reference_hash=None):
+	"""Return the hash the client holds, from the argument or an If-None-Match header."""
+	if reference_hash:
+		return str(reference_hash).strip('"')
+	request = getattr(frappe, "request", None)
+	if request is not None and request.headers.get("If-None-Match"):
+		return request.headers.get("If-None-Match").strip('"')
+	return None
+
+
+def set_etag(value):
+	headers = getattr(frappe.local, "response_headers", None)
+	if headers is not None and value:
+		headers["ETag"] = f'"{value}"'
+
+
+def invalidate_reference_snapshot(doc, method=None, *args):
+	"""doc_events hook: drop every snapshot built from the changed doctype once the change commits."""
+	kinds = [kind for kind, doctypes in SNAPSHOT_DOCTYPES.items() if doc.doctype in doctypes]
+	if not kinds:
+		return
+	pending = frappe.flags.reference_snapshot_pending
+	if pending is None:
+		pending = frappe.flags.reference_snapshot_pending = set()
+		frappe.db.after_commit.add(_drop_pending)
+		frappe.db.after_rollback.add(_clear_pending)
+	pending.update(kinds)
+
+
+def _drop_pending():
+	pending = frappe.flags.reference_snapshot_pending or ()
+	frappe.flags.reference_snapshot_pending = None
+	for kind in pending:
+		frappe.cache().hdel(CACHE_KEY, kind)
+
+
+def _clear_pending():
+	frappe.flags.reference_snapshot_pending = None
@@ -0,0 +1,204 @@
+# Copyright (c) 2026, NASECO and contributors
+# For license information, please see license.txt
+
+"""
+Retention, rollup and archival for sync bookkeeping tables.
+
+Runs daily from the scheduler:
+
+1. Sync Log rows older than `sync_log_rollup_after_days` are rolled up into
+   hourly per-user / per-doctype `Sync Log Summary` rows and deleted.
+2. Resolved Sync Conflicts older than `sync_conflict_archive_after_days` are
+   written to gzip-compressed JSON-lines private files and deleted.
+3. Summaries older than `sync_log_summary_retention_days`, change-journal
+   entries older than `sync_change_retention_days` and finished push jobs
+   older than `sync_push_job_retention_days` are deleted.
+4. Photo uploads left unfinished for `photo_upload_retention_days` are removed.
+
+Every step works in batches of RETENTION_BATCH_SIZE rows with a commit after
+each batch, so no run holds long locks, and stops after RETENTION_MAX_BATCHES.
+"""
+
+import gzip
+import json
+import os
+import shutil
+
+import frappe
+from frappe.utils import add_days, cint, get_datetime, now_datetime
+from frappe.utils.response import json_handler
+
+from naseco_fieldopsbackend.media.uploads import get_upload_root
+from naseco_fieldopsbackend.sync.journal import JOURNAL_DOCTYPE, PURGED_SEQ_KEY
+from naseco_fieldopsbackend.sync.push_jobs import PUSH_JOB_DOCTYPE
+
+RETENTION_BATCH_SIZE = 5000
+RETENTION_MAX_BATCHES = 100
+
+DEFAULT_SETTINGS = {
+	"sync_log_rollup_after_days": 7,
+	"sync_conflict_archive_after_days": 30,
+	"sync_log_summary_retention_days": 365,
+	"sync_change_retention_days": 90,
+	"sync_push_job_retention_days": 7,
+	"photo_upload_retention_days": 2,
+}
+
+STATUS_COUNTERS = {
+	"Success": "success_count",
+	"Failed": "failed_count",
+	"Conflict": "conflict_count",
+}
+
+
+def get_setting(key):
+	return cint(frappe.conf.get(key, DEFAULT_SETTINGS[key]))
+
+
+def _cutoff(key):
+	return add_days(now_datetime(), -get_setting(key))
+
+
+def run_retention():
+	"""Scheduler entry point."""
+	for step in (
+		rollup_sync_logs,
+		archive_resolved_conflicts,
+		purge_log_summaries,
+		purge_change_journal,
+		purge_push_jobs,
+		purge_stale_uploads,
+	):
+		try:
+			step()
+		except Exception:
+			frappe.db.rollback()
+			frappe.log_error(title=f"Sync retention: {step.__name__} failed")
+
+
+def _batches(doctype, filters, fields, order_by="creation asc"):
+	"""Yield batches of rows matching `filters`; callers delete each batch before the next."""
+	for _ in range(RETENTION_MAX_BATCHES):
+		rows = frappe.get_all(
+			doctype,
+			filters=filters,
+			fields=fields,
+			order_by=order_by,
+			limit_page_length=RETENTION_BATCH_SIZE,
+		)
+		if not rows:
+			return
+		yield rows
+		if len(rows) < RETENTION_BATCH_SIZE:
+			return
+
+
+def _delete_names(doctype, names):
+	frappe.db.delete(doctype, {"name": ("in", names)})
+
+
+def rollup_sync_logs():
+	cutoff = _cutoff("sync_log_rollup_after_days")
+	for rows in _batches(
+		"Sync Log",
+		[["creation", "<", cutoff]],
+		["name", "creation", "sync_timestamp", "user", "doctype_name", "status"],
+	):
+		buckets = {}
+		for row in rows:
+			ts = get_datetime(row.sync_timestamp or row.creation)
+			period = ts.replace(minute=0, second=0, microsecond=0)
+			key = (period, row.user, row.doctype_name)
+			counts = buckets.setdefault(key, dict.fromkeys(STATUS_COUNTERS.values(), 0))
+			counts[STATUS_COUNTERS.get(row.status, "failed_count")] += 1
+
+		for (period, user, doctype_name), counts in buckets.items():
+			_add_to_summary(period, user, doctype_name, counts)
+
+		_delete_names("Sync Log", [row.name for row in rows])
+		frappe.db.commit()
+
+
+def _add_to_summary(period, user, doctype_name, counts):
+	existing = frappe.db.get_value(
+		"Sync Log Summary",
+		{"period_start": period, "user": user, "doctype_name": doctype_name},
+		"name",
+	)
+	if existing:
+		frappe.db.sql(
+			"""update `tabSync Log Summary`
+			set `success_count` = `success_count` + %(success_count)s,
+				`failed_count` = `failed_count` + %(failed_count)s,
+				`conflict_count` = `conflict_count` + %(conflict_count)s
+			where `name` = %(name)s""",
+			dict(counts, name=existing),
+		)
+		return
+
+	frappe.get_doc(
+		dict(
+			counts,
+			doctype="Sync Log Summary",
+			period_start=period,
+			user=user,
+			doctype_name=doctype_name,
+		)
+	).insert(ignore_permissions=True)
+
+
+def archive_resolved_conflicts():
+	cutoff = _cutoff("sync_conflict_archive_after_days")
+	for rows in _batches(
+		"Sync Conflict",
+		[["resolved", "=", 1], ["modified", "<", cutoff]],
+		["*"],
+		order_by="modified asc",
+	):
+		lines = "".join(json.dumps(row, default=json_handler) + "\n" for row in rows)
+		stamp = now_datetime().strftime("%Y%m%d%H%M%S%f")
+		frappe.get_doc(
+			{
+				"doctype": "File",
+				"file_name": f"sync_conflicts_{stamp}.jsonl.gz",
+				"is_private": 1,
+				"content": gzip.compress(lines.encode("utf-8")),
+			}
+		).insert(ignore_permissions=True)
+
+		_delete_names("Sync Conflict", [row.name for row in rows])
+		frappe.db.commit()
+
+
+def purge_log_summaries():
+	cutoff = _cutoff("sync_log_summary_retention_days")
+	for rows in _batches("Sync Log Summary", [["period_start", "<", cutoff]], ["name"], "period_start asc"):
+		_delete_names("Sync Log Summary", [row.name for row in rows])
+		frappe.db.commit()
+
+
+def purge_change_journal():
+	cutoff = _cutoff("sync_change_retention_days")
+	for rows in _batches(JOURNAL_DOCTYPE, [["creation", "<", cutoff]], ["name"], "name asc"):
+		names = [row.name for row in rows]
+		_delete_names(JOURNAL_DOCTYPE, names)
+		frappe.db.set_global(PURGED_SEQ_KEY, max(int(name) for name in names))
+		frappe.db.commit()
+
+
+def purge_push_jobs():
+	cutoff = _cutoff("sync_push_job_retention_days")
+	filters = [["status", "in", ["Completed", "Failed"]], ["modified", "<", cutoff]]
+	for rows in _batches(PUSH_JOB_DOCTYPE, filters, ["name"], "modified asc"):
+		_delete_names(PUSH_JOB_DOCTYPE, [row.name for row in rows])
+		frappe.db.commit()
+
+
+def purge_stale_uploads():
+	root = get_upload_root()
+	if not os.path.isdir(root):
+		return
+	cutoff = _cutoff("photo_upload_retention_days").timestamp()
+	for entry in os.scandir(root):
+		if entry.is_dir() and entry.stat().st_mtime < cutoff:
+			shutil.rmtree(entry.path, ignore_errors=True)
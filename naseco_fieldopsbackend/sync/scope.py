@@ -0,0 +1,165 @@
+# Copyright (c) 2026, NASECO and contributors
+# For license information, please see license.txt
+
+"""
+Assignment-scoped sync graph.
+
+An officer's portfolio starts from the outgrowers assigned to them
+(`assigned_to` / `assigned_supervisor`, plus a region when one is requested)
+and follows the Link fields down the graph:
+
+	Outgrower -> Farm Plot -> Crop Cycle -> Crop Cycle Stage / Field Visit /
+	Finding / Stage Activity / Stage Input Request -> Stage Input Dispatch
+
+Only the root set, the names of the user's assigned outgrowers, is cached per
+user. Every other level is a filter with nested subqueries over the level
+above it, so new plots, cycles and visits are in scope as soon as they are
+committed and never need an invalidation. The cached roots are dropped after
+commit, for the users an Outgrower's assignment moves from and to.
+
+Users who are neither assigned an outgrower nor request a region get an empty
+scope; only Administrator and UNSCOPED_ROLES pull the whole country.
+"""
+
+import frappe
+
+CACHE_PREFIX = "naseco_fieldops:sync_scope"
+CACHE_TTL = 60 * 60
+
+# Roles that keep the unscoped, whole-country pull
+UNSCOPED_ROLES = ("System Manager",)
+
+# doctype -> Link fields that attach it to the graph, as (fieldname, parent doctype)
+SCOPE_LINKS = {
+	"Outgrower": [],
+	"Farm Plot": [("outgrower", "Outgrower")],
+	"Crop Cycle": [("plot", "Farm Plot")],
+	"Plot Crop Assignment": [("plot", "Farm Plot")],
+	"Crop Cycle Stage": [("crop_cycle", "Crop Cycle")],
+	"Field Visit": [("plot", "Farm Plot")],
+	"Finding": [("visit", "Field Visit"), ("crop_cycle", "Crop Cycle")],
+	"Stage Activity": [("crop_cycle", "Crop Cycle")],
+	"Stage Input Request": [("crop_cycle", "Crop Cycle")],
+	"Stage Input Dispatch": [("input_request", "Stage Input Request")],
+}
+
+# Outgrower fields that assign it to a user
+ASSIGNMENT_FIELDS = ("assigned_to", "assigned_supervisor")
+
+
+def _cache_key(user):
+	return f"{CACHE_PREFIX}:{user}"
+
+
+def is_unscoped(user, region=None):
+	if region:
+		return False
+	if user == "Administrator":
+		return True
+	return bool(set(UNSCOPED_ROLES) & set(frappe.get_roles(user)))
+
+
+def get_assigned_outgrowers(user):
+	"""Names of the outgrowers assigned to `user`, cached per user."""
+	key = _cache_key(user)
+	outgrowers = frappe.cache().get_value(key)
+	if outgrowers is None:
+		outgrowers = sorted(
+			frappe.get_all(
+				"Outgrower",
+				or_filters=[["assigned_to", "=", user], ["assigned_supervisor", "=", user]],
+				pluck="name",
+			)
+		)
+		frappe.cache().set_value(key, outgrowers, expires_in_sec=CACHE_TTL)
+	return outgrowers
+
+
+def get_scope(user=None, region=None):
+	"""
+	Return the user's portfolio roots as `{"outgrowers": [names], "region": region}`,
+	or None when the user is unscoped.
+	"""
+	user = user or frappe.session.user
+	if is_unscoped(user, region):
+		return None
+	return frappe._dict(outgrowers=get_assigned_outgrowers(user), region=region)
+
+
+def is_empty(scope):
+	return scope is not None and not scope.outgrowers and not scope.region
+
+
+def _condition(doctype, scope):
+	"""SQL condition on `tab{doctype}` keeping its rows inside the scope."""
+	table = f"`tab{doctype}`"
+	if doctype == "Outgrower":
+		conditions = []
+		if scope.outgrowers:
+			names = ", ".join(frappe.db.escape(name) for name in scope.outgrowers)
+			conditions.append(f"{table}.`name` in ({names})")
+		if scope.region:
+			conditions.append(f"{table}.`region` = {frappe.db.escape(scope.region)}")
+		return " or ".join(conditions)
+
+	conditions = []
+	for fieldname, parent in SCOPE_LINKS[doctype]:
+		if parent == "Outgrower" and not scope.region:
+			# the roots are known, no need to select them
+			values = ", ".join(frappe.db.escape(name) for name in scope.outgrowers)
+		else:
+			values = f"select `name` from `tab{parent}` where {_condition(parent, scope)}"
+		conditions.append(f"{table}.`{fieldname}` in ({values})")
+	return " or ".join(conditions)
+
+
+def get_scope_filter(scope, doctype):
+	"""
+	A filter keeping `doctype` inside the scope, to add to frappe filters.
+
+	Returns None when the doctype is not scoped (or the user is unscoped) and
+	an empty string when the scope is empty, so the store must be empty.
+	"""
+	if scope is None or doctype not in SCOPE_LINKS:
+		return None
+	if is_empty(scope):
+		return ""
+	return f"({_condition(doctype, scope)})"
+
+
+def _drop_pending():
+	users = frappe.flags.sync_scope_pending or set()
+	frappe.flags.sync_scope_pending = None
+	if users:
+		frappe.cache().delete_value([_cache_key(user) for user in users])
+
+
+def _clear_pending():
+	frappe.flags.sync_scope_pending = None
+
+
+def invalidate_user_scope(*users):
+	"""Drop the cached roots of `users` once the current transaction commits."""
+	users = set(filter(None, users))
+	if not users:
+		return
+	pending = frappe.flags.sync_scope_pending
+	if pending is None:
+		pending = frappe.flags.sync_scope_pending = set()
+		frappe.db.after_commit.add(_drop_pending)
+		frappe.db.after_rollback.add(_clear_pending)
+	pending.update(users)
+
+
+def invalidate_scope(doc, method=None, *args):
+	"""Outgrower doc_events hook: drop the cached roots of the users it is assigned to."""
+	users = [doc.get(fieldname) for fieldname in ASSIGNMENT_FIELDS]
+	if method == "on_update":
+		before = doc.get_doc_before_save()
+		if before is None:
+			return
+		old = [before.get(fieldname) for fieldname in ASSIGNMENT_FIELDS]
+		if old == users:
+			return
+		users += old
+	invalidate_user_scope(*users)
@@ -0,0 +1,106 @@
+# Copyright (c) 2026, NASECO and contributors
+# For license information, please see license.txt
+
+"""
+Newline-delimited JSON (NDJSON) streaming for sync pulls.
+
+Instead of building the whole `data` dict in memory, records are read in keyset
+batches and written one per line as the client consumes the response:
+
+	{"type": "store", "store": "outgrowers"}
+	{"type": "record", "store": "outgrowers", "data": {...}}
+	...
+	{"type": "trailer", "server_time": "...", "count": 1234}
+
+Only one batch of records is held in memory at a time.
+"""
+
+import json
+
+import frappe
+from frappe.utils.response import json_handler
+from werkzeug.wrappers import Response
+
+from naseco_fieldopsbackend.sync import cursor
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+# Number of parent documents hydrated per query while streaming
+STREAM_BATCH_SIZE = 500
+
+
+def is_stream_requested(args):
+	"""True when the caller opted into NDJSON via `stream=1` or `format=ndjson`."""
+	if str(args.get("format") or "").lower() == "ndjson":
+		return True
+	return bool(frappe.utils.cint(args.get("stream")))
+
+
+def iter_docs(doctype, filters, batch_size=STREAM_BATCH_SIZE):
+	"""Yield hydrated documents in `(modified, name)` order, one batch at a time."""
+	after = None
+	while True:
+		docs = cursor.fetch_after(doctype, filters, after, batch_size)
+		yield from docs
+		if len(docs) < batch_size:
+			return
+		last = docs[-1]
+		after = (str(last.modified), last.name)
+
+
+def dumps(obj):
+	return json.dumps(obj, separators=(",", ":"), default=json_handler) + "\n"
+
+
+def iter_ndjson(stores, trailer):
+	"""
+	Frame `(store, records)` pairs as NDJSON lines.
+
+	Args:
+		stores: iterable of `(store_name, iterable_of_records)`
+		trailer: dict merged into the final trailer line
+	"""
+	count = 0
+	try:
+		for store, records in stores:
+			yield dumps({"type": "store", "store": store})
+			for record in records:
+				count += 1
+				yield dumps({"type": "record", "store": store, "data": record})
+	except Exception as e:
+		frappe.log_error(f"Sync stream error: {e!s}")
+		yield dumps({"type": "error", "error": str(e)})
+		return
+	yield dumps(dict(trailer, type="trailer", count=count))
+
+
+def ndjson_response(stores, trailer):
+	"""Return a streaming response for `stores`."""
+	return streaming_response(iter_ndjson(stores, trailer), NDJSON_MIMETYPE)
+
+
+def streaming_response(chunks, mimetype):
+	"""
+	Return a response that writes `chunks` as the client reads them.
+
+	frappe closes the request's database connection before werkzeug drains the
+	body, so the generator re-attaches to the site as the requesting user when
+	it needs to.
+	"""
+	site = frappe.local.site
+	sites_path = getattr(frappe.local, "sites_path", ".")
+	user = frappe.session.user
+
+	def generate():
+		owns_context = not getattr(frappe.local, "site", None)
+		if owns_context:
+			frappe.init(site=site, sites_path=sites_path)
+			frappe.connect()
+			frappe.set_user(user)
+		try:
+			yield from chunks
+		finally:
+			if owns_context:
+				frappe.destroy()
+
+	return Response(generate(), mimetype=mimetype, direct_passthrough=True)